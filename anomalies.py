@@ -0,0 +1,193 @@
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db import connection
+from telemetry import TELEMETRY
+
+# Yükleme sonrası doğrulama. Birim fiyat ayrıştırıcısının tek koruması ucuzluk eşiği (min_unit_price);
+# kaçırılan bir "gr" 10-1000 kat hatalı birim fiyat üretir ve ortalamalara, endekse, tahmin eğitimine girer.
+# Her günün yüklemesinden sonra:
+#   - Her ürünün birim fiyatı kendi son ANOMALY_WINDOW günlük geçmişiyle kıyaslanır (log fiyat üzerinde
+#     medyan / MAD ile robust z). Geçmişi kısa olan yeni ürünler o günkü market x kategori dağılımıyla kıyaslanır.
+#   - Bir kategorinin satır sayısı son günlerin medyanının çok altına düşerse (bozuk seçici) işaretlenir.
+# Şüpheli ürün satırları price_anomalies tablosuna yazılır ve karantinaya alınır: prices görünümü, günlük özetler
+# ve tahmin geçmişi bu satırları görmez (price_facts'te durur). Yanlış alarm satırı silinip özet yenilenerek serbest
+# bırakılır. Kategori işaretleri (product_id NULL) sadece bilgi içindir.
+ANOMALY_WINDOW = int(os.getenv("ANOMALY_WINDOW", "30"))  # gün
+ANOMALY_MIN_HISTORY = int(os.getenv("ANOMALY_MIN_HISTORY", "5"))  # Ürün geçmişiyle kıyas için en az gün
+ANOMALY_Z = float(os.getenv("ANOMALY_Z", "10"))  # Ürün geçmişine göre robust z eşiği
+ANOMALY_CATEGORY_Z = float(os.getenv("ANOMALY_CATEGORY_Z", "4"))  # Yeni ürünler: kategori dağılımına göre
+# Sabit fiyatlı geçmişte MAD 0 olur; en az bu kadar log sapma (~%5) varsayılır ki her zam alarm olmasın
+ANOMALY_MAD_FLOOR = float(os.getenv("ANOMALY_MAD_FLOOR", "0.05"))
+COUNT_DROP_RATIO = float(os.getenv("COUNT_DROP_RATIO", "0.5"))  # Satır sayısı medyanın yarısının altına düşerse
+COUNT_DROP_MIN = int(os.getenv("COUNT_DROP_MIN", "10"))  # Medyanı bundan küçük kategoriler kıyaslanmaz
+
+# Sebepler
+PRICE_OUTLIER = "fiyat_sapmasi"
+CATEGORY_OUTLIER = "kategori_sapmasi"
+COUNT_DROP = "adet_dususu"
+
+# Normal dağılımda MAD -> standart sapma
+_MAD_SCALE = 1.4826
+
+# price_facts satırı karantinada değilse (rollups.py ve batch_forecast.py sorgularına eklenir)
+NOT_QUARANTINED = '''NOT EXISTS (SELECT 1 FROM price_anomalies a
+                                 WHERE a.product_id = price_facts.product_id AND a.date = price_facts.date)'''
+
+TODAY_QUERY = '''
+              SELECT product_id, market_id, category_id, unit_price
+              FROM price_facts
+              WHERE date = %s AND unit_price > 0
+              '''
+
+# Bugün görülen ürünlerin karantinada olmayan geçmişi
+HISTORY_QUERY = f'''
+                SELECT product_id, unit_price
+                FROM price_facts
+                WHERE date >= %s::date - %s::int AND date < %s
+                  AND unit_price > 0
+                  AND product_id IN (SELECT product_id FROM price_facts WHERE date = %s)
+                  AND {NOT_QUARANTINED}
+                '''
+
+COUNTS_QUERY = '''
+               SELECT market_id, category_id, count(*) AS n
+               FROM price_facts
+               WHERE date = %s
+               GROUP BY market_id, category_id
+               '''
+
+# Önceki günlerin özetleri henüz yenilenmemiş olabilir (birden çok gün birlikte yüklenince); sayımlar ham satırlardan
+COUNT_HISTORY_QUERY = '''
+                      SELECT market_id, category_id, date, count(*) AS n
+                      FROM price_facts
+                      WHERE date >= %s::date - %s::int AND date < %s
+                      GROUP BY market_id, category_id, date
+                      '''
+
+# O gün taranmayıp önceki günden taşınan kategoriler satır yazmaz; adet düşüşü sayılmaz
+CARRIED_QUERY = '''
+                SELECT m.id AS market_id, c.id AS category_id
+                FROM category_fingerprints cf
+                         JOIN markets m ON m.name = cf.market
+                         JOIN categories c ON c.name = cf.category
+                WHERE cf.date = %s AND cf.carried_from IS NOT NULL
+                '''
+
+INSERT_ANOMALIES = '''
+                   INSERT INTO price_anomalies (date, market_id, category_id, product_id, kind, value, baseline, score)
+                   VALUES %s
+                   '''
+
+OUT_COLUMNS = ["market_id", "category_id", "product_id", "kind", "value", "baseline", "score"]
+
+
+def _robust_z(values, median, mad):
+    return (values - median) / (_MAD_SCALE * np.maximum(mad, ANOMALY_MAD_FLOOR))
+
+
+def price_outliers(today, history, z=ANOMALY_Z, category_z=ANOMALY_CATEGORY_Z, min_history=ANOMALY_MIN_HISTORY):
+    """
+    today: product_id, market_id, category_id, unit_price (bir günün satırları)
+    history: product_id, unit_price (aynı ürünlerin önceki günleri)
+    Dönüş: şüpheli satırlar (OUT_COLUMNS); baseline karşılaştırılan medyan birim fiyat, score robust z.
+    Tüm hesap log birim fiyat üzerinde, ürün grupları için tek seferde yapılır.
+    """
+    today = today.assign(log=np.log(today["unit_price"].astype(float)))
+    hist = history.assign(log=np.log(history["unit_price"].astype(float)))
+
+    by_product = hist.groupby("product_id")["log"]
+    median = by_product.median()
+    mad = (hist["log"] - hist["product_id"].map(median)).abs().groupby(hist["product_id"]).median()
+    stats = pd.DataFrame({"median": median, "mad": mad, "n": by_product.size()})
+    today = today.join(stats, on="product_id")
+    known = today["n"].fillna(0) >= min_history
+    today["score"] = _robust_z(today["log"], today["median"], today["mad"])
+    today["kind"] = np.where(known & (today["score"].abs() >= z), PRICE_OUTLIER, None)
+
+    # Geçmişi yetersiz ürünler: aynı gün, aynı market ve kategorideki ürünlerin dağılımı
+    keys = [today["market_id"], today["category_id"]]
+    cat_median = today.groupby(keys)["log"].transform("median")
+    cat_mad = (today["log"] - cat_median).abs().groupby(keys).transform("median")
+    cat_score = _robust_z(today["log"], cat_median, cat_mad)
+    new = ~known & (cat_score.abs() >= category_z)
+    today.loc[new, "kind"] = CATEGORY_OUTLIER
+    today.loc[~known, "median"] = cat_median[~known]
+    today.loc[~known, "score"] = cat_score[~known]
+
+    flagged = today[today["kind"].notna()]
+    return flagged.assign(value=flagged["unit_price"].astype(float), baseline=np.exp(flagged["median"]))[OUT_COLUMNS]
+
+
+def count_drops(counts, history, carried=None, ratio=COUNT_DROP_RATIO, min_count=COUNT_DROP_MIN):
+    """
+    counts: market_id, category_id, n (bir gün); history: aynı kolonlar, önceki günlerin her biri için
+    Geçmişte olup bugün hiç satırı olmayan kategoriler 0 sayılır; carried (taşınan kategoriler) hariç tutulur.
+    Dönüş: işaretlenen kategoriler (OUT_COLUMNS; value bugünkü adet, baseline medyan, score oran)
+    """
+    keys = ["market_id", "category_id"]
+    baseline = history.groupby(keys)["n"].median().rename("baseline").reset_index()
+    df = baseline.merge(counts, on=keys, how="left")
+    df["n"] = df["n"].fillna(0)
+    if carried is not None and len(carried):
+        df = df.merge(carried.assign(_carried=True), on=keys, how="left")
+        df = df[df["_carried"].isna()]
+    df = df[(df["baseline"] >= min_count) & (df["n"] < ratio * df["baseline"])]
+    return df.assign(product_id=None, kind=COUNT_DROP, value=df["n"].astype(float),
+                     score=df["n"] / df["baseline"])[OUT_COLUMNS]
+
+
+def _read(cur, sql, params):
+    """Sorgu sonucunu COPY ile CSV olarak çeker (satır satır Python nesnesi üretmekten çok daha hızlı)."""
+    buffer = io.StringIO()
+    cur.copy_expert(f"COPY ({cur.mogrify(sql, params).decode()}) TO STDOUT WITH (FORMAT csv, HEADER)", buffer)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+
+def check_day(conn, date):
+    """
+    Bir günü doğrular: önceki işaretleri siler, yenilerini price_anomalies'e yazar. Commit çağırana bırakılır.
+    Dönüş: (karantinaya alınan ürün satırı sayısı, adet düşüşü olan kategoriler DataFrame'i)
+    """
+    cur = conn.cursor()
+    cur.execute("DELETE FROM price_anomalies WHERE date = %s", (date,))
+    today = _read(cur, TODAY_QUERY, (date,))
+    history = _read(cur, HISTORY_QUERY, (date, ANOMALY_WINDOW, date, date))
+    outliers = price_outliers(today, history)
+    drops = count_drops(_read(cur, COUNTS_QUERY, (date,)),
+                        _read(cur, COUNT_HISTORY_QUERY, (date, ANOMALY_WINDOW, date)),
+                        _read(cur, CARRIED_QUERY, (date,)))
+
+    flagged = pd.concat([outliers, drops], ignore_index=True)
+    rows = [(date, int(r.market_id), int(r.category_id), None if pd.isna(r.product_id) else int(r.product_id),
+             r.kind, float(r.value), float(r.baseline), round(float(r.score), 3))
+            for r in flagged.itertuples(index=False)]
+    if rows:
+        execute_values(cur, INSERT_ANOMALIES, rows, page_size=1000)
+    cur.close()
+    return len(outliers), drops
+
+
+def detect_anomalies(dates):
+    """Verilen günleri sırayla doğrular (her gün kendi transaction'ında). Karantinaya alınan satır sayısını döndürür."""
+    total = 0
+    with connection() as conn:
+        for date in sorted({str(d)[:10] for d in dates}):
+            started = time.perf_counter()
+            quarantined, drops = check_day(conn, date)
+            conn.commit()
+            total += quarantined
+            print(f"🧪 {date}: {quarantined} şüpheli fiyat karantinada, {len(drops)} kategoride adet düşüşü "
+                  f"({time.perf_counter() - started:.2f} sn).")
+            TELEMETRY.count("quarantined", quarantined)
+            for drop in drops.itertuples(index=False):
+                TELEMETRY.count("count_drops")
+                TELEMETRY.event("count_drop", market_id=int(drop.market_id), category_id=int(drop.category_id),
+                                rows=int(drop.value), baseline=float(drop.baseline))
+    return total
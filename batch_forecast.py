@@ -0,0 +1,123 @@
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from anomalies import NOT_QUARANTINED
+from db import connection, read_chunks
+from forecasters import get_forecaster
+from forecasting import fit_predict
+from model_store import ModelStore
+
+# Dashboard'daki en uzun seçenek 90 gün; hepsi tek seferde saklanır
+HORIZON_DAYS = 90
+MIN_HISTORY = 5  # predict_price ile aynı alt sınır
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", str(os.cpu_count() or 2)))
+
+# Karantinadaki şüpheli fiyatlar (anomalies.py) eğitime girmez
+HISTORY_QUERY = f'''
+                SELECT product_id, date AS ds, price AS y
+                FROM price_facts
+                WHERE product_id IN (SELECT product_id
+                                     FROM price_facts
+                                     GROUP BY product_id
+                                     HAVING count(*) >= %s)
+                  AND {NOT_QUARANTINED}
+                ORDER BY product_id, date
+                '''
+
+
+def _forecast_rows(product_id, history, forecast):
+    """Tahminin sadece geçmişten sonraki günlerini forecasts tablosu satırlarına çevirir."""
+    last_date = history["ds"].max()
+    future = forecast[forecast["ds"] > last_date]
+    return [(product_id, r.ds.date(), round(r.yhat, 2), round(r.yhat_lower, 2), round(r.yhat_upper, 2),
+             last_date.date()) for r in future.itertuples(index=False)]
+
+
+def _fit_one(job):
+    """İşçi süreçte tek ürün için model eğitir. Dönüş: (product_id, gelecek tahmin satırları, hata)"""
+    product_id, history, horizon, backend = job
+    # cmdstanpy her eğitimde INFO basıyor; binlerce ürün için log'u boğmasın
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    try:
+        forecast = fit_predict(history, horizon, cache_key=f"product:{product_id}", backend=backend)
+        return product_id, _forecast_rows(product_id, history, forecast), None
+    except Exception as e:
+        return product_id, [], str(e)
+
+
+def _fit_vectorized(forecaster, histories, horizon):
+    """Vektörel motor tüm ürünleri tek süreçte, tek matris üzerinde eğitir."""
+    by_id = dict(histories)
+    for product_id, forecast in forecaster.fit_predict_many(histories, horizon):
+        yield product_id, _forecast_rows(product_id, by_id[product_id], forecast), None
+
+
+def load_histories(min_history=MIN_HISTORY):
+    """Yeterli geçmişi olan tüm ürünlerin fiyat serilerini tek sorguda (sunucu tarafı imleçle parça parça) çeker."""
+    chunks = [chunk.astype({"ds": "datetime64[ns]", "y": float})
+              for chunk in read_chunks(HISTORY_QUERY, (min_history,))]
+    df = pd.concat(chunks, ignore_index=True)
+    return [(product_id, group[["ds", "y"]].reset_index(drop=True)) for product_id, group in df.groupby("product_id")]
+
+
+def save_forecasts(conn, rows, product_ids):
+    """Ürünlerin eski tahminlerini silip yenilerini toplu yazar."""
+    cur = conn.cursor()
+    cur.execute("DELETE FROM forecasts WHERE product_id = ANY(%s)", (list(product_ids),))
+    execute_values(cur, '''
+                   INSERT INTO forecasts (product_id, ds, yhat, yhat_lower, yhat_upper, history_end)
+                   VALUES %s
+                   ''', rows, page_size=5000)
+    conn.commit()
+    cur.close()
+
+
+def run_batch_forecast(horizon=HORIZON_DAYS, min_history=MIN_HISTORY, workers=FORECAST_WORKERS,
+                       backend=None):
+    """
+    Tüm ürünlerin modellerini eğitir ve tahminleri forecasts tablosuna yazar.
+    Prophet gibi ürün ürün eğitilen motorlar süreç havuzunda, vektörel motorlar (damped) tek seferde çalışır.
+    """
+    started = time.time()
+    forecaster = get_forecaster(backend)
+    histories = load_histories(min_history)
+    mode = "vektörel" if forecaster.vectorized else f"{workers} süreç"
+    print(f"🔮 {len(histories)} ürün için tahmin başlıyor ({forecaster.name}, {mode}, {horizon} gün)...")
+
+    if forecaster.vectorized:
+        results = list(_fit_vectorized(forecaster, histories, horizon))
+    else:
+        jobs = [(product_id, history, horizon, forecaster.name) for product_id, history in histories]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_fit_one, jobs, chunksize=8))
+        # İşçiler birbirinin yazdığını görmez; model önbelleği toplu iş sonunda gerçek boyutuyla bir kez budanır
+        ModelStore().evict()
+
+    all_rows, done_ids, errors = [], [], 0
+    for product_id, rows, error in results:
+        if error:
+            errors += 1
+            print(f"   ⚠️ Ürün {product_id}: {error}")
+            continue
+        all_rows.extend(rows)
+        done_ids.append(product_id)
+
+    if done_ids:
+        with connection() as conn:
+            save_forecasts(conn, all_rows, done_ids)
+
+    elapsed = time.time() - started
+    rate = len(done_ids) / (elapsed / 60) if elapsed > 0 else 0
+    print(f"✅ {len(done_ids)} ürün tahmini kaydedildi, {errors} hata. "
+          f"Süre: {elapsed:.1f} sn ({rate:.0f} ürün/dk)")
+    return len(done_ids)
+
+
+if __name__ == "__main__":
+    run_batch_forecast(workers=int(sys.argv[1]) if len(sys.argv) > 1 else FORECAST_WORKERS)
@@ -0,0 +1,61 @@
+"""
+Yükleme sonrası doğrulamanın (anomalies.price_outliers) bir günlük katalogdaki süresini ve isabetini ölçer.
+Sentetik ürünlerin ANOMALY_WINDOW günlük geçmişi market fiyatları gibi basamaklıdır (ara ara zam, kısa
+indirimler); bugünkü satırların bir kısmına birim fiyat ayrıştırma hatası eklenir (x10, x1000, /10).
+Geçmişi olmayan yeni ürünlerin bir kısmı da hatalıdır (kategori dağılımıyla kıyaslanır).
+
+Kullanım: python -m benchmarks.bench_anomalies [ürün_sayısı] [hata_oranı]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from anomalies import ANOMALY_WINDOW, price_outliers
+
+
+def synthetic_day(n_products, error_rate, seed=7):
+    rng = np.random.default_rng(seed)
+    product_id = np.arange(n_products)
+    market_id = rng.integers(1, 3, n_products)
+    category_id = rng.integers(1, 20, n_products)
+    base = np.exp(rng.normal(np.log(150), 0.8, n_products))
+
+    # Geçmiş: her gün %3 olasılıkla %5-25 zam, %5 olasılıkla o gün %10-40 indirim
+    shape = (ANOMALY_WINDOW, n_products)
+    steps = np.where(rng.random(shape) < 0.03, rng.uniform(1.05, 1.25, shape), 1)
+    levels = base * np.cumprod(steps, axis=0)
+    discount = np.where(rng.random(shape) < 0.05, rng.uniform(0.6, 0.9, shape), 1)
+    prices = levels * discount
+    history = pd.DataFrame({"product_id": np.tile(product_id, ANOMALY_WINDOW), "unit_price": prices.ravel().round(2)})
+
+    # %10'u yeni ürün (geçmişi yok)
+    new = rng.random(n_products) < 0.1
+    history = history[~np.tile(new, ANOMALY_WINDOW)]
+    today_price = levels[-1] * np.where(rng.random(n_products) < 0.05, rng.uniform(0.6, 0.9, n_products), 1)
+    bad = rng.random(n_products) < error_rate
+    today_price = np.where(bad, today_price * rng.choice([10, 1000, 0.1], n_products), today_price)
+    today = pd.DataFrame({"product_id": product_id, "market_id": market_id, "category_id": category_id,
+                          "unit_price": today_price.round(2)})
+    return today, history, bad
+
+
+if __name__ == "__main__":
+    n_products = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    error_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    today, history, bad = synthetic_day(n_products, error_rate)
+    print(f"🧪 {n_products} ürün, {len(history)} geçmiş satırı, {bad.sum()} hatalı fiyat")
+
+    price_outliers(today.head(100), history.head(1000))  # ısınma
+    runs = []
+    for _ in range(5):
+        start = time.perf_counter()
+        flagged = price_outliers(today, history)
+        runs.append(time.perf_counter() - start)
+    print(f"   ⏱️ price_outliers: en iyi {min(runs) * 1000:.0f} ms, ortanca {np.median(runs) * 1000:.0f} ms")
+
+    caught = np.isin(today["product_id"], flagged["product_id"])
+    print(f"   🎯 yakalanan hata: {(caught & bad).sum()}/{bad.sum()}, yanlış alarm: {(caught & ~bad).sum()} "
+          f"({(caught & ~bad).sum() / max((~bad).sum(), 1):.3%})")
+    print(flagged["kind"].value_counts().to_string())
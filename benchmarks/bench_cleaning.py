@@ -0,0 +1,91 @@
+"""
+Fiyat temizleme aşamasını ölçer: eski yöntem (scraper döngüsünde kart başına clean_price + birim fiyat)
+ile ham satırların kayıttan önce toplu temizlenmesi (cleaning.normalize_records).
+Toplu temizleme yazıcı thread'inde çalışır; tarayıcı döngüsünde kalan iş ayrıca ölçülür.
+Satırlar data/unit_names.csv adlarından üretilir; fiyatlar sitedeki gibi metindir ('1.249,90 TL'),
+bir kısmı boş / bozuk / sıfırdır. Geçerli satırlarda iki yöntemin aynı fiyatı verdiği de kontrol edilir.
+
+Kullanım: python -m benchmarks.bench_cleaning [satır_sayısı]
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import pandas as pd
+
+from cleaning import normalize_records
+from unit_parser import unit_price
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "unit_names.csv")
+JUNK = ["", None, "Stokta yok", "0,00 TL", "--"]
+
+
+def legacy_clean_price(price_text):
+    """main.clean_price'ın toplu temizleme öncesi hali (karşılaştırma için olduğu gibi bırakıldı)."""
+    if not price_text: return None
+    try:
+        clean = price_text.replace("TL", "").replace("₺", "").replace("\n", "").strip()
+        clean = clean.replace(".", "")
+        clean = clean.replace(",", ".")
+        return float(clean)
+    except ValueError:
+        return None
+
+
+def format_price(price, rng):
+    text = f"{price:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return rng.choice([f"{text} TL", f"₺{text}", f"{text}\nTL", text])
+
+
+def synthetic_records(n, seed=3):
+    corpus = pd.read_csv(CORPUS)
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        row = corpus.iloc[rng.randrange(len(corpus))]
+        price_text = rng.choice(JUNK) if rng.random() < 0.05 else format_price(row["price"] * rng.uniform(1, 40), rng)
+        records.append(["2026-01-01", rng.choice(["Migros", "A101 Kapıda"]), "Süt", f"{row['name']} {i}", price_text])
+    return records
+
+
+def legacy(records):
+    rows = []
+    for date, market, category, name, price_text in records:
+        if not name or not price_text: continue
+        price = legacy_clean_price(price_text)
+        if not price: continue
+        rows.append([date, market, category, name, price, unit_price(name, price), "TL"])
+    return rows
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    records = synthetic_records(n)
+    print(f"🧽 {n} ham satır")
+
+    start = time.perf_counter()
+    old_rows = legacy(records)
+    t_old = time.perf_counter() - start
+    print(f"   kart başına : {t_old:6.2f} sn  ({n / t_old:9.0f} satır/sn)  {len(old_rows)} satır")
+
+    # Scraper döngüsünde kalan iş: ham satırı eklemek
+    start = time.perf_counter()
+    raw = []
+    for record in records:
+        raw.append(list(record))
+    t_raw = time.perf_counter() - start
+    print(f"   ham ekleme  : {t_raw:6.2f} sn  (scraper döngüsünde kalan iş, {t_old / t_raw:.0f}x daha az)")
+
+    start = time.perf_counter()
+    rows, rejected = normalize_records(records)
+    t_new = time.perf_counter() - start
+    print(f"   toplu       : {t_new:6.2f} sn  ({n / t_new:9.0f} satır/sn)  {len(rows)} satır  "
+          f"->  {t_old / t_new:.1f}x")
+    print(f"   elenen      : {dict(Counter(r[-1] for r in rejected))}")
+
+    old = {(r[1], r[3]): tuple(r[4:6]) for r in old_rows}
+    new = {(r[1], r[3]): tuple(r[4:6]) for r in rows}
+    diff = [key for key in old.keys() | new.keys() if old.get(key) != new.get(key)]
+    print(f"   fark        : {len(diff)} satır" + (f" (ör. {diff[:3]})" if diff else ""))
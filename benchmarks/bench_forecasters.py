@@ -0,0 +1,89 @@
+"""
+Tahmin motorlarını sentetik fiyat serilerinde karşılaştırır: her serinin son 'h' günü
+ayrılır, kalanıyla eğitilip ayrılan günler tahmin edilir (MAE / MAPE) ve eğitim süresi ölçülür.
+Seriler market fiyatları gibi basamaklıdır: uzun sabit dönemler, ara ara zam ve kısa indirimler.
+
+Prophet ürün başına eğitildiği için sadece ilk birkaç seride ölçülür (kurulu değilse atlanır).
+
+Kullanım: python -m benchmarks.bench_forecasters [seri_sayısı] [gün] [ufuk] [prophet_seri_sayısı]
+"""
+import logging
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecasters import DampedTrendForecaster, ProphetForecaster, prophet_available
+
+
+def synthetic_series(n_series, n_days, seed=42):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=n_days, freq="D")
+    histories = []
+    for i in range(n_series):
+        price = rng.uniform(20, 500)
+        prices = []
+        for _ in range(n_days):
+            if rng.random() < 0.03:  # Zam
+                price *= 1 + rng.uniform(0.02, 0.12)
+            prices.append(price * (0.85 if rng.random() < 0.05 else 1.0))  # Tek günlük indirim
+        histories.append((i, pd.DataFrame({"ds": dates, "y": np.round(prices, 2)})))
+    return histories
+
+
+def evaluate(forecasts, actuals):
+    """forecasts / actuals: {anahtar: df}. Ayrılan günlerdeki ortalama mutlak ve yüzde hata."""
+    errors, pct = [], []
+    for key, actual in actuals.items():
+        merged = actual.merge(forecasts[key][["ds", "yhat"]], on="ds")
+        diff = (merged["yhat"] - merged["y"]).abs()
+        errors.append(diff.mean())
+        pct.append((diff / merged["y"]).mean() * 100)
+    return float(np.mean(errors)), float(np.mean(pct))
+
+
+def split(histories, horizon):
+    train = [(key, df.iloc[:-horizon]) for key, df in histories]
+    actuals = {key: df.iloc[-horizon:] for key, df in histories}
+    return train, actuals
+
+
+def report(name, n, elapsed, mae, mape):
+    print(f"   {name:<8}: {n:5d} seri  {elapsed:7.2f} sn  ({n / (elapsed / 60):8.0f} seri/dk)  "
+          f"MAE {mae:7.2f}  MAPE %{mape:5.2f}")
+
+
+if __name__ == "__main__":
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_days = int(sys.argv[2]) if len(sys.argv) > 2 else 180
+    horizon = int(sys.argv[3]) if len(sys.argv) > 3 else 14
+    n_prophet = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+
+    train, actuals = split(synthetic_series(n_series, n_days), horizon)
+    print(f"🔮 {n_series} seri, {n_days} gün geçmiş, son {horizon} gün tahmin ediliyor")
+
+    damped = DampedTrendForecaster()
+    start = time.perf_counter()
+    results = dict(damped.fit_predict_many(train, horizon))
+    elapsed = time.perf_counter() - start
+    report("damped", n_series, elapsed, *evaluate(results, actuals))
+
+    if prophet_available() and n_prophet > 0:
+        # cmdstanpy log seviyesini ilk eğitimde kendisi ayarlıyor; her eğitimdeki INFO satırları ölçümü boğmasın
+        logging.getLogger("cmdstanpy").disabled = True
+        subset = train[:n_prophet]
+        # Önbelleksiz ölçüm: cache_key verilmediği için model deposu kullanılmaz
+        prophet = ProphetForecaster()
+        start = time.perf_counter()
+        results = {key: prophet.fit_predict(df, horizon) for key, df in subset}
+        elapsed = time.perf_counter() - start
+        report("prophet", len(subset), elapsed, *evaluate(results, {key: actuals[key] for key, _ in subset}))
+
+        # Aynı alt kümede damped (karşılaştırma adil olsun)
+        start = time.perf_counter()
+        results = dict(damped.fit_predict_many(subset, horizon))
+        elapsed = time.perf_counter() - start
+        report("damped", len(subset), elapsed, *evaluate(results, {key: actuals[key] for key, _ in subset}))
+    else:
+        print("   prophet : kurulu değil, atlandı")
@@ -0,0 +1,88 @@
+"""
+executemany ile COPY + upsert yükleyicisini yerel PostgreSQL üzerinde karşılaştırır.
+executemany eski düz tabloyu geçici bir kopyada ölçer; COPY yolu gerçek şemaya yazar
+ama ölçüm sonunda ROLLBACK yapılır, veritabanında iz kalmaz.
+
+Kullanım: python -m benchmarks.bench_loader [satır_sayısı]
+"""
+import datetime
+import random
+import sys
+import time
+
+import psycopg2
+
+from db import DB_PARAMS
+from ingest import bulk_load
+
+TABLE_DDL = '''
+            CREATE TEMP TABLE {name}
+            (
+                id SERIAL PRIMARY KEY,
+                date DATE,
+                market VARCHAR(50),
+                category VARCHAR(100),
+                product_name TEXT,
+                price NUMERIC(10, 2),
+                unit_price NUMERIC(10, 2),
+                unit VARCHAR(20)
+            );
+            CREATE UNIQUE INDEX ON {name} (date, market, product_name);
+            '''
+
+
+def synthetic_rows(n):
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    rows = []
+    for i in range(n):
+        price = round(random.uniform(10, 900), 2)
+        rows.append([today, random.choice(["Migros", "A101 Kapıda"]), "Süt", f"Bench Ürün {i} 1 L", price, price, "TL"])
+    return rows
+
+
+def bench_executemany(conn, rows):
+    cur = conn.cursor()
+    cur.execute(TABLE_DDL.format(name="bench_many"))
+    start = time.perf_counter()
+    cur.executemany('''
+                    INSERT INTO bench_many (date, market, category, product_name, price, unit_price, unit)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ''', rows)
+    conn.commit()
+    return time.perf_counter() - start
+
+
+def bench_copy(conn, rows):
+    cur = conn.cursor()
+    cur.execute("SELECT count(*) FROM price_facts")
+    before = cur.fetchone()[0]
+
+    start = time.perf_counter()
+    bulk_load(conn, rows)
+    first = time.perf_counter() - start
+
+    # Aynı günü tekrar yüklemek kopya üretmemeli
+    start = time.perf_counter()
+    bulk_load(conn, rows)
+    rerun = time.perf_counter() - start
+
+    cur.execute("SELECT count(*) FROM price_facts")
+    assert cur.fetchone()[0] - before == len(rows), "upsert kopya satır üretti"
+    conn.rollback()
+    return first, rerun
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rows = synthetic_rows(n)
+    conn = psycopg2.connect(**DB_PARAMS)
+
+    t_many = bench_executemany(conn, rows)
+    t_copy, t_rerun = bench_copy(conn, rows)
+    conn.close()
+
+    print(f"📦 {n} satır")
+    print(f"   executemany       : {t_many:7.2f} sn  ({n / t_many:10.0f} satır/sn)")
+    print(f"   COPY + upsert     : {t_copy:7.2f} sn  ({n / t_copy:10.0f} satır/sn)")
+    print(f"   COPY (tekrar gün) : {t_rerun:7.2f} sn  ({n / t_rerun:10.0f} satır/sn)")
+    print(f"   Hızlanma          : {t_many / t_copy:.1f}x")
@@ -0,0 +1,336 @@
+"""
+Scraper'ları canlı Migros / A101 sitelerine gitmeden, yerel bir fixture sunucusuna karşı ölçer.
+Her market yapılandırması (scrapers/markets/) kategori adresleri yerel sunucuya çevrilerek scrapers.registry ile
+kurulur; böylece scrape_migros / scrape_a101 ve ileride eklenen her market aynı motorlarla, aynı şekilde çalışır.
+
+Sunucu her kategori için marketin sayfalama biçimine göre sayfa üretir:
+  - "page": ?sayfa=N ile sayfa sayfa liste (son sayfadan sonrası boş)
+  - "scroll": ilk ürünler HTML'de, kalanı sayfa sonuna gelindikçe JavaScript ile eklenir (sonsuz scroll)
+  - /api/...: Migros'un JSON liste servisi biçimi (HTTP hızlı yol)
+Kartlar marketin kendi seçicilerinden üretilir. benchmarks/data/sites/<market>/c<kategori sırası>_<sayfa>.html
+varsa (kaydedilmiş gerçek sayfa, ör. migros/c0_1.html) o dosya sunulur.
+
+Her market için tarayıcı (Selenium) ve HTTP motorları ayrı ayrı çalıştırılır; sayfa/sn, kart/sn, WebDriver istek
+sayısı, sunucuya gelen istek sayısı ve en yüksek bellek (Python + chromedriver + Chrome süreçleri) raporlanır.
+Sonuçlar commit'ler arasında karşılaştırılabilsin diye sıralı anahtarlarla JSON dosyasına yazılır.
+Chrome açılamazsa tarayıcı motorları atlanır. Sadece bazı marketler için: MARKETS="Migros" python -m ...
+
+Kullanım: python -m benchmarks.bench_scrapers [kategori_başı_ürün] [market_başı_kategori] [çıktı.json]
+"""
+import copy
+import datetime
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from scrapers.extract import round_trip_counter
+from scrapers.http_engine import create_session
+from scrapers.registry import build_market, discover
+from telemetry import TELEMETRY
+
+try:
+    import psutil
+except ImportError:  # Bellek ölçümü için; yoksa sadece bu sürecin en yüksek değeri (resource)
+    psutil = None
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data", "sites")
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "results", "bench_scrapers.json")
+
+PAGE_SIZE = 30  # "page" listelerinde sayfa başına kart
+SCROLL_BATCH = 24  # "scroll" listelerinde ilk ekran ve her scroll'da eklenen kart
+SCROLL_DELAY_MS = 150  # Yeni kartların gelmesi (ağ isteği yerine)
+CARD_HEIGHT = 240  # px; sayfanın gerçekten kaydırılması için
+# Yerel sunucuda marketin nezaket hız sınırı ölçülmez, scraper'ın kendi maliyeti ölçülür
+BENCH_FETCH = {"rate": 1000.0, "burst": 1000}
+RSS_INTERVAL = 0.05  # sn
+
+SCROLL_JS = """
+const rest = %s;
+let loading = false;
+window.addEventListener("scroll", () => {
+    if (loading || !rest.length) return;
+    if (window.pageYOffset + window.innerHeight < document.body.scrollHeight - %d) return;
+    loading = true;
+    setTimeout(() => {
+        document.getElementById("list").insertAdjacentHTML("beforeend", rest.splice(0, %d).join(""));
+        loading = false;
+    }, %d);
+});
+"""
+
+
+def _element(selector, text=""):
+    """Basit bir CSS seçicisinden ("div.a.b", ".x", "h3, h4") ona uyan eleman. Virgüllüde ilk seçenek kullanılır."""
+    selector = selector.split(",")[0].strip()
+    tag, *classes = selector.split(".")
+    tag = tag or "div"
+    class_attr = f' class="{" ".join(classes)}"' if classes else ""
+    return f"<{tag}{class_attr}>{text}</{tag}>", tag, class_attr
+
+
+def render_card(selectors, name, price_text):
+    _, tag, class_attr = _element(selectors["card"])
+    name_html = _element(selectors["name"], escape(name))[0]
+    price_html = _element(selectors["price"][0], escape(price_text))[0]
+    return f'<{tag}{class_attr} style="display:block;height:{CARD_HEIGHT}px">{name_html}{price_html}</{tag}>'
+
+
+def render_page(cards, script=""):
+    body = "".join(cards)
+    return (f'<!doctype html><html><head><meta charset="utf-8"><title>bench</title></head>'
+            f'<body><div id="list">{body}</div><script>{script}</script></body></html>')
+
+
+def products(market, category, n):
+    """Kategorinin sabit (tekrarlanabilir) ürünleri: [(ad, fiyat metni, kuruş)]"""
+    items = []
+    for i in range(n):
+        kurus = 1000 + (i * 7919 + len(category) * 104729) % 90000
+        price_text = f"{kurus // 100},{kurus % 100:02d} TL"
+        items.append((f"{market} {category} Ürün {i + 1} 1 L", price_text, kurus))
+    return items
+
+
+class FixtureSite:
+    """Bench marketlerinin sayfalarını üreten yerel sunucu. İstek sayısını sayar."""
+
+    def __init__(self, n_products):
+        self.n_products = n_products
+        self.configs = {}  # url anahtarı -> bench yapılandırması
+        self.requests = 0
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive; oturumlar bağlantıyı tekrar kullanır
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                status, content_type, body = site.respond(self.path)
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def add_market(self, config, n_categories):
+        """Market yapılandırmasının kategori adreslerini bu sunucuya çevirir; bench yapılandırmasını döndürür."""
+        key = re.sub(r"[^a-z0-9]+", "", config["name"].lower())
+        bench = copy.deepcopy(config)
+        bench["categories"] = [{"name": cat["name"], "url": f"{self.base_url}/site/{key}/c{i}"}
+                               for i, cat in enumerate(config["categories"][:n_categories])]
+        bench["api_url"] = f"{self.base_url}/api/{key}/{{slug}}"
+        bench["fetch"] = {**config.get("fetch", {}), **BENCH_FETCH}
+        self.configs[key] = bench
+        return bench
+
+    def category_size(self, index):
+        """Tek sıradaki kategoriler sayfa boyunun tam katı: son dolu sayfadan sonra boş sayfa gelir (liste sonu)."""
+        if index % 2 and self.n_products >= PAGE_SIZE:
+            return self.n_products // PAGE_SIZE * PAGE_SIZE
+        return self.n_products
+
+    def _recorded(self, key, slug, page):
+        path = os.path.join(DATA_DIR, key, f"{slug}_{page}.html")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def respond(self, path):
+        url = urlparse(path)
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] not in ("site", "api") or parts[1] not in self.configs:
+            return 404, "text/plain", "not found"
+        kind, key, slug = parts
+        config = self.configs[key]
+        index = int(slug[1:]) if slug[1:].isdigit() else 0
+        if index >= len(config["categories"]):
+            return 404, "text/plain", "not found"
+        query = parse_qs(url.query)
+        page = int(query.get(config.get("page_param", "page"), ["1"])[0])
+        items = products(config["label"], config["categories"][index]["name"], self.category_size(index))
+
+        if kind == "api":
+            page_items = items[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+            payload = {"data": {"searchInfo": {
+                "pageCount": -(-len(items) // PAGE_SIZE),
+                "storeProductInfos": [{"name": name, "shownPrice": kurus} for name, _, kurus in page_items]}}}
+            return 200, "application/json", json.dumps(payload, ensure_ascii=False)
+
+        recorded = self._recorded(key, slug, page)
+        if recorded is not None:
+            return 200, "text/html; charset=utf-8", recorded
+
+        selectors = config["selectors"]
+        cards = [render_card(selectors, name, price_text) for name, price_text, _ in items]
+        if config.get("pagination") == "scroll":
+            script = SCROLL_JS % (json.dumps(cards[SCROLL_BATCH:], ensure_ascii=False), CARD_HEIGHT,
+                                  SCROLL_BATCH, SCROLL_DELAY_MS)
+            return 200, "text/html; charset=utf-8", render_page(cards[:SCROLL_BATCH], script)
+        return 200, "text/html; charset=utf-8", render_page(cards[(page - 1) * PAGE_SIZE:page * PAGE_SIZE])
+
+
+class PeakRSS:
+    """Ölçüm boyunca bu sürecin ve alt süreçlerinin (chromedriver, Chrome) toplam RSS'inin en yüksek değeri."""
+
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        process = psutil.Process()
+        while not self._stop.is_set():
+            total = 0
+            for p in [process] + process.children(recursive=True):
+                try:
+                    total += p.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.peak = max(self.peak, total)
+            self._stop.wait(RSS_INTERVAL)
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        else:
+            import resource
+            self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    @property
+    def mb(self):
+        return round(self.peak / 2 ** 20, 1)
+
+
+def run_backend(site, config, backend, driver=None, session=None):
+    """Marketi tek motorla tarar; ölçümleri döndürür."""
+    market = build_market(config)  # Her çalıştırmada yeni seen_names
+    func = market["func"] if backend == "browser" else market["http_func"]
+    client = driver if backend == "browser" else session
+    rows = []
+    TELEMETRY.reset(engine=backend)
+    site.requests = 0
+    counter = round_trip_counter(driver) if driver is not None else None
+    trips_before = counter.total if counter else 0
+
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        leftover = func(client, rows, "2030-01-01", categories=market["categories"], **market["kwargs"])
+        seconds = time.perf_counter() - started
+
+    pages = TELEMETRY.totals()[1].get("pages", 0)
+    result = {
+        "market": market["label"],
+        "backend": backend,
+        "categories": len(market["categories"]),
+        "incomplete": len(leftover or []),
+        "pages": pages,
+        "cards": len(rows),
+        "seconds": round(seconds, 3),
+        "pages_per_s": round(pages / seconds, 2) if seconds else None,
+        "cards_per_s": round(len(rows) / seconds, 1) if seconds else None,
+        "http_requests": site.requests,
+        "peak_rss_mb": rss.mb,
+    }
+    if counter:
+        trips = counter.total - trips_before
+        result["round_trips"] = trips
+        result["round_trips_per_page"] = round(trips / pages, 1) if pages else None
+    return result
+
+
+def open_driver():
+    try:
+        from scrapers.driver import create_driver
+        return create_driver()
+    except Exception as e:
+        print(f"⚠️ Tarayıcı açılamadı, tarayıcı motorları atlanıyor: {type(e).__name__}: {str(e).strip()[:200]}")
+        return None
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    n_products = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    n_categories = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    out_path = sys.argv[3] if len(sys.argv) > 3 else RESULTS_PATH
+
+    site = FixtureSite(n_products).start()
+    configs = [site.add_market(config, n_categories) for config in discover()]
+    print(f"🧪 {len(configs)} market, market başı {n_categories} kategori, kategori başı {n_products} ürün "
+          f"({site.base_url})")
+
+    results = []
+    session = create_session()
+    driver = open_driver()
+    try:
+        for config in configs:
+            backends = ["browser"] if driver is not None else []
+            if build_market(config)["http_func"]:
+                backends.append("http")
+            for backend in backends:
+                result = run_backend(site, config, backend, driver=driver, session=session)
+                results.append(result)
+                trips = f", {result['round_trips']} WebDriver isteği" if "round_trips" in result else ""
+                print(f"   ⏱️ {result['market']} / {backend}: {result['pages']} sayfa, {result['cards']} kart, "
+                      f"{result['seconds']:.2f} sn ({result['pages_per_s']} sayfa/sn, {result['cards_per_s']} kart/sn"
+                      f"{trips}, en yüksek bellek {result['peak_rss_mb']} MB)")
+    finally:
+        if driver is not None:
+            driver.quit()
+        session.close()
+        site.stop()
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "browser": driver is not None,
+        "settings": {"products_per_category": n_products, "categories_per_market": n_categories,
+                     "page_size": PAGE_SIZE, "scroll_batch": SCROLL_BATCH, "scroll_delay_ms": SCROLL_DELAY_MS},
+        "results": sorted(results, key=lambda r: (r["market"], r["backend"])),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"💾 Sonuçlar: {out_path}")
@@ -0,0 +1,133 @@
+"""
+Birim fiyat ayrıştırıcısını örnek ürün adları üzerinde doğrular ve hızını ölçer.
+data/unit_names.csv: gerçek market ürün adları ve beklenen miktar / birim / paket adedi / birim fiyat.
+Tekil (parse_unit) ve toplu (parse_units) sürümlerin beklenenle aynı olduğu kontrol edilir, eski
+ayrıştırıcıdan farklı çıkan adlar listelenir; sonra isim/sn cinsinden hız karşılaştırılır.
+
+Kullanım: python -m benchmarks.bench_unit_parser [isim_sayısı]
+"""
+import math
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+from unit_parser import parse_unit, parse_units
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "unit_names.csv")
+
+
+def legacy_unit_price(product_name, price):
+    """main.extract_unit_price'in unit_parser öncesi hali (karşılaştırma için olduğu gibi bırakıldı)."""
+    name_lower = product_name.lower().replace("İ", "i").replace("I", "ı").replace(" ", "").replace(",", ".")
+
+    # 1. MULTIPACK KURALI (Örn: 4x1 L, 6*200 ml)
+    # Regex: Rakam + (x veya *) + Rakam + Birim
+    multipack = re.search(r"(\d+)\s*[\*xX]\s*(\d*\.?\d+)\s*(kg|gr|g|l|ml|lt)", name_lower)
+
+    if multipack:
+        count = float(multipack.group(1))
+        amount = float(multipack.group(2))
+        unit = multipack.group(3)
+
+        # Gramaj dönüşümü (ml/gr -> L/kg)
+        if unit in ["gr", "g", "ml"]: amount /= 1000.0
+
+        total_amount = count * amount
+        if total_amount > 0:
+            return round(price / total_amount, 2)
+
+    # 2. YUMURTA KURALI (Adet hesabı)
+    if "yumurta" in name_lower:
+        # 15'li, 30lu vb.
+        match = re.search(r"(\d+)\s*['’]?\s*[l][ıiIuÜ]", name_lower)
+        if match: return round(price / float(match.group(1)), 2)
+
+        # 30 adet vb.
+        match_adet = re.search(r"(\d+)\s*adet", name_lower)
+        if match_adet: return round(price / float(match_adet.group(1)), 2)
+
+    # 3. STANDART GRAMAJ (1 kg, 500 gr vb.)
+    # Kalibre koruması (400/600 gr levrek gibi ifadeleri bölmesin)
+    if "/" in name_lower and any(x in name_lower for x in ['levrek', 'cipura', 'somon', 'uskumru']):
+        return price
+
+    match = re.search(r"(\d+)(kg|gr|g|l|ml|lt)", name_lower)
+    if match:
+        try:
+            amount = float(match.group(1))
+            unit = match.group(2)
+            if unit in ["gr", "g", "ml"]: amount /= 1000.0
+
+            if amount > 0:
+                u_p = price / amount
+                # Güvenlik: 5 TL altı birim fiyat (Su/Soda hariç) genelde hatadır, bölme.
+                if u_p < 5.0 and "su" not in name_lower and "soda" not in name_lower: return price
+                return round(u_p, 2)
+        except:
+            return price
+
+    return price
+
+
+def load_corpus():
+    df = pd.read_csv(CORPUS, keep_default_na=False)
+    df["amount"] = pd.to_numeric(df["amount"])
+    df["unit"] = df["unit"].replace("", None)
+    df["confident"] = df["confident"].astype(bool)
+    return df
+
+
+def check(corpus):
+    """Beklenen değerlerden sapan satırları döndürür (tekil ve toplu sürüm ayrı ayrı)."""
+    batch = parse_units(corpus["name"], corpus["price"])
+    failures = []
+    for i, row in corpus.iterrows():
+        single = parse_unit(row["name"], row["price"])
+        for label, got in (("tekil", single), ("toplu", batch.loc[i])):
+            same_amount = (math.isnan(row["amount"]) and math.isnan(got.amount)) or \
+                          math.isclose(row["amount"], got.amount, rel_tol=1e-9)
+            same_unit = row["unit"] == got.unit or (pd.isna(row["unit"]) and pd.isna(got.unit))
+            if not (same_amount and same_unit and row["pack_count"] == got.pack_count
+                    and row["unit_price"] == got.unit_price and row["confident"] == got.confident):
+                failures.append((label, row["name"], got))
+    return failures
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    corpus = load_corpus()
+    failures = check(corpus)
+    print(f"🧪 {len(corpus)} örnek ad, {len(failures)} hatalı sonuç")
+    for label, name, got in failures:
+        print(f"   ❌ ({label}) {name}: {got}")
+
+    changed = [(r.name, legacy_unit_price(r.name, r.price), r.unit_price)
+               for r in corpus.itertuples(index=False) if legacy_unit_price(r.name, r.price) != r.unit_price]
+    print(f"   Eski ayrıştırıcıdan farklı: {len(changed)}")
+    for name, old, new in changed:
+        print(f"      {name}: {old} -> {new}")
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    reps = n // len(corpus) + 1
+    prices = (corpus["price"].tolist() * reps)[:n]
+    # Günlük tarama: adların hepsi farklı; geçmişi yeniden işleme: aynı adlar her gün tekrar eder
+    cases = {
+        "farklı adlar": [f"Ürün{i}- {name}" for i, name in enumerate((corpus["name"].tolist() * reps)[:n])],
+        "tekrar eden adlar": (corpus["name"].tolist() * reps)[:n],
+    }
+    for label, names in cases.items():
+        t_legacy = timed(lambda: [legacy_unit_price(a, b) for a, b in zip(names, prices)])
+        t_single = timed(lambda: [parse_unit(a, b) for a, b in zip(names, prices)])
+        t_batch = timed(parse_units, names, prices)
+        print(f"⏱️ {n} ad ({label})")
+        print(f"   eski (re.search)   : {n / t_legacy:10.0f} ad/sn")
+        print(f"   parse_unit (tekil) : {n / t_single:10.0f} ad/sn")
+        print(f"   parse_units (toplu): {n / t_batch:10.0f} ad/sn  ({t_legacy / t_batch:.1f}x)")
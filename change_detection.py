@@ -0,0 +1,72 @@
+import datetime
+import hashlib
+import os
+import threading
+
+from db import connection
+from telemetry import TELEMETRY
+
+# Kategorinin ilk sayfası önceki taramadakiyle birebir aynıysa (aynı ürünler, aynı fiyat metinleri) kategori
+# taranmaz; o gün için önceki taramanın satırlarını gösteren tek bir işaret (category_fingerprints.carried_from)
+# yazılır. prices görünümü ve günlük özetler bu işaretleri önceki günün satırlarıyla doldurur.
+CHANGE_DETECTION = os.getenv("CHANGE_DETECTION", "1") == "1"
+# İlk sayfa değişmese de sonraki sayfalarda değişiklik olabilir; en eski tam tarama bu kadar günden
+# eskiyse kategori yeniden baştan taranır
+FINGERPRINT_MAX_AGE_DAYS = int(os.getenv("FINGERPRINT_MAX_AGE_DAYS", "7"))
+
+# Her kategorinin bugünden önceki son parmak izi ve o parmak izinin ait olduğu gerçek tarama günü
+PREVIOUS_QUERY = '''
+                 SELECT DISTINCT ON (market, category) market, category, fingerprint, COALESCE(carried_from, date)
+                 FROM category_fingerprints
+                 WHERE date < %s
+                 ORDER BY market, category, date DESC
+                 '''
+
+
+def fingerprint(cards):
+    """Kartların (ad, fiyat metni) sıradan bağımsız özeti. Sitenin sıralamayı değiştirmesi değişiklik sayılmaz."""
+    lines = sorted(f"{(card['name'] or '').strip()}\t{(card['price_text'] or '').strip()}" for card in cards)
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+class ChangeDetector:
+    """
+    Scraper'lar her kategorinin ilk sayfasını first_page() ile bildirir; True dönerse kategori
+    değişmemiştir ve taranmadan bırakılır. Kararlar on_record(market, kategori, parmak_izi, carried_from)
+    ile kaydedilir (carried_from None ise kategori bugün baştan taranıyordur).
+    """
+
+    def __init__(self, previous, today_date, on_record=None, max_age_days=FINGERPRINT_MAX_AGE_DAYS):
+        self.previous = previous  # (market, kategori) -> (parmak izi, kaynak gün)
+        self.today = datetime.date.fromisoformat(str(today_date)[:10])
+        self.on_record = on_record
+        self.max_age_days = max_age_days
+        self.carried = {}  # (market, kategori) -> kaynak gün
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, today_date, **kwargs):
+        with connection() as conn:
+            cur = conn.cursor()
+            cur.execute(PREVIOUS_QUERY, (today_date,))
+            previous = {(market, category): (fp, source) for market, category, fp, source in cur.fetchall()}
+            cur.close()
+        return cls(previous, today_date, **kwargs)
+
+    def first_page(self, market, category, cards):
+        if not cards:
+            return False
+        fp = fingerprint(cards)
+        prev_fp, source = self.previous.get((market, category), (None, None))
+        unchanged = prev_fp == fp and (self.today - source).days <= self.max_age_days
+
+        with self._lock:
+            if unchanged:
+                self.carried[(market, category)] = source
+        if self.on_record:
+            self.on_record(market, category, fp, source if unchanged else None)
+        if unchanged:
+            print(f"   ⏭️ {market} / {category}: ilk sayfa değişmemiş, {source} taraması taşınıyor.")
+            TELEMETRY.count("categories_carried", market=market)
+            TELEMETRY.event("carried", market=market, category=category, source=str(source))
+        return unchanged
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from unit_parser import parse_units
+
+# Scraper'lar sayfadan okuduklarını olduğu gibi bırakır; fiyat temizleme, ad normalizasyonu ve birim fiyat
+# hesabı yazmadan önce burada, tüm parti için tek seferde (pyarrow / RE2 string işlemleriyle) yapılır.
+# Elenen her satır sebebiyle birlikte rejected_rows tablosuna yazılır.
+
+RAW_COLUMNS = ("date", "market", "category", "product_name", "price_text")
+
+# Reddedilme sebepleri
+NO_NAME = "ad_yok"
+NO_PRICE = "fiyat_yok"  # Stokta yok vs.
+BAD_PRICE = "fiyat_okunamadi"
+NON_POSITIVE = "fiyat_sifir"
+DUPLICATE = "tekrar"  # Aynı gün aynı markette aynı adla (products anahtarı) bir kez daha gelen ürün
+
+# Fiyat metninden atılanlar: para birimi, boşluklar (satır sonu, bölünmez boşluk dahil) ve binlik ayracı nokta
+_PRICE_NOISE = r"TL|₺|\s|\x{00A0}|\."
+_PRICE_NUMBER = r"^\d+(?:\.\d+)?$"
+
+
+def clean_prices(texts):
+    """'1.249,90 TL' -> 1249.9. texts: pyarrow string dizisi. Okunamayan veya boş metinler NaN olur."""
+    clean = pc.replace_substring(pc.replace_substring_regex(texts, _PRICE_NOISE, ""), ",", ".")
+    valid = pc.fill_null(pc.match_substring_regex(clean, _PRICE_NUMBER), False)
+    prices = pc.cast(pc.if_else(valid, clean, pa.scalar(None, pa.string())), pa.float64())
+    return prices.to_numpy(zero_copy_only=False)
+
+
+def normalize_names(names):
+    """Baştaki/sondaki ve tekrarlanan boşlukları temizler. Yazım (büyük/küçük harf) korunur; ürün kimliği addır."""
+    # Tek boşluklara dokunulmaz (hepsini yeniden yazmak RE2'de birkaç kat yavaş)
+    return pc.replace_substring_regex(pc.utf8_trim_whitespace(names), r"[\s\x{00A0}]{2,}|[\t\n\r\f\x{00A0}]", " ")
+
+
+def _is_blank(arr):
+    return pc.fill_null(pc.equal(arr, ""), True).to_numpy(zero_copy_only=False)
+
+
+def normalize_records(records, seen=None):
+    """
+    records: scraper'ların topladığı (date, market, category, product_name, price_text) satırları.
+    seen: önceki partilerde yazılmış (date, market, product_name) anahtarları; akışla parti parti yüklemede
+      tekrar kontrolü böylece partiler arası yapılır. Sadece okunur, güncellemek çağırana kalır.
+    Dönüş: (rows, rejected)
+      rows: bulk_load'un beklediği (date, market, category, product_name, price, unit_price, unit) satırları
+      rejected: (date, market, category, product_name, price_text, reason) satırları (ham metinleriyle)
+    """
+    if not len(records):
+        return [], []
+
+    raw_names = pa.array([r[3] for r in records], type=pa.string())
+    price_text = pc.utf8_trim_whitespace(pa.array([r[4] for r in records], type=pa.string()))
+    names = normalize_names(raw_names)
+    prices = clean_prices(price_text)
+
+    # Sırası önemli: sonraki atama öncekini ezer, en temel sebep kalır
+    reason = np.full(len(records), None, dtype=object)
+    reason[np.isnan(prices)] = BAD_PRICE
+    with np.errstate(invalid="ignore"):
+        reason[prices <= 0] = NON_POSITIVE
+    reason[_is_blank(price_text)] = NO_PRICE
+    reason[_is_blank(names)] = NO_NAME
+
+    # Ürün kimliği bulk_load'daki gibi (market, ad) birebir; aynı ürün aynı gün tekrar gelirse ilki kalır.
+    # İlki kalır ki satırın hangi partiye düştüğü sonucu değiştirmesin (önceki partiler çoktan yazılmıştır)
+    valid = np.flatnonzero(pd.isna(reason))
+    seen = seen or ()
+    batch = set()
+    duplicated = np.zeros(len(valid), dtype=bool)
+    for j, key in enumerate(zip([records[i][0] for i in valid], [records[i][1] for i in valid],
+                                names.take(pa.array(valid)).to_pylist())):
+        duplicated[j] = key in batch or key in seen
+        batch.add(key)
+    reason[valid[duplicated]] = DUPLICATE
+
+    valid = np.flatnonzero(pd.isna(reason))
+    clean_names = names.take(pa.array(valid)).to_pylist()
+    clean_prices_ = prices[valid].round(2)
+    unit_prices = parse_units(clean_names, clean_prices_)["unit_price"].tolist()
+
+    rows = [(record[0], record[1], record[2], name, price, unit_price, "TL")
+            for record, name, price, unit_price in zip(map(records.__getitem__, valid.tolist()), clean_names,
+                                                       clean_prices_.tolist(), unit_prices)]
+    rejected = [tuple(records[i][:5]) + (reason[i],) for i in np.flatnonzero(~pd.isna(reason)).tolist()]
+    return rows, rejected
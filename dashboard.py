@@ -2,25 +2,30 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import psycopg2
-from thefuzz import process
-# YENİ: Forecasting modülünü ekledik
-from forecasting import predict_price
+# Tahminler (batch_forecast.py) ve ürün eşleşmeleri (matching.py) gece toplu işte hesaplanır; dashboard sadece okur
+from dashboard_data import (IncrementalLoader, load_rollups, load_forecast, load_matches, load_runs, run_stages,
+                            run_market_counts, load_index, load_anomalies, data_filters, load_page, export_data,
+                            PAGE_SIZE)
+from inflation_index import ALL, INDEX_METHOD, index_rates
+from rollups import combine_rollups
+from telemetry import STAGES
 
 import os
-from dotenv import load_dotenv
-
-# .env dosyasını yükle
-load_dotenv()
-
-# Veritabanı bilgilerini ortam değişkenlerinden al
-DB_PARAMS = {
-    "dbname": os.getenv("DB_NAME"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "host": os.getenv("DB_HOST"),
-    "port": os.getenv("DB_PORT")
+# Veritabanı bağlantıları (.env'den) db.py'deki ortak havuzdan gelir; tüm oturumlar aynı havuzu paylaşır
+
+# Önbellek süresi (sn): bu süre dolunca sadece değişen günler veritabanından çekilir
+DASHBOARD_TTL = int(os.getenv("DASHBOARD_TTL", "300"))
+
+# Kolonların ekrandaki adları
+COLUMN_LABELS = {
+    "date": "Tarih", "market": "Market", "category": "Kategori",
+    "product_name": "Ürün Adı", "price": "Raf Fiyatı",
+    "unit_price": "Birim Fiyat (TL/Kg-L)", "unit": "Birim"
 }
+# Sekmelerin anlık görüntüden okuduğu kolonlar: ürün listesi (son gün) ve tek ürünün fiyat geçmişi
+PRODUCT_COLUMNS = ("market", "product_name", "unit_price")
+HISTORY_COLUMNS = ("date", "price")
+
 st.set_page_config(
     page_title="Enflasyon Monitörü Pro",
     page_icon="💸",
@@ -39,91 +44,182 @@ st.markdown("""
 # -----------------------------------------------------------------------------
 # 2. VERİ YÜKLEME
 # -----------------------------------------------------------------------------
-@st.cache_data
-def load_data():
+@st.cache_resource
+def get_loader():
+    # Tüm oturumlar aynı yerel anlık görüntüyü paylaşır
+    return IncrementalLoader()
+
+
+@st.cache_data(ttl=DASHBOARD_TTL)
+def sync_snapshot():
+    # Değişen günleri yerel anlık görüntüye çeker; dönen sürüm okuma önbelleğinin anahtarıdır
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        query = "SELECT * FROM prices"
-        df = pd.read_sql(query, conn)
-        conn.close()
-
-        if df.empty: return pd.DataFrame()
-
-        df = df.rename(columns={
-            "date": "Tarih", "market": "Market", "category": "Kategori",
-            "product_name": "Ürün Adı", "price": "Raf Fiyatı",
-            "unit_price": "Birim Fiyat (TL/Kg-L)", "unit": "Birim"
-        })
-        df["Tarih"] = pd.to_datetime(df["Tarih"])
-        return df
+        return get_loader().refresh()
     except Exception as e:
         st.error(f"Veritabanı Hatası: {e}")
+        return None
+
+
+@st.cache_data(ttl=DASHBOARD_TTL, max_entries=32)
+def load_view(version, columns, markets=None, categories=None, products=None, start=None, end=None):
+    # Sadece sekmenin istediği kolonlar ve satırlar okunur (version değişince önbellek tazelenir)
+    try:
+        return get_loader().read(columns, markets, categories, products, start, end).rename(columns=COLUMN_LABELS)
+    except Exception as e:
+        st.error(f"Anlık Görüntü Hatası: {e}")
+        return pd.DataFrame(columns=[COLUMN_LABELS[c] for c in columns])
+
+
+@st.cache_data(ttl=DASHBOARD_TTL)
+def load_rollup_data():
+    # Günlük özetler (main.py her yüklemeden sonra günceller); grafik ve KPI'lar ham satırlara inmez
+    try:
+        return load_rollups()
+    except Exception as e:
+        st.error(f"Özet Tablo Hatası: {e}")
         return pd.DataFrame()
 
 
-df = load_data()
+@st.cache_data(ttl=DASHBOARD_TTL)
+def load_match_data(product_name, market):
+    try:
+        return load_matches(product_name, market)
+    except Exception as e:
+        st.error(f"Eşleştirme Tablosu Hatası: {e}")
+        return pd.DataFrame()
+
+
+@st.cache_data(ttl=DASHBOARD_TTL)
+def load_run_data():
+    # main.py'nin her çalıştırma sonunda yazdığı rapor satırları (telemetry.py)
+    try:
+        return load_runs()
+    except Exception as e:
+        st.error(f"Çalıştırma Raporu Hatası: {e}")
+        return pd.DataFrame()
+
+
+@st.cache_data(ttl=DASHBOARD_TTL)
+def load_index_data():
+    # Sepet endeksi (main.py her yüklemeden sonra günceller)
+    try:
+        return load_index(INDEX_METHOD)
+    except Exception as e:
+        st.error(f"Endeks Tablosu Hatası: {e}")
+        return pd.DataFrame()
+
+
+@st.cache_data(ttl=DASHBOARD_TTL)
+def load_anomaly_data():
+    # Yükleme sonrası doğrulamada karantinaya alınan fiyatlar ve adet düşüşleri
+    try:
+        return load_anomalies()
+    except Exception as e:
+        st.error(f"Karantina Tablosu Hatası: {e}")
+        return pd.DataFrame()
+
+
+@st.cache_data(ttl=DASHBOARD_TTL)
+def load_data_page(filters, after, limit):
+    # Veri sekmesinin bir sayfası (filtre ve sayfalama veritabanında)
+    try:
+        return load_page(filters, after, limit)
+    except Exception as e:
+        st.error(f"Veritabanı Hatası: {e}")
+        return pd.DataFrame()
+
+
+def next_page(cursor):
+    st.session_state.data_cursors.append(cursor)
+
+
+def previous_page():
+    st.session_state.data_cursors.pop()
+
+
+snapshot_version = sync_snapshot()
+rollups_df = load_rollup_data()
 
 # -----------------------------------------------------------------------------
 # 3. YAN PANEL
 # -----------------------------------------------------------------------------
+# Listeler özet tablodan gelir (satır sayısı: gün x market x kategori)
 with st.sidebar:
     st.header("🎛️ Kontrol Paneli")
-    if not df.empty:
-        category_list = ["Tümü"] + list(df["Kategori"].unique())
+    if not rollups_df.empty:
+        category_list = ["Tümü"] + list(rollups_df["category"].unique())
         selected_category = st.selectbox("Kategori Seç:", category_list, index=1)
-        market_list = df["Market"].unique()
+        market_list = list(rollups_df["market"].unique())
         selected_market = st.multiselect("Market:", market_list, default=market_list)
-        st.caption(f"📅 Son Veri: {df['Tarih'].max().strftime('%d-%m-%Y')}")
+        st.caption(f"📅 Son Veri: {rollups_df['date'].max().strftime('%d-%m-%Y')}")
     else:
         st.warning("Veri yok.")
 
 # -----------------------------------------------------------------------------
 # 4. ANA EKRAN
 # -----------------------------------------------------------------------------
-if df.empty: st.stop()
+if rollups_df.empty: st.stop()
+
+selected_categories = None if selected_category == "Tümü" else (selected_category,)
+page_title = "Genel Piyasa Özeti" if selected_category == "Tümü" else f"{selected_category} Analizi"
+
+# Aynı filtre özet tabloya da uygulanır (satır sayısı: gün x market x kategori)
+filtered_rollups = pd.DataFrame()
+if not rollups_df.empty:
+    filtered_rollups = rollups_df[rollups_df["market"].isin(selected_market)]
+    if selected_category != "Tümü":
+        filtered_rollups = filtered_rollups[filtered_rollups["category"] == selected_category]
 
-if selected_category == "Tümü":
-    filtered_df = df[df["Market"].isin(selected_market)]
-    page_title = "Genel Piyasa Özeti"
-else:
-    filtered_df = df[(df["Kategori"] == selected_category) & (df["Market"].isin(selected_market))].copy()
-    page_title = f"{selected_category} Analizi"
+# Tahmin ve karşılaştırma sekmelerinin ürün listesi: seçili kategori ve marketlerin son günkü ürünleri
+last_date = (filtered_rollups if not filtered_rollups.empty else rollups_df)["date"].max().date()
+products_df = load_view(snapshot_version, PRODUCT_COLUMNS, tuple(selected_market), selected_categories,
+                        start=last_date, end=last_date)
 
 st.title(f"📊 {page_title}")
 
-# KPI
-if not filtered_df.empty:
-    avg_price = filtered_df["Birim Fiyat (TL/Kg-L)"].mean()
-    min_row = filtered_df.loc[filtered_df["Birim Fiyat (TL/Kg-L)"].idxmin()]
+# KPI (özetlerden: ortalama n ile ağırlıklı, en ucuz ürün özet satırında hazır)
+if not filtered_rollups.empty:
+    total_count = filtered_rollups["n"].sum()
+    avg_price = (filtered_rollups["mean"] * filtered_rollups["n"]).sum() / total_count
+    min_row = filtered_rollups.loc[filtered_rollups["min"].idxmin()]
 
     c1, c2, c3 = st.columns(3)
-    c1.metric("Toplam Ürün", len(filtered_df), "Adet")
+    c1.metric("Toplam Ürün", int(total_count), "Adet")
     c2.metric("Ortalama Birim Fiyat", f"{avg_price:.2f} ₺")
-    c3.metric("En Ucuz", f"{min_row['Birim Fiyat (TL/Kg-L)']:.2f} ₺", min_row['Ürün Adı'][:20] + "...")
+    c3.metric("En Ucuz", f"{min_row['min']:.2f} ₺", str(min_row['min_product'])[:20] + "...")
 
 st.markdown("---")
 
 # -----------------------------------------------------------------------------
 # 5. ANALİZ SEKMELERİ (YENİ SEKME EKLENDİ)
 # -----------------------------------------------------------------------------
-tab1, tab2, tab3, tab4 = st.tabs(["🔮 Gelecek Tahmini (AI)", "🔍 Akıllı Karşılaştırma", "📈 Trend", "📋 Veri"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["🔮 Gelecek Tahmini (AI)", "🔍 Akıllı Karşılaştırma", "📈 Trend", "📋 Veri",
+                                        "🩺 Tarama"])
 
 # --- TAB 1: GELECEK TAHMİNİ (PROPHET) ---
 with tab1:
     st.subheader("📈 Yapay Zeka ile Fiyat Tahmini")
-    st.info("Bu modül, Facebook Prophet algoritmasını kullanarak seçilen ürünün gelecekteki fiyatını tahmin eder.")
+    st.info("Bu modül, Facebook Prophet algoritmasını kullanarak seçilen ürünün gelecekteki fiyatını tahmin eder. "
+            "Modeller her gece günlük taramadan sonra tüm ürünler için topluca eğitilir.")
 
     # Ürün Seçimi
-    product_list = filtered_df["Ürün Adı"].unique()
+    product_list = products_df["Ürün Adı"].unique()
     forecast_product = st.selectbox("Tahmin Yapılacak Ürünü Seçin:", product_list)
 
     # Gün Seçimi
     days_to_predict = st.radio("Kaç gün sonrasını görmek istersiniz?", [7, 30, 90], horizontal=True)
 
-    if st.button("🚀 Tahmini Başlat"):
-        with st.spinner('Yapay zeka verileri analiz ediyor...'):
-            # Forecasting.py'deki fonksiyonu çağır
-            forecast_df, error = predict_price(forecast_product, days_to_predict, DB_PARAMS)
+    if st.button("🚀 Tahmini Başlat") and forecast_product:
+        with st.spinner('Tahmin sonuçları getiriliyor...'):
+            # Aynı isim iki markette olabilir; seçili listedeki ilk eşleşmenin marketi kullanılır
+            forecast_market = products_df.loc[products_df["Ürün Adı"] == forecast_product, "Market"].iloc[0]
+            try:
+                forecast_df = load_forecast(forecast_product, forecast_market, days_to_predict)
+                error = None if not forecast_df.empty else (
+                    "⚠️ Bu ürün için henüz hazır tahmin yok. Tahminler gece toplu işiyle, "
+                    "en az 5 günlük geçmişi olan ürünler için hesaplanır.")
+            except Exception as e:
+                error = f"Veritabanı Hatası: {e}"
 
             if error:
                 st.error(error)
@@ -132,7 +228,8 @@ with tab1:
                 fig = go.Figure()
 
                 # 1. Gerçek Veriler
-                real_data = df[df["Ürün Adı"] == forecast_product].sort_values("Tarih")
+                real_data = load_view(snapshot_version, HISTORY_COLUMNS, (forecast_market,),
+                                      products=(forecast_product,)).sort_values("Tarih")
                 fig.add_trace(go.Scatter(
                     x=real_data['Tarih'], y=real_data['Raf Fiyatı'],
                     mode='lines+markers', name='Gerçek Fiyat',
@@ -177,33 +274,29 @@ with tab1:
 # --- TAB 2: KARŞILAŞTIRMA (ESKİ KODUN AYNISI) ---
 with tab2:
     st.subheader("🤖 Farklı Marketlerdeki Benzer Ürünleri Bul")
-    selected_product_name = st.selectbox("Baz Ürün Seçiniz (Kıyaslama):", filtered_df["Ürün Adı"].unique())
+    selected_product_name = st.selectbox("Baz Ürün Seçiniz (Kıyaslama):", products_df["Ürün Adı"].unique())
 
     if selected_product_name:
-        base_product = filtered_df[filtered_df["Ürün Adı"] == selected_product_name].iloc[0]
+        base_product = products_df[products_df["Ürün Adı"] == selected_product_name].iloc[0]
         base_market = base_product["Market"]
         base_price = base_product["Birim Fiyat (TL/Kg-L)"]
 
         st.info(f"📍 Seçilen: **{selected_product_name}** ({base_market}) -> **{base_price:.2f} TL** (Birim)")
 
-        other_markets = df[df["Market"] != base_market]["Market"].unique()
+        # Eşleşmeler önceden hesaplanmış indeksten tek sorguyla gelir
+        matches_df = load_match_data(selected_product_name, base_market)
         comparison_results = []
 
-        for m in other_markets:
-            rival_products_df = df[(df["Market"] == m) & (df["Kategori"] == base_product["Kategori"])]
-            rival_names = rival_products_df["Ürün Adı"].tolist()
+        for match in matches_df.itertuples(index=False):
+            if pd.isna(match.unit_price):
+                continue
+            rival_price = match.unit_price
+            diff_ratio = ((rival_price - base_price) / base_price) * 100 if base_price > 0 else 0
 
-            if rival_names:
-                match, score = process.extractOne(selected_product_name, rival_names)
-                if score > 50:
-                    rival_row = rival_products_df[rival_products_df["Ürün Adı"] == match].iloc[0]
-                    rival_price = rival_row["Birim Fiyat (TL/Kg-L)"]
-                    diff_ratio = ((rival_price - base_price) / base_price) * 100 if base_price > 0 else 0
-
-                    comparison_results.append({
-                        "Market": m, "Eşleşen Ürün": match, "Benzerlik Skoru": score,
-                        "Birim Fiyat": rival_price, "Fark (%)": diff_ratio
-                    })
+            comparison_results.append({
+                "Market": match.market, "Eşleşen Ürün": match.product_name,
+                "Benzerlik Skoru": round(match.score * 100), "Birim Fiyat": rival_price, "Fark (%)": diff_ratio
+            })
 
         if comparison_results:
             cols = st.columns(len(comparison_results))
@@ -219,13 +312,115 @@ with tab2:
 # --- TAB 3: TREND ---
 with tab3:
     st.subheader("📅 Fiyat Değişim Trendi")
-    df_trend = filtered_df.groupby(['Tarih', 'Market'])[['Birim Fiyat (TL/Kg-L)']].mean().reset_index()
+    df_trend = pd.DataFrame(columns=['Tarih', 'Market', 'Birim Fiyat (TL/Kg-L)'])
+    if not filtered_rollups.empty:
+        df_trend = combine_rollups(filtered_rollups, ["date", "market"]).rename(
+            columns={"date": "Tarih", "market": "Market", "mean": "Birim Fiyat (TL/Kg-L)"})
     if len(df_trend['Tarih'].unique()) > 1:
         fig_trend = px.line(df_trend, x='Tarih', y='Birim Fiyat (TL/Kg-L)', color='Market', markers=True)
         st.plotly_chart(fig_trend, use_container_width=True)
     else:
         st.info("Trend grafiği için en az 2 günlük veri gerekir.")
 
+    # Ortalama birim fiyat raftaki ürün karması değişince oynar; endeks sadece aynı ürünlerin fiyat değişimini ölçer
+    st.subheader("💹 Sepet Fiyat Endeksi")
+    index_df = load_index_data()
+    if not index_df.empty:
+        index_df = index_df[(index_df["category"] == selected_category)
+                            & index_df["market"].isin(selected_market + [ALL])]
+    if index_df.empty or index_df["date"].nunique() < 2:
+        st.info("Endeks grafiği için en az 2 günlük endeks verisi gerekir.")
+    else:
+        index_df = index_df.replace({"market": {ALL: "Tüm Marketler"}})
+        fig_index = px.line(index_df, x="date", y="level", color="market", markers=True,
+                            labels={"date": "Tarih", "level": "Endeks (baz = 100)", "market": "Market"})
+        st.plotly_chart(fig_index, use_container_width=True)
+
+        weekly, monthly = index_rates(index_df, "W"), index_rates(index_df, "M")
+        overall = index_df["market"] == "Tüm Marketler"
+        c1, c2, c3 = st.columns(3)
+        last_level = index_df[overall]["level"].iloc[-1] if overall.any() else index_df["level"].iloc[-1]
+        c1.metric("Endeks", f"{last_level:.1f}")
+        for col, label, rates in ((c2, "Haftalık", weekly), (c3, "Aylık", monthly)):
+            rates = rates[rates["market"] == "Tüm Marketler"].dropna(subset=["rate"])
+            col.metric(f"{label} Değişim", f"%{rates['rate'].iloc[-1]:.2f}" if not rates.empty else "-")
+
+        with st.expander("Aylık değişim oranları"):
+            table = monthly.dropna(subset=["rate"]).pivot(index="period", columns="market", values="rate")
+            table.index = table.index.astype(str)
+            st.dataframe(table.round(2), use_container_width=True)
+
 # --- TAB 4: VERİ ---
 with tab4:
-    st.dataframe(filtered_df, use_container_width=True)
\ No newline at end of file
+    # Tüm satırlar tarayıcıya gönderilmez: filtreler SQL'de uygulanır, sadece istenen sayfa gelir
+    c1, c2, c3 = st.columns([2, 2, 1])
+    date_range = c1.date_input("Tarih Aralığı:", value=(), min_value=rollups_df["date"].min(),
+                               max_value=rollups_df["date"].max())
+    search = c2.text_input("Ürün Ara:")
+    page_size = c3.selectbox("Satır / Sayfa:", sorted({50, PAGE_SIZE, 500}), index=0 if PAGE_SIZE <= 50 else 1)
+
+    start, end = (list(date_range) + [None, None])[:2]
+    filters = data_filters(selected_category, selected_market, start, end, search)
+    # Filtre değişince ilk sayfaya dönülür
+    if st.session_state.get("data_filters") != (filters, page_size):
+        st.session_state.data_filters = (filters, page_size)
+        st.session_state.data_cursors = [None]
+    cursors = st.session_state.data_cursors
+
+    page_df = load_data_page(filters, cursors[-1], page_size)
+    if page_df.empty:
+        st.info("Filtreye uyan satır yok.")
+    else:
+        st.dataframe(page_df.drop(columns="product_id").rename(columns=COLUMN_LABELS), use_container_width=True)
+
+    c1, c2, c3, c4, c5 = st.columns([1, 1, 2, 1, 1])
+    c1.button("⬅️ Önceki", on_click=previous_page, disabled=len(cursors) == 1)
+    last_row = (page_df["date"].iloc[-1].date(), int(page_df["product_id"].iloc[-1])) if not page_df.empty else None
+    c2.button("Sonraki ➡️", on_click=next_page, args=(last_row,), disabled=len(page_df) < page_size)
+    c3.caption(f"Sayfa {len(cursors)}")
+    # Dosya sadece indirme tıklanınca, parça parça okunarak hazırlanır
+    c4.download_button("⬇️ CSV", data=lambda: export_data(filters, "csv"), file_name="fiyatlar.csv", mime="text/csv")
+    c5.download_button("⬇️ Parquet", data=lambda: export_data(filters, "parquet"), file_name="fiyatlar.parquet",
+                       mime="application/octet-stream")
+
+# --- TAB 5: TARAMA SAĞLIĞI ---
+with tab5:
+    st.subheader("🩺 Gece Taraması")
+    runs_df = load_run_data()
+    if runs_df.empty:
+        st.info("Henüz çalıştırma raporu yok. Raporlar main.py her çalıştığında scrape_runs tablosuna yazılır.")
+    else:
+        last_run = runs_df.iloc[-1]
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Son Çalıştırma", last_run["started_at"].strftime("%d-%m %H:%M"), str(last_run["status"]))
+        c2.metric("Süre", f"{last_run['duration'] / 60:.1f} dk")
+        c3.metric("Kaydedilen Satır", int(last_run["rows_written"] or 0))
+        c4.metric("Eksik Kategori", int(last_run["categories_incomplete"] or 0), delta_color="inverse")
+
+        # Süre, aşamalara bölünmüş olarak (sürücü açılışı, sayfa yükleme, bekleme, okuma, ayrıştırma, DB yazma)
+        stages_df = run_stages(runs_df)
+        if not stages_df.empty:
+            fig_stages = px.bar(stages_df, x="started_at", y="seconds", color="stage",
+                                category_orders={"stage": list(STAGES)},
+                                labels={"started_at": "Çalıştırma", "seconds": "Süre (sn)", "stage": "Aşama"})
+            st.plotly_chart(fig_stages, use_container_width=True)
+
+        # Bir marketin satır sayısı birden düşerse seçiciler bozulmuş olabilir
+        rows_df = run_market_counts(runs_df)
+        if not rows_df.empty:
+            fig_rows = px.line(rows_df, x="started_at", y="rows", color="market", markers=True,
+                               labels={"started_at": "Çalıştırma", "rows": "Satır", "market": "Market"})
+            st.plotly_chart(fig_rows, use_container_width=True)
+
+        with st.expander("Son çalıştırmanın olay kaydı"):
+            st.dataframe(pd.DataFrame(last_run["log"] or []), use_container_width=True)
+
+    # Ortalamalara ve tahminlere girmeyen şüpheli fiyatlar, satır sayısı birden düşen kategoriler
+    st.subheader("🧪 Karantina")
+    anomalies_df = load_anomaly_data()
+    if anomalies_df.empty:
+        st.info("Son 30 günde şüpheli fiyat veya adet düşüşü yok.")
+    else:
+        st.dataframe(anomalies_df.rename(columns={
+            "date": "Tarih", "market": "Market", "category": "Kategori", "product_name": "Ürün Adı",
+            "kind": "Sebep", "value": "Değer", "baseline": "Beklenen", "score": "Skor"}), use_container_width=True)
\ No newline at end of file
@@ -0,0 +1,399 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from anomalies import NOT_QUARANTINED
+from db import read_chunks, read_df
+
+# Yerel anlık görüntülerin (Parquet) tutulduğu klasör
+SNAPSHOT_DIR = os.getenv("DASHBOARD_SNAPSHOT_DIR", os.path.join(".cache", "dashboard"))
+# Veri sekmesinde bir sayfadaki satır sayısı (varsayılan)
+PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "100"))
+
+# prices görünümünde okunabilecek kolonlar (SQL'e sadece bu listedekiler girer)
+COLUMNS = ("date", "market", "category", "product_name", "price", "unit_price", "unit")
+
+# Tekrarlayan metinler kategori tipinde tutulur; bellek ürün sayısıyla değil, farklı değer sayısıyla büyür
+CATEGORICAL = ("market", "category", "unit")
+FLOATS = ("price", "unit_price")
+
+
+# Bir günün veri sürümü: özetlerin yenilenme zamanı ve karantina zamanı. Tekrar işleme (replay.py) ve doğrulama
+# (anomalies.py) günün özetini yeniden yazdığı için bu değerler değişir. Taşınan günler kaynak günün sürümünü alır;
+# özeti henüz yazılmamış son gün (tarama sürüyor) sürümsüz gelir ve her yenilemede tekrar okunur.
+DATA_VERSION_QUERY = '''
+                     WITH rollup_versions AS (SELECT date, max(refreshed_at) AS refreshed_at
+                                              FROM daily_rollups GROUP BY date),
+                          anomaly_versions AS (SELECT date, max(detected_at) AS detected_at
+                                               FROM price_anomalies GROUP BY date),
+                          days AS (SELECT date, date AS source FROM rollup_versions
+                                   UNION
+                                   SELECT date, carried_from FROM category_fingerprints
+                                   WHERE carried_from IS NOT NULL
+                                   UNION
+                                   SELECT max(date), NULL FROM price_facts)
+                     SELECT d.date, concat_ws('|', max(r.refreshed_at), max(a.detected_at)) AS version
+                     FROM days d
+                              LEFT JOIN rollup_versions r ON r.date = d.source
+                              LEFT JOIN anomaly_versions a ON a.date = d.source
+                     WHERE d.date IS NOT NULL
+                     GROUP BY d.date
+                     '''
+
+# Anlık görüntü dosyalarının şeması; günler arasında aynı kalmalı ki birlikte okunabilsinler
+SNAPSHOT_SCHEMA = pa.schema([
+    ("date", pa.date32()),
+    ("market", pa.string()),
+    ("category", pa.string()),
+    ("product_name", pa.string()),
+    ("price", pa.float32()),
+    ("unit_price", pa.float32()),
+    ("unit", pa.string()),
+])
+
+
+class IncrementalLoader:
+    """
+    prices görünümünü yerel, gün başına bir Parquet dosyasından oluşan bir anlık görüntüde tutar.
+    refresh() sadece veri sürümü (bkz. DATA_VERSION_QUERY) değişen günleri ve son günü veritabanından yeniden okur;
+    sürümler manifest.json'da saklanır. Görünümler read() ile sadece ihtiyaç duydukları kolonları ve satırları
+    (market, kategori, ürün, tarih aralığı) okur, geçmişin tamamı hiçbir zaman belleğe alınmaz.
+    """
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        self._dir = os.path.join(snapshot_dir, "prices")
+        self._manifest_path = os.path.join(self._dir, "manifest.json")
+        self._lock = threading.Lock()
+
+    def _day_path(self, date):
+        return os.path.join(self._dir, f"{date}.parquet")
+
+    def _read_manifest(self):
+        """{gün: [sürüm, satır sayısı]}"""
+        if not os.path.exists(self._manifest_path):
+            return {}
+        try:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Anlık görüntü okunamadı, baştan yüklenecek: {e}")
+            self._clear()
+            return {}
+
+    def _replace(self, path, write):
+        # Okuyanlar yarım dosya görmesin
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _write_manifest(self, manifest):
+        def write(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+        self._replace(self._manifest_path, write)
+
+    def _write_day(self, date, df):
+        for col in FLOATS:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        table = pa.Table.from_pandas(df, schema=SNAPSHOT_SCHEMA, preserve_index=False)
+        self._replace(self._day_path(date), lambda path: pq.write_table(table, path, compression="zstd"))
+
+    def _clear(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    @staticmethod
+    def _optimize(df):
+        if "date" in df:
+            df["date"] = pd.to_datetime(df["date"])
+        for col in CATEGORICAL:
+            if col in df:
+                df[col] = df[col].astype("category")
+        return df
+
+    def refresh(self):
+        """
+        Değişen günleri yeniler, veritabanında artık olmayan günleri siler.
+        Anlık görüntünün sürümünü döndürür; okuma sonuçlarını önbelleğe alan taraf bunu anahtar olarak kullanır.
+        """
+        with self._lock:
+            os.makedirs(self._dir, exist_ok=True)
+            manifest = self._read_manifest()
+            versions = {str(date): version for date, version in read_df(DATA_VERSION_QUERY).itertuples(index=False)}
+            latest = max(versions, default=None)
+
+            for date in set(manifest) - set(versions):
+                manifest.pop(date)
+                if os.path.exists(self._day_path(date)):
+                    os.remove(self._day_path(date))
+
+            # Bir seferde tek günün satırları bellekte durur
+            query = f"SELECT {', '.join(COLUMNS)} FROM prices WHERE date = %s"
+            stale = sorted(date for date, version in versions.items()
+                           if date == latest or manifest.get(date, [None])[0] != version)
+            for date in stale:
+                df = read_df(query, (date,))
+                self._write_day(date, df)
+                manifest[date] = [versions[date], len(df)]
+
+            self._write_manifest(manifest)
+            return hashlib.sha1(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+
+    def read(self, columns=COLUMNS, markets=None, categories=None, products=None, start=None, end=None):
+        """
+        Anlık görüntüden sadece istenen kolonları ve filtreye uyan satırları okur.
+        markets / categories / products: değer listeleri (None = hepsi); start / end: gün ('YYYY-MM-DD', dahil).
+        """
+        columns = [c for c in COLUMNS if c in columns]
+        start, end = (str(d)[:10] if d is not None else None for d in (start, end))
+        with self._lock:
+            dates = sorted(self._read_manifest())
+            files = [self._day_path(d) for d in dates if (start is None or d >= start) and (end is None or d <= end)]
+            if not files:
+                return self._optimize(pd.DataFrame({c: pd.Series(dtype=object) for c in columns}))
+
+            condition = None
+            for col, values in (("market", markets), ("category", categories), ("product_name", products)):
+                if values is not None:
+                    expr = ds.field(col).isin(list(values))
+                    condition = expr if condition is None else condition & expr
+            table = ds.dataset(files, schema=SNAPSHOT_SCHEMA, format="parquet").to_table(columns=columns,
+                                                                                       filter=condition)
+        return self._optimize(table.to_pandas())
+
+    def reset(self):
+        """Anlık görüntüyü siler; sonraki refresh() her günü baştan okur."""
+        with self._lock:
+            self._clear()
+
+
+ROLLUP_QUERY = '''
+               SELECT r.date, m.name AS market, c.name AS category,
+                      r.n, r.mean, r.min, r.max, r.median, p.name AS min_product
+               FROM daily_rollups r
+                        JOIN markets m ON m.id = r.market_id
+                        JOIN categories c ON c.id = r.category_id
+                        LEFT JOIN products p ON p.id = r.min_product_id
+               ORDER BY r.date
+               '''
+
+
+def load_rollups():
+    """Gün/market/kategori özetlerini döndürür; boyutu ürün sayısıyla değil gün sayısıyla büyür."""
+    df = read_df(ROLLUP_QUERY)
+    df["date"] = pd.to_datetime(df["date"])
+    for col in ("mean", "min", "max", "median"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+FORECAST_QUERY = '''
+                 SELECT fc.ds, fc.yhat, fc.yhat_lower, fc.yhat_upper
+                 FROM forecasts fc
+                          JOIN products p ON p.id = fc.product_id
+                          JOIN markets m ON m.id = p.market_id
+                 WHERE p.name = %s
+                   AND m.name = %s
+                   AND fc.ds <= fc.history_end + %s::int
+                 ORDER BY fc.ds
+                 '''
+
+
+def load_forecast(product_name, market, days):
+    """Gece toplu işinin (batch_forecast.py) kaydettiği tahminin ilk 'days' gününü döndürür."""
+    # Her tıklamada aynı sorgu: bağlantı başına bir kez hazırlanır (PREPARE)
+    df = read_df(FORECAST_QUERY, (product_name, market, days), prepare=True)
+    df["ds"] = pd.to_datetime(df["ds"])
+    for col in ("yhat", "yhat_lower", "yhat_upper"):
+        df[col] = df[col].astype(float)
+    return df
+
+
+MATCH_QUERY = '''
+              SELECT rm.name AS market, rp.name AS product_name, pm.score, last.unit_price
+              FROM product_matches pm
+                       JOIN products p ON p.id = pm.product_id
+                       JOIN markets m ON m.id = p.market_id
+                       JOIN products rp ON rp.id = pm.rival_product_id
+                       JOIN markets rm ON rm.id = pm.rival_market_id
+                       LEFT JOIN LATERAL (SELECT f.unit_price
+                                          FROM price_facts f
+                                          WHERE f.product_id = pm.rival_product_id
+                                          ORDER BY f.date DESC
+                                          LIMIT 1) last ON TRUE
+              WHERE p.name = %s
+                AND m.name = %s
+              ORDER BY rm.name
+              '''
+
+
+def load_matches(product_name, market):
+    """Eşleştirme indeksinden (matching.py) ürünün diğer marketlerdeki karşılıklarını ve son birim fiyatlarını döndürür."""
+    df = read_df(MATCH_QUERY, (product_name, market), prepare=True)
+    df["unit_price"] = pd.to_numeric(df["unit_price"], errors="coerce")
+    return df
+
+
+RUNS_QUERY = '''
+             SELECT id, date, started_at, duration, engine, status, rows_written, rows_rejected, rows_duplicate,
+                    pages, cards, categories_done, categories_incomplete, categories_carried, stages, markets, log
+             FROM scrape_runs
+             WHERE started_at >= now() - %s * INTERVAL '1 day'
+             ORDER BY started_at
+             '''
+
+
+def load_runs(days=90):
+    """Son 'days' gündeki çalıştırma raporları (telemetry.py); stages / markets / log kolonları sözlük/listedir."""
+    df = read_df(RUNS_QUERY, (days,))
+    df["started_at"] = pd.to_datetime(df["started_at"])
+    return df
+
+
+def run_stages(runs):
+    """Çalıştırma başına aşama süreleri, uzun biçimde: started_at, stage, seconds"""
+    records = [(run.started_at, stage, values["total"])
+               for run in runs.itertuples(index=False) for stage, values in (run.stages or {}).items()]
+    return pd.DataFrame(records, columns=["started_at", "stage", "seconds"])
+
+
+def run_market_counts(runs, counter="rows"):
+    """Çalıştırma başına market bazında bir sayaç (varsayılan: temizlemeden geçen satır), uzun biçimde."""
+    records = [(run.started_at, market, values["counters"].get(counter, 0))
+               for run in runs.itertuples(index=False) for market, values in (run.markets or {}).items()]
+    return pd.DataFrame(records, columns=["started_at", "market", counter])
+
+
+INDEX_QUERY = '''
+              SELECT market, category, date, level, link, n
+              FROM price_index
+              WHERE method = %s
+              ORDER BY date
+              '''
+
+
+def load_index(method):
+    """Fiyat endeksi seviyeleri (inflation_index.py); market / category 'Tümü' satırları üst endekslerdir."""
+    df = read_df(INDEX_QUERY, (method,), prepare=True)
+    df["date"] = pd.to_datetime(df["date"])
+    for col in ("level", "link"):
+        df[col] = df[col].astype(float)
+    return df
+
+
+ANOMALY_QUERY = '''
+                SELECT a.date, m.name AS market, c.name AS category, p.name AS product_name,
+                       a.kind, a.value, a.baseline, a.score
+                FROM price_anomalies a
+                         JOIN markets m ON m.id = a.market_id
+                         JOIN categories c ON c.id = a.category_id
+                         LEFT JOIN products p ON p.id = a.product_id
+                WHERE a.date >= current_date - %s::int
+                ORDER BY a.date DESC, abs(a.score) DESC
+                '''
+
+
+def load_anomalies(days=30):
+    """Son 'days' gündeki karantina ve adet düşüşü işaretleri (anomalies.py); product_name boşsa kategori işaretidir."""
+    df = read_df(ANOMALY_QUERY, (days,))
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+# Veri sekmesi: filtre ve sayfalama veritabanında. Sıralama price_facts'in tekil (date, product_id) anahtarı
+# üzerinde; sonraki sayfa OFFSET yerine önceki sayfanın son satırından devam eder (keyset) ve
+# price_facts_date_product_idx indeksinden geriye doğru okunur, derin sayfalar da ilk sayfa kadar hızlıdır.
+# prices görünümü kullanılmaz: taşınan günlerin UNION ALL kolu sıralı indeks okumasını engeller ve
+# (date, product_id) orada tekil değildir. Sekme gerçekten gözlenen satırları gösterir; taşınan günler görünümde.
+DATA_QUERY = f'''
+             SELECT price_facts.date, m.name AS market, c.name AS category, p.name AS product_name,
+                    price_facts.price, price_facts.unit_price, price_facts.unit, price_facts.product_id
+             FROM price_facts
+                      JOIN products p ON p.id = price_facts.product_id
+                      JOIN markets m ON m.id = price_facts.market_id
+                      JOIN categories c ON c.id = price_facts.category_id
+             WHERE {NOT_QUARANTINED}
+               AND {{where}}
+             ORDER BY price_facts.date DESC, price_facts.product_id DESC
+             '''
+
+EXPORT_SCHEMA = pa.schema([
+    ("date", pa.date32()), ("market", pa.string()), ("category", pa.string()), ("product_name", pa.string()),
+    ("price", pa.float64()), ("unit_price", pa.float64()), ("unit", pa.string()),
+])
+
+
+def _like_pattern(text):
+    """Arama metni ILIKE kalıbına; kullanıcının yazdığı % ve _ joker sayılmaz."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def data_filters(category=None, markets=None, start=None, end=None, search=None):
+    """
+    Yan panel ve sekme filtrelerinden (where, params). Değerler SQL metnine gömülmez, parametre olarak gider;
+    aynı filtre kombinasyonu aynı sorgu metnini üretir (bağlantı başına bir kez PREPARE edilir).
+    """
+    clauses, params = [], []
+    if category and category != "Tümü":
+        clauses.append("c.name = %s")
+        params.append(category)
+    if markets is not None:
+        clauses.append("m.name = ANY(%s::text[])")
+        params.append(list(markets))
+    if start:
+        clauses.append("price_facts.date >= %s::date")
+        params.append(start)
+    if end:
+        clauses.append("price_facts.date <= %s::date")
+        params.append(end)
+    if search and search.strip():
+        clauses.append("p.name ILIKE %s")
+        params.append(_like_pattern(search.strip()))
+    return " AND ".join(clauses) or "TRUE", tuple(params)
+
+
+def load_page(filters, after=None, limit=PAGE_SIZE):
+    """
+    Filtreye uyan satırlardan bir sayfa. after: önceki sayfanın son satırının (date, product_id) değeri;
+    None ise ilk sayfa. Sonraki sayfanın after değeri dönen sayfanın son satırıdır.
+    """
+    where, params = filters
+    if after is not None:
+        where += " AND (price_facts.date, price_facts.product_id) < (%s::date, %s::int)"
+        params += tuple(after)
+    df = read_df(DATA_QUERY.format(where=where) + " LIMIT %s::int", params + (limit,), prepare=True)
+    df["date"] = pd.to_datetime(df["date"])
+    for col in FLOATS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def export_data(filters, fmt="csv"):
+    """
+    Filtreye uyan tüm satırları sunucu tarafı imleçle parça parça okuyup geçici dosyaya yazar (CSV veya Parquet).
+    Bellekte bir seferde bir parça (DB_CHUNK_ROWS) durur. Başa sarılmış dosya nesnesini döndürür.
+    """
+    where, params = filters
+    out = tempfile.TemporaryFile()
+    writer = pq.ParquetWriter(out, EXPORT_SCHEMA) if fmt == "parquet" else None
+    for i, chunk in enumerate(read_chunks(DATA_QUERY.format(where=where), params)):
+        chunk = chunk.drop(columns="product_id")
+        for col in FLOATS:
+            chunk[col] = pd.to_numeric(chunk[col], errors="coerce").astype(float)
+        if writer is not None:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=EXPORT_SCHEMA, preserve_index=False))
+        else:
+            chunk.to_csv(out, header=i == 0, index=False, encoding="utf-8")
+    if writer is not None:
+        writer.close()
+    out.seek(0)
+    return out
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from dotenv import load_dotenv
+
+# Tüm betiklerin (main, dashboard, batch_forecast, matching, replay) ortak veritabanı erişimi.
+# Bağlantılar süreç başına tek bir havuzdan alınır: dashboard'un her tıklaması, yazıcı thread'in her partisi
+# yeni bağlantı açmaz. Havuz doluysa bağlantı isteyen thread bir bağlantı boşalana kadar bekler;
+# aynı anda açık bağlantı sayısı (ör. dashboard'un tüm oturumları toplamı) DB_POOL_MAX'ı geçmez.
+
+# .env dosyasını yükle
+load_dotenv()
+
+# Veritabanı bilgilerini ortam değişkenlerinden al
+DB_PARAMS = {
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST"),
+    "port": os.getenv("DB_PORT")
+}
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))  # Boşta açık tutulan bağlantı (fazlası iade edilince kapanır)
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # sn; bu sürede bağlantı boşalmazsa PoolError
+# Büyük okumalar sunucu tarafı imleçle bu kadar satırlık parçalar halinde gelir
+DB_CHUNK_ROWS = int(os.getenv("DB_CHUNK_ROWS", "50000"))
+
+_PLACEHOLDER = re.compile(r"%s")
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Havuz bağlantısı; bu oturumda PREPARE edilmiş sorguların adlarını hatırlar."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+_pool = None
+_slots = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool, _slots, _pool_pid
+    with _pool_lock:
+        # fork edilen süreç (ör. ProcessPoolExecutor işçisi) ebeveynin soketlerini kullanmasın
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, connection_factory=PooledConnection, **DB_PARAMS)
+            _slots = threading.BoundedSemaphore(DB_POOL_MAX)
+            _pool_pid = os.getpid()
+        return _pool, _slots
+
+
+def acquire(timeout=DB_POOL_TIMEOUT):
+    """Havuzdan bağlantı alır; uzun süre tutulacak bağlantılar için (ör. yazıcı thread). release() ile iade edilir."""
+    pool, slots = _get_pool()
+    if not slots.acquire(timeout=timeout):
+        raise PoolError(f"{timeout:.0f} sn içinde boş veritabanı bağlantısı bulunamadı (DB_POOL_MAX={DB_POOL_MAX})")
+    try:
+        return pool.getconn()
+    except Exception:
+        slots.release()
+        raise
+
+
+def release(conn, broken=False):
+    """
+    Bağlantıyı havuza iade eder. Commit edilmemiş iş geri alınır (conn.close() gibi).
+    broken ise (bağlantı hatası) bağlantı kapatılır, havuz sonra yenisini açar.
+    """
+    pool, slots = _get_pool()
+    try:
+        if not broken and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        pool.putconn(conn, close=broken or bool(conn.closed))
+    finally:
+        slots.release()
+
+
+@contextmanager
+def connection():
+    """
+    with connection() as conn: ...  -- havuzdan bağlantı; commit çağırana bırakılır.
+    Blok bağlantı hatasıyla biterse bağlantı havuza geri konmaz.
+    """
+    conn = acquire()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        release(conn, broken)
+
+
+def execute(cur, sql, params=None, prepare=False):
+    """
+    Parametreli sorgu (%s yer tutucuları). prepare=True ise sorgu bağlantı başına bir kez PREPARE edilir,
+    sonraki çağrılar sadece EXECUTE gönderir ve planlama tekrarlanmaz. Tipi belirsiz kalan parametreler
+    SQL içinde cast edilmeli (%s::int gibi).
+    """
+    prepared = getattr(cur.connection, "prepared", None)
+    if not prepare or prepared is None:
+        cur.execute(sql, params)
+        return cur
+
+    name = "q_" + hashlib.sha1(sql.encode("utf-8")).hexdigest()[:16]
+    if name not in prepared:
+        numbers = iter(range(1, len(params or ()) + 1))
+        cur.execute(f"PREPARE {name} AS {_PLACEHOLDER.sub(lambda _: f'${next(numbers)}', sql)}")
+        prepared.add(name)
+    if params:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(f"EXECUTE {name}")
+    return cur
+
+
+def _frame(cur, rows):
+    return pd.DataFrame(rows, columns=[col.name for col in cur.description])
+
+
+def read_df(sql, params=None, prepare=False):
+    """Sorgu sonucunu tek seferde DataFrame olarak döndürür (küçük ve orta okumalar)."""
+    with connection() as conn:
+        cur = conn.cursor()
+        execute(cur, sql, params, prepare)
+        df = _frame(cur, cur.fetchall())
+        cur.close()
+    return df
+
+
+def read_chunks(sql, params=None, chunk_rows=DB_CHUNK_ROWS):
+    """
+    Büyük okumalar: sunucu tarafı (adlı) imleçle chunk_rows satırlık DataFrame parçaları üretir.
+    İstemci belleği tüm sonuç kadar değil, bir parça kadar büyür. Sonuç boşsa kolonları olan boş tek parça döner.
+    """
+    with connection() as conn:
+        cur = conn.cursor(name=f"chunks_{threading.get_ident()}")
+        cur.itersize = chunk_rows
+        cur.execute(sql, params)
+        first = True
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows and not first:
+                break
+            first = False
+            yield _frame(cur, rows)
+            if len(rows) < chunk_rows:
+                break
+        cur.close()
@@ -0,0 +1,230 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+from model_store import ModelStore, history_signature, forecast_to_records, forecast_from_records, trim_forecast
+
+# Hangi tahmin motorunun kullanılacağı: "prophet" veya "damped". Boşsa Prophet kuruluysa o, değilse damped.
+FORECASTER = os.getenv("FORECASTER", "")
+
+# Tahmin her zaman en az bu ufukta hesaplanıp saklanır; 7/30/90 günlük istekler aynı kayıttan karşılanır
+CACHE_HORIZON = 90
+
+# Prophet'in varsayılan interval_width=0.8 aralığına denk gelen z değeri
+Z_80 = 1.2816
+
+
+class Forecaster:
+    """
+    Tahmin motoru arayüzü. fit_predict, Prophet'in döndürdüğü biçimde
+    (ds, yhat, yhat_lower, yhat_upper) bir DataFrame döndürür: geçmiş günler + 'days' gün sonrası.
+    """
+    name = None
+    # True ise fit_predict_many tüm serileri tek seferde (matris olarak) eğitir; süreç havuzuna gerek yok
+    vectorized = False
+
+    def fit_predict(self, df, days, cache_key=None):
+        raise NotImplementedError
+
+    def fit_predict_many(self, histories, days):
+        """histories: [(anahtar, df), ...] -> [(anahtar, tahmin), ...]. Varsayılan: tek tek eğitir."""
+        return [(key, self.fit_predict(df, days)) for key, df in histories]
+
+
+class ProphetForecaster(Forecaster):
+    """
+    Facebook Prophet. Import maliyeti yüksek olduğu için prophet sadece ilk eğitimde yüklenir.
+    Eğitilen modeller ModelStore ile önbelleğe alınır (bkz. model_store.py).
+    """
+    name = "prophet"
+    # Model parametreleri önbellek anahtarının parçasıdır; değişirse kayıtlı modeller kullanılmaz
+    MODEL_PARAMS = dict(daily_seasonality=True, yearly_seasonality=False, weekly_seasonality=False)
+
+    def __init__(self, store=None):
+        self.store = store or ModelStore()
+
+    @staticmethod
+    def stan_init(model):
+        """Eğitilmiş modelin parametreleri; yeni eğitime başlangıç noktası (warm start) olarak verilir."""
+        return {
+            "k": float(model.params["k"][0][0]),
+            "m": float(model.params["m"][0][0]),
+            "sigma_obs": float(model.params["sigma_obs"][0][0]),
+            "delta": [float(x) for x in model.params["delta"][0]],
+            "beta": [float(x) for x in model.params["beta"][0]],
+        }
+
+    def fit_predict(self, df, days, cache_key=None):
+        """
+        cache_key verilirse: veri değişmediyse kayıtlı tahmin döner, yeni gün geldiyse önceki
+        modelin parametrelerinden başlanarak (warm start) yeniden eğitilir.
+        """
+        from prophet import Prophet
+        from prophet.serialize import model_to_json
+
+        entry = self.store.get(cache_key) if cache_key is not None else None
+        signature = history_signature(df, self.MODEL_PARAMS)
+
+        if entry and entry["signature"] == signature and entry["horizon"] >= days:
+            return forecast_from_records(entry["forecast"], signature["last_date"], days)
+
+        init = entry["init"] if entry and entry["signature"]["params"] == signature["params"] else None
+        horizon = max(days, CACHE_HORIZON) if cache_key is not None else days
+
+        # daily_seasonality=True: Günlük verimiz olduğu için açıyoruz
+        model = Prophet(**self.MODEL_PARAMS)
+        if init:
+            try:
+                model.fit(df, init=init)
+            except Exception:
+                # Geçmiş uzadıkça değişim noktası sayısı değişebilir; eski parametreler uymazsa sıfırdan eğit
+                model = Prophet(**self.MODEL_PARAMS)
+                model.fit(df)
+        else:
+            model.fit(df)
+
+        # Gelecek tarihleri oluştur ve tahmin yap
+        future = model.make_future_dataframe(periods=horizon)
+        forecast = model.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+
+        if cache_key is not None:
+            self.store.put(cache_key, {
+                "signature": signature,
+                "horizon": horizon,
+                "init": self.stan_init(model),
+                "model": model_to_json(model),
+                "forecast": forecast_to_records(forecast),
+            })
+            forecast = trim_forecast(forecast, signature["last_date"], days)
+
+        return forecast
+
+
+class DampedTrendForecaster(Forecaster):
+    """
+    Sönümlü trendli üstel düzleştirme (ETS(A,Ad,N)), sadece NumPy.
+    Tüm seriler tek bir matriste birlikte eğitilir: (alpha, beta, phi) ızgarasının her noktası
+    için tek adımlı hata kareleri vektörel hesaplanır, her seri kendi en iyi noktasını seçer.
+    Birkaç düzine günlük fiyat serisi için Prophet'ten kat kat hızlıdır ve import maliyeti yoktur.
+    """
+    name = "damped"
+    vectorized = True
+
+    ALPHAS = (0.1, 0.3, 0.5, 0.7, 0.9)
+    BETAS = (0.0, 0.05, 0.1, 0.2)  # Hata düzeltme formunda beta <= alpha olmalı
+    PHIS = (0.8, 0.9, 0.98)
+
+    def __init__(self):
+        grid = [(a, b, p) for a in self.ALPHAS for b in self.BETAS for p in self.PHIS if b <= a]
+        self.grid = np.array(grid)  # (G, 3)
+
+    @staticmethod
+    def to_daily(df):
+        """Aynı güne düşen kayıtların ortalaması alınır, eksik günler önceki fiyatla doldurulur."""
+        daily = df.groupby(pd.to_datetime(df["ds"]))["y"].mean().astype(float)
+        return daily.asfreq("D").ffill()
+
+    @staticmethod
+    def _run(Y, alpha, beta, phi, keep_fitted=False):
+        """
+        Y (S, T) üzerinde düzleştirme özyinelemesi; parametreler (G, 1) veya (1, S) biçiminde yayınlanır.
+        Dönüş: hata kareleri toplamı (G, S), gözlem sayısı (S,), son seviye, son trend, [uyum değerleri (G, S, T)].
+        """
+        S, T = Y.shape
+        G = max(alpha.shape[0], 1)
+        level = np.full((G, S), np.nan)  # Seviye serinin ilk gözleminde başlar, trend 0
+        trend = np.zeros((G, S))
+        sse = np.zeros((G, S))
+        count = np.zeros(S)
+        fitted = np.full((G, S, T), np.nan) if keep_fitted else None
+
+        for t in range(T):
+            y = Y[:, t]
+            has_y = ~np.isnan(y)
+            started = ~np.isnan(level[0])
+            active = has_y & started
+
+            pred = level + phi * trend
+            err = np.where(active, y - pred, 0.0)
+            if keep_fitted:
+                fitted[:, :, t] = pred
+            sse += err ** 2
+            count += active
+
+            level = np.where(active, pred + alpha * err, level)
+            trend = np.where(active, phi * trend + beta * err, trend)
+
+            # Serinin ilk gözlemi: seviyeyi başlat
+            first = has_y & ~started
+            level[:, first] = y[first]
+
+        return sse, count, level, trend, fitted
+
+    def fit_predict(self, df, days, cache_key=None):
+        return self.fit_predict_many([(cache_key, df)], days)[0][1]
+
+    def fit_predict_many(self, histories, days):
+        if not histories:
+            return []
+
+        series = [self.to_daily(df) for _, df in histories]
+        S, T = len(series), max(len(s) for s in series)
+
+        # Seriler sağa hizalanır (son gözlem son kolonda); başlangıç öncesi NaN
+        Y = np.full((S, T), np.nan)
+        for i, s in enumerate(series):
+            Y[i, T - len(s):] = s.to_numpy()
+
+        # 1. Izgara araması: her (alpha, beta, phi) için tüm seriler birlikte (G, S)
+        alpha, beta, phi = (self.grid[:, k][:, None] for k in range(3))
+        sse, count, _, _, _ = self._run(Y, alpha, beta, phi)
+
+        # 2. Her serinin en iyi parametreleriyle son durum ve geçmiş uyum değerleri (1, S)
+        best = np.argmin(sse, axis=0)
+        a, b, p = self.grid[best].T
+        sse, count, lvl, trd, fitted = self._run(Y, a[None, :], b[None, :], p[None, :], keep_fitted=True)
+        sse, count, lvl, trd, fitted = sse[0], count, lvl[0], trd[0], fitted[0]
+        sigma = np.sqrt(sse / np.maximum(count, 1))
+
+        # h adım sonrası: l + (phi + ... + phi^h) b ; varyans: sigma^2 (1 + sum_{j<h} (alpha + beta*phi_j)^2)
+        h = np.arange(1, days + 1)
+        phi_h = np.cumsum(p[:, None] ** h[None, :], axis=1)  # (S, H)
+        yhat = lvl[:, None] + phi_h * trd[:, None]
+        c = a[:, None] + b[:, None] * phi_h
+        var = np.concatenate([np.zeros((S, 1)), np.cumsum(c[:, :-1] ** 2, axis=1)], axis=1) + 1
+        half = Z_80 * sigma[:, None] * np.sqrt(var)
+
+        results = []
+        for i, ((key, _), s) in enumerate(zip(histories, series)):
+            hist_fit = fitted[i, T - len(s):]
+            hist_fit = np.where(np.isnan(hist_fit), s.to_numpy(), hist_fit)
+            future_ds = pd.date_range(s.index[-1] + pd.Timedelta(days=1), periods=days, freq="D")
+            yhat_all = np.concatenate([hist_fit, yhat[i]])
+            half_all = np.concatenate([np.full(len(s), Z_80 * sigma[i]), half[i]])
+            results.append((key, pd.DataFrame({
+                "ds": s.index.append(future_ds),
+                "yhat": yhat_all,
+                "yhat_lower": yhat_all - half_all,
+                "yhat_upper": yhat_all + half_all,
+            })))
+        return results
+
+
+def prophet_available():
+    return importlib.util.find_spec("prophet") is not None
+
+
+_INSTANCES = {}
+
+
+def get_forecaster(name=None):
+    """İsimle (veya FORECASTER ortam değişkeniyle) tahmin motorunu döndürür."""
+    name = name or FORECASTER or ("prophet" if prophet_available() else "damped")
+    if name not in _INSTANCES:
+        backends = {"prophet": ProphetForecaster, "damped": DampedTrendForecaster}
+        if name not in backends:
+            raise ValueError(f"Bilinmeyen tahmin motoru: {name}")
+        _INSTANCES[name] = backends[name]()
+    return _INSTANCES[name]
@@ -1,19 +1,19 @@
 import pandas as pd
-from prophet import Prophet
-import psycopg2
 
+from db import read_df
+# Prophet burada import edilmez; sadece Prophet motoru ilk eğitimde yükler (bkz. forecasters.py)
+from forecasters import get_forecaster
 
-def get_product_data(product_name, db_params):
+
+def get_product_data(product_name):
     """
     Seçilen ürünün geçmiş fiyat verilerini veritabanından çeker.
     Prophet formatına (ds: tarih, y: değer) uygun hale getirir.
     """
     try:
-        conn = psycopg2.connect(**db_params)
         # SQL Injection riskine karşı parametreli sorgu
         query = "SELECT date, price FROM prices WHERE product_name = %s ORDER BY date"
-        df = pd.read_sql(query, conn, params=(product_name,))
-        conn.close()
+        df = read_df(query, (product_name,), prepare=True)
 
         if df.empty:
             return None
@@ -27,30 +27,28 @@ def get_product_data(product_name, db_params):
         return None
 
 
-def predict_price(product_name, days, db_params):
+def predict_price(product_name, days):
     """
-    Verilen ürün için Prophet modelini eğitir ve 'days' kadar sonrasını tahmin eder.
+    Verilen ürün için tahmin modelini (varsayılan Prophet) eğitir ve 'days' kadar sonrasını tahmin eder.
     """
-    df = get_product_data(product_name, db_params)
+    df = get_product_data(product_name)
 
     # 1. Veri Kontrolü: Modelin çalışması için en azından 5-10 günlük veri lazım
     if df is None or len(df) < 5:
         return None, "⚠️ Yetersiz Veri: Tahmin için bu ürüne ait en az 5 günlük geçmiş veri gerekiyor."
 
-    # 2. Modeli Başlat ve Eğit
+    # 2. Modeli Eğit ve Tahmin Yap (aynı veriyle daha önce eğitildiyse önbellekten)
     try:
-        # daily_seasonality=True: Günlük verimiz olduğu için açıyoruz
-        model = Prophet(daily_seasonality=True, yearly_seasonality=False, weekly_seasonality=False)
-        model.fit(df)
-
-        # 3. Gelecek Tarihleri Oluştur
-        future = model.make_future_dataframe(periods=days)
+        return fit_predict(df, days, cache_key=f"name:{product_name}"), None
 
-        # 4. Tahmin Yap
-        forecast = model.predict(future)
+    except Exception as e:
+        return None, f"Model Hatası: {e}"
 
-        # Sadece ihtiyacımız olan sütunları döndür
-        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']], None
 
-    except Exception as e:
-        return None, f"Model Hatası: {e}"
\ No newline at end of file
+def fit_predict(df, days, cache_key=None, backend=None):
+    """
+    (ds, y) geçmişi üzerinde seçili tahmin motorunu eğitir, 'days' gün sonrasına kadar
+    (ds, yhat, yhat_lower, yhat_upper) döndürür.
+    Hem tekil tahmin hem de toplu gece işi (batch_forecast.py) bunu kullanır.
+    """
+    return get_forecaster(backend).fit_predict(df, days, cache_key=cache_key)
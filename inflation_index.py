@@ -0,0 +1,271 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db import connection, read_chunks
+
+# Sepet bazlı fiyat endeksi. Ortalama birim fiyat ürün karması değişince kayar; endeks ise sadece iki gün de
+# görülen (eşleşen) ürünlerin fiyat oranlarından hesaplanır.
+#   1. Temel endeks (market x kategori): eşleşen ürünlerin fiyat oranlarının geometrik ortalaması (Jevons)
+#      - "chained": ardışık iki tarama günü arasında, günlük halkalar çarpılarak zincirlenir (ürün değişimine dayanıklı)
+#      - "fixed": grubun ilk (baz) günündeki ürün sepetine göre
+#   2. Üst endeksler (market toplamı, kategori toplamı, genel): kategori ağırlıklarıyla Laspeyres tipi
+#      ağırlıklı ortalama; zincirlemede halkalar, sabit bazda seviyeler ağırlıklandırılır.
+# Sonuçlar price_index tablosunda tutulur; main.py her gün sadece yeni günü (ve varsa sonrasını) hesaplar.
+ALL = "Tümü"  # Üst endekslerde market / kategori adı (dashboard'daki seçimle aynı)
+METHODS = ("chained", "fixed")
+INDEX_METHOD = os.getenv("INDEX_METHOD", "chained")
+INDEX_BASE = 100.0
+# Kategori ağırlıkları ("Süt=3,Çay=1"); verilmeyen kategorinin ağırlığı 1
+INDEX_WEIGHTS = os.getenv("INDEX_WEIGHTS", "")
+
+KEYS = ["market", "category"]
+COLUMNS = ["method", "market", "category", "date", "level", "link", "n"]
+
+PRICES_QUERY = '''
+               SELECT date, market, category, product_id, price
+               FROM prices
+               WHERE price > 0 AND ({where})
+               '''
+
+# Her grubun start'tan önceki son (zincirleme) veya ilk (sabit baz) endeks satırı
+REFERENCE_QUERY = '''
+                  SELECT DISTINCT ON (market, category) market, category, date, level
+                  FROM price_index
+                  WHERE method = %s {where}
+                  ORDER BY market, category, date {order}
+                  '''
+
+
+def parse_weights(text=INDEX_WEIGHTS):
+    weights = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, value = part.partition("=")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+def _prepare(prices):
+    df = prices[["date", "market", "category", "product_id", "price"]].copy()
+    df["date"] = pd.to_datetime(df["date"])
+    df["price"] = df["price"].astype(float)
+    df = df[df["price"] > 0]
+    # Taşınan günler görünümde kaynak günün satırlarıyla gelir; aynı ürün aynı gün tek fiyat
+    return df.drop_duplicates(KEYS + ["product_id", "date"], keep="last")
+
+
+def elementary_links(prices):
+    """
+    Zincirleme temel endeks halkaları. prices: date, market, category, product_id, price
+    Dönüş: market, category, date, link, n  -- link: grubun bir önceki tarama gününe göre eşleşen ürünlerin
+    fiyat oranlarının geometrik ortalaması (grubun ilk gününde NaN), n: eşleşen ürün sayısı.
+    """
+    df = _prepare(prices)
+    obs = df[KEYS + ["date"]].drop_duplicates().sort_values(KEYS + ["date"])
+    obs["prev_date"] = obs.groupby(KEYS, observed=True)["date"].shift()
+
+    df = df.sort_values(KEYS + ["product_id", "date"])
+    by_product = df.groupby(KEYS + ["product_id"], observed=True)
+    df["prev_price"] = by_product["price"].shift()
+    df["prev_seen"] = by_product["date"].shift()
+    df = df.merge(obs, on=KEYS + ["date"])
+    # Sadece grubun bir önceki tarama gününde de görülen ürünler
+    matched = df[df["prev_seen"] == df["prev_date"]]
+    logs = np.log(matched["price"] / matched["prev_price"])
+    stats = logs.groupby([matched[k] for k in KEYS + ["date"]], observed=True).agg(["mean", "size"])
+    stats.columns = ["log_link", "n"]
+
+    obs = obs.merge(stats.reset_index(), on=KEYS + ["date"], how="left")
+    obs["n"] = obs["n"].fillna(0).astype(int)
+    # Önceki günle hiç eşleşme yoksa değişim bilinmiyor: seviye aynen devam eder
+    obs["link"] = np.where(obs["prev_date"].isna(), np.nan, np.exp(obs["log_link"].fillna(0.0)))
+    return obs[KEYS + ["date", "link", "n"]]
+
+
+def fixed_levels(prices, base_prices=None):
+    """
+    Sabit baz temel endeks: her grubun baz günündeki ürünlerine göre Jevons seviyesi (baz = 100).
+    base_prices verilmezse her grubun verideki ilk günü baz alınır. Dönüş: market, category, date, level, n
+    """
+    df = _prepare(prices)
+    base = _prepare(base_prices) if base_prices is not None else df
+    first = base.groupby(KEYS, observed=True)["date"].transform("min")
+    base = base[base["date"] == first][KEYS + ["product_id", "price"]].rename(columns={"price": "base_price"})
+
+    df = df.merge(base, on=KEYS + ["product_id"])
+    logs = np.log(df["price"] / df["base_price"])
+    out = logs.groupby([df[k] for k in KEYS + ["date"]], observed=True).agg(["mean", "size"]).reset_index()
+    out["level"] = INDEX_BASE * np.exp(out["mean"])
+    return out.rename(columns={"size": "n"})[KEYS + ["date", "level", "n"]]
+
+
+def _weighted(df, by, value, weights):
+    """Gruplar üzerinde kategori ağırlıklı ortalama; n katkı veren grup sayısıdır."""
+    w = df["category"].map(weights).fillna(1.0) if weights else pd.Series(1.0, index=df.index)
+    out = (df.assign(_wv=df[value] * w, _w=w)
+           .groupby(by, observed=True).agg(_wv=("_wv", "sum"), _w=("_w", "sum"), n=("_w", "size")).reset_index())
+    out[value] = out["_wv"] / out["_w"]
+    return out.drop(columns=["_wv", "_w"])
+
+
+def upper(elementary, value, weights=None):
+    """
+    Temel endekslerden (market, Tümü), (Tümü, kategori) ve (Tümü, Tümü) üst endeksleri.
+    value: "link" (zincirleme: halkalar ortalanıp sonra zincirlenir) veya "level" (sabit baz).
+    Marketler eşit ağırlıklıdır; kategori ağırlıkları weights ile verilir.
+    """
+    df = elementary.dropna(subset=[value])
+    parts = [
+        _weighted(df, ["market", "date"], value, weights).assign(category=ALL),
+        _weighted(df, ["category", "date"], value, None).assign(market=ALL),
+        _weighted(df, ["date"], value, weights).assign(market=ALL, category=ALL),
+    ]
+    out = pd.concat(parts, ignore_index=True)[KEYS + ["date", value, "n"]]
+    # Hiçbir temel endeksin halkası olmayan gün (ör. ilk gün) üst endeksin baz günüdür
+    days = pd.concat([elementary[["market", "date"]].assign(category=ALL),
+                      elementary[["category", "date"]].assign(market=ALL),
+                      elementary[["date"]].assign(market=ALL, category=ALL)], ignore_index=True).drop_duplicates()
+    out = days.merge(out, on=KEYS + ["date"], how="left")
+    out["n"] = out["n"].fillna(0).astype(int)
+    return out
+
+
+def chain(links, seeds=None):
+    """
+    Halkaları seviyeye çevirir. seeds: {(market, kategori): başlangıç seviyesi}; verilmeyen grup 100'den başlar.
+    links: market, category, date, link (NaN = baz günü)
+    """
+    links = links.sort_values(KEYS + ["date"]).reset_index(drop=True)
+    log_cum = np.log(links["link"].fillna(1.0)).groupby([links[k] for k in KEYS], observed=True).cumsum()
+    start = pd.Series([(seeds or {}).get(key, INDEX_BASE) for key in zip(links["market"], links["category"])],
+                      index=links.index)
+    return links.assign(level=start * np.exp(log_cum))
+
+
+def compute_index(prices, method=INDEX_METHOD, weights=None, seeds=None, base_prices=None):
+    """
+    Python API: tüm geçmiş (veya bir aralık) üzerinde vektörel hesap.
+    prices: date, market, category, product_id, price satırları (ör. prices görünümü).
+    seeds: zincirlemede grupların başlangıç seviyeleri (artımlı güncelleme, bkz. update_index).
+    base_prices: sabit bazda baz sepeti (verilmezse her grubun ilk günü).
+    Dönüş: method, market, category, date, level, link, n  (temel ve üst endeksler birlikte)
+    """
+    weights = parse_weights() if weights is None else weights
+    if method == "chained":
+        links = elementary_links(prices)
+        tops = upper(links, "link", weights)
+        levels = chain(pd.concat([links, tops], ignore_index=True), seeds)
+    elif method == "fixed":
+        levels = fixed_levels(prices, base_prices)
+        levels = pd.concat([levels, upper(levels, "level", weights)], ignore_index=True)
+        levels["link"] = np.nan
+    else:
+        raise ValueError(f"Bilinmeyen endeks yöntemi: {method} (seçenekler: {', '.join(METHODS)})")
+    levels["method"] = method
+    return levels[COLUMNS].sort_values(KEYS + ["date"]).reset_index(drop=True)
+
+
+def index_rates(index_df, freq="M"):
+    """
+    Endeks seviyelerinden dönemsel değişim oranları (%). freq: "D" günlük, "W" haftalık, "M" aylık.
+    Her dönemin son seviyesi bir önceki dönemin son seviyesiyle kıyaslanır. Dönüş: market, category, period, level, rate
+    """
+    df = index_df[KEYS + ["date", "level"]].copy()
+    df["period"] = pd.to_datetime(df["date"]).dt.to_period(freq)
+    last = df.sort_values("date").groupby(KEYS + ["period"], observed=True)["level"].last().reset_index()
+    last["rate"] = last.groupby(KEYS, observed=True)["level"].pct_change() * 100
+    return last
+
+
+def _load_prices(where, params):
+    chunks = list(read_chunks(PRICES_QUERY.format(where=where), params))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _references(conn, method, start):
+    """Zincirleme: start'tan önceki son seviyeler. Sabit baz: grupların baz (ilk) günleri."""
+    chained = method == "chained"
+    cur = conn.cursor()
+    cur.execute(REFERENCE_QUERY.format(where="AND date < %s" if chained else "",
+                                       order="DESC" if chained else "ASC"),
+                (method, start) if chained else (method,))
+    rows = cur.fetchall()
+    cur.close()
+    return {(market, category): (date, level) for market, category, date, level in rows}
+
+
+def _has_index(conn, method):
+    cur = conn.cursor()
+    cur.execute("SELECT EXISTS (SELECT 1 FROM price_index WHERE method = %s)", (method,))
+    found = cur.fetchone()[0]
+    cur.close()
+    return found
+
+
+def save_index(conn, index_df, start=None):
+    """start'tan (verilmezse tümü) itibaren yöntemin satırlarını yenileriyle değiştirir. Commit çağırana bırakılır."""
+    method = index_df["method"].iloc[0] if not index_df.empty else INDEX_METHOD
+    cur = conn.cursor()
+    if start is None:
+        cur.execute("DELETE FROM price_index WHERE method = %s", (method,))
+    else:
+        cur.execute("DELETE FROM price_index WHERE method = %s AND date >= %s", (method, start))
+    rows = [(r.method, r.market, r.category, r.date.date(), float(r.level),
+             None if pd.isna(r.link) else float(r.link), int(r.n)) for r in index_df.itertuples(index=False)]
+    execute_values(cur, f"INSERT INTO price_index ({', '.join(COLUMNS)}) VALUES %s", rows, page_size=5000)
+    cur.close()
+    return len(rows)
+
+
+def update_index(dates, method=INDEX_METHOD):
+    """
+    Artımlı güncelleme: en erken verilen günden itibaren endeksi yeniden hesaplar. Zincirleme endeks
+    her grubun o günden önceki son seviyesinden devam eder; geçmiş bir gün değiştiyse (ör. replay)
+    sonraki günler de yeniden zincirlenir. Maliyeti o günden sonraki satır sayısı kadardır.
+    Tabloda bu yöntemin hiç satırı yoksa tüm geçmiş hesaplanır. Yazılan satır sayısını döndürür.
+    """
+    start = min(str(d)[:10] for d in dates)
+    with connection() as conn:
+        references = _references(conn, method, start)
+        if not references and not _has_index(conn, method):
+            # İlk çalıştırma: geçmişin tamamı
+            start = "0001-01-01"
+        ref_dates = sorted({str(date) for date, _ in references.values()})
+        prices = _load_prices("date >= %s OR date = ANY(%s::date[])", (start, ref_dates))
+        if prices.empty:
+            return 0
+        # start'tan önceki günlerden sadece grubun kendi referans günü (başka grubun referans günü zinciri bozar)
+        refs = pd.DataFrame([(m, c, pd.Timestamp(d)) for (m, c), (d, _) in references.items()],
+                            columns=KEYS + ["ref_date"])
+        prices["date"] = pd.to_datetime(prices["date"])
+        prices = prices.merge(refs, on=KEYS, how="left")
+        prices = prices[(prices["date"] >= pd.Timestamp(start)) | (prices["date"] == prices["ref_date"])]
+
+        # Sabit bazda grupların baz günleri yüklenen veride olduğundan her grup yine ilk gününe göre hesaplanır
+        seeds = {key: level for key, (_, level) in references.items()} if method == "chained" else None
+        index_df = compute_index(prices, method, seeds=seeds)
+        index_df = index_df[index_df["date"] >= pd.Timestamp(start)]
+        count = save_index(conn, index_df, start)
+        conn.commit()
+    return count
+
+
+def rebuild_index(method=INDEX_METHOD):
+    """Tüm geçmişten baştan hesaplar (yöntem veya ağırlıklar değiştiğinde)."""
+    started = time.time()
+    prices = _load_prices("TRUE", None)
+    index_df = compute_index(prices, method)
+    with connection() as conn:
+        count = save_index(conn, index_df)
+        conn.commit()
+    print(f"💹 {method} endeksi: {len(prices)} fiyat satırından {count} endeks satırı, {time.time() - started:.1f} sn.")
+    return count
+
+
+if __name__ == "__main__":
+    # Kullanım: python inflation_index.py [chained|fixed]
+    rebuild_index(sys.argv[1] if len(sys.argv) > 1 else INDEX_METHOD)
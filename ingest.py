@@ -0,0 +1,461 @@
+import csv
+import io
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+from psycopg2.extras import execute_values
+
+import db
+from cleaning import DUPLICATE, normalize_records
+from migrations import ensure_partitions
+from raw_archive import RAW_ARCHIVE_DIR, SnapshotWriter
+from telemetry import TELEMETRY, DB_WRITE, PARSE
+
+COLUMNS = ("date", "market", "category", "product_name", "price", "unit_price", "unit")
+
+
+def bulk_load(conn, rows):
+    """
+    Satırları COPY FROM STDIN ile geçici bir tabloya basar, oradan market/kategori/ürün boyutlarını
+    ve price_facts tablosunu küme sorgularıyla günceller.
+    (date, ürün) zaten varsa fiyat bilgileri güncellenir; aynı günü tekrar çalıştırmak kopya satır
+    üretmez. Commit çağırana bırakılır. Aktarılan satır sayısını döndürür.
+    """
+    if not rows:
+        return 0
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    cur = conn.cursor()
+    cur.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS prices_staging
+                (
+                    date DATE,
+                    market VARCHAR(50),
+                    category VARCHAR(100),
+                    product_name TEXT,
+                    price NUMERIC(10, 2),
+                    unit_price NUMERIC(10, 2),
+                    unit VARCHAR(20),
+                    seq BIGSERIAL
+                ) ON COMMIT DELETE ROWS
+                ''')
+    cur.execute("TRUNCATE prices_staging")
+    cur.copy_expert(f"COPY prices_staging ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    ensure_partitions(cur, {row[0] for row in rows})
+    cur.execute('''
+                INSERT INTO markets (name)
+                SELECT DISTINCT market FROM prices_staging
+                ON CONFLICT (name) DO NOTHING;
+
+                INSERT INTO categories (name)
+                SELECT DISTINCT category FROM prices_staging
+                ON CONFLICT (name) DO NOTHING;
+
+                INSERT INTO products (market_id, name)
+                SELECT DISTINCT m.id, s.product_name
+                FROM prices_staging s JOIN markets m ON m.name = s.market
+                ON CONFLICT (market_id, name) DO NOTHING;
+                ''')
+
+    # Aynı partide aynı ürün iki kez gelirse (ör. iki kategoride) ON CONFLICT hata verir; sonuncusu kalsın
+    cur.execute('''
+                INSERT INTO price_facts (date, product_id, market_id, category_id, price, unit_price, unit)
+                SELECT DISTINCT ON (s.date, p.id) s.date, p.id, m.id, c.id, s.price, s.unit_price, s.unit
+                FROM prices_staging s
+                         JOIN markets m ON m.name = s.market
+                         JOIN categories c ON c.name = s.category
+                         JOIN products p ON p.market_id = m.id AND p.name = s.product_name
+                ORDER BY s.date, p.id, s.seq DESC
+                ON CONFLICT (product_id, date) DO UPDATE
+                    SET category_id = EXCLUDED.category_id,
+                        price       = EXCLUDED.price,
+                        unit_price  = EXCLUDED.unit_price,
+                        unit        = EXCLUDED.unit
+                ''')
+    loaded = cur.rowcount
+    cur.close()
+    return loaded
+
+
+def save_rejected(conn, rejected):
+    """Temizlemede elenen (date, market, category, product_name, price_text, reason) satırlarını yazar."""
+    if not rejected:
+        return 0
+    cur = conn.cursor()
+    execute_values(cur, '''
+                   INSERT INTO rejected_rows (date, market, category, product_name, price_text, reason)
+                   VALUES %s
+                   ''', rejected, page_size=1000)
+    cur.close()
+    return len(rejected)
+
+
+def load_raw(conn, records):
+    """
+    Scraper'ların ham (date, market, category, product_name, price_text) satırlarını toplu temizler,
+    geçerlileri bulk_load ile, elenenleri rejected_rows'a yazar. Commit çağırana bırakılır.
+    Dönüş: (yazılan satır sayısı, elenen satırlar)
+    """
+    with TELEMETRY.timer(PARSE):
+        rows, rejected = normalize_records(records)
+    with TELEMETRY.timer(DB_WRITE):
+        loaded = bulk_load(conn, rows)
+        save_rejected(conn, rejected)
+    return loaded, rejected
+
+
+# Kuyruk elemanları: satır listesi veya kategori bitti işareti
+_CATEGORY_DONE = "category_done"
+_FINGERPRINT = "fingerprint"
+_STOP = "stop"
+
+
+class StreamingSink:
+    """
+    Scraper'ların ham satır eklediği liste benzeri hedef.
+    Satırlar arka plandaki yazıcı thread'e kuyrukla aktarılır ve batch_size'lık partiler halinde
+    temizlenip (bkz. cleaning.py) PostgreSQL'e yazılır. Kuyruk max_pending satırla sınırlıdır; veritabanı yetişemezse
+    append() bekler, bellek katalog büyüklüğüyle büyümez.
+
+    Biten kategoriler scrape_progress tablosuna işlenir; aynı gün tekrar çalıştırıldığında
+    bu kategoriler atlanır, yarım kalanların satırları silinip baştan taranır.
+
+    archive_dir verilirse her kategorinin ham satırları kategori bitince Parquet arşivine yazılır
+    (bkz. raw_archive.py); satırlar geldikçe geçici dosyaya eklenir, bellekte kategori başına en fazla
+    batch_size ham satır kalır.
+
+    Yazıcı thread beklenmedik bir hata alırsa durmaz: kuyruğu boşaltmaya devam eder (append() beklemede
+    kalmasın), gelen satırlar atılır ve bitmemiş kategoriler eksik işaretlenir. close() en fazla
+    close_timeout saniye bekler.
+    """
+
+    def __init__(self, today_date, batch_size=500, max_pending=5000, flush_interval=5.0,
+                 spill_dir=".", archive_dir=RAW_ARCHIVE_DIR, close_timeout=600.0):
+        self.today_date = today_date
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.close_timeout = close_timeout
+        self.spill_dir = spill_dir
+        self.archive_dir = archive_dir
+        self._raw = {}  # (market, kategori) -> açık arşiv dosyası (SnapshotWriter; yazılamadıysa None)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._counts = Counter()  # (market, kategori) -> satır sayısı
+        self._lock = threading.Lock()
+        self._thread = None
+        self._conn = None
+        self.written = 0
+        self.spilled = 0
+        self._spilled_categories = set()  # Satırlarından en az bir parti CSV'ye düşen (market, kategori)
+        self._seen = set()  # Yazılmış (date, market, ürün adı); tekrar kontrolü partiler arası yapılır
+        self.rejected = Counter()  # Sebep -> elenen satır sayısı
+        self.incomplete = {}  # (market, kategori) -> eksik kalma sebebi
+        self._done = set()  # Tamamlanmış işaretlenen (market, kategori)
+        self.error = None  # Yazıcı thread'i durduran hata
+        self.dropped = 0  # Yazıcı hatasından sonra atılan satırlar
+
+    # --- Scraper tarafı (products_list sözleşmesi) ---
+
+    def append(self, row):
+        with self._lock:
+            self._counts[(row[1], row[2])] += 1
+            if self.error is not None:
+                self.dropped += 1
+                return
+        self._queue.put(("row", row))
+
+    def __len__(self):
+        with self._lock:
+            return sum(self._counts.values())
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def commit_category(self, market, category, incomplete=None):
+        """
+        Kategorinin tüm satırları yazıldıktan sonra ilerleme tablosuna işlenmesini sağlar.
+        incomplete (sebep) verilirse kategori eksik işaretlenir: satırları kalır ama tamamlanmış sayılmaz.
+        """
+        self._queue.put((_CATEGORY_DONE, (market, category, incomplete)))
+
+    def record_fingerprint(self, market, category, fingerprint, carried_from=None):
+        """Kategorinin ilk sayfa parmak izini (ve taşındıysa kaynak günü) kaydeder; bkz. change_detection.py."""
+        self._queue.put((_FINGERPRINT, (market, category, fingerprint, carried_from)))
+
+    # --- Yaşam döngüsü ---
+
+    def start(self):
+        """Yarım kalmış kategorilerin satırlarını temizler ve yazıcı thread'i başlatır. Biten kategorileri döndürür."""
+        conn = self._connect()
+        cur = conn.cursor()
+        # Bugün için kaydı olup da ilerleme tablosunda bitmiş görünmeyen (veya eksik işaretli) satırlar
+        # yarım kalmış bir çalıştırmadan kalmadır
+        cur.execute('''
+                    DELETE FROM price_facts f USING markets m, categories c
+                    WHERE f.date = %s
+                      AND m.id = f.market_id
+                      AND c.id = f.category_id
+                      AND NOT EXISTS (SELECT 1 FROM scrape_progress sp
+                                      WHERE sp.date = f.date AND sp.market = m.name AND sp.category = c.name
+                                        AND sp.incomplete IS NULL)
+                    ''', (self.today_date,))
+        if cur.rowcount:
+            print(f"🧹 Yarım kalmış kategorilerden {cur.rowcount} satır silindi.")
+        cur.execute('''
+                    DELETE FROM rejected_rows r
+                    WHERE r.date = %s
+                      AND NOT EXISTS (SELECT 1 FROM scrape_progress sp
+                                      WHERE sp.date = r.date AND sp.market = r.market AND sp.category = r.category
+                                        AND sp.incomplete IS NULL)
+                    ''', (self.today_date,))
+        cur.execute('''
+                    DELETE FROM category_fingerprints cf
+                    WHERE cf.date = %s
+                      AND NOT EXISTS (SELECT 1 FROM scrape_progress sp
+                                      WHERE sp.date = cf.date AND sp.market = cf.market AND sp.category = cf.category
+                                        AND sp.incomplete IS NULL)
+                    ''', (self.today_date,))
+        cur.execute("SELECT market, category FROM scrape_progress WHERE date = %s AND incomplete IS NULL",
+                    (self.today_date,))
+        done = {(market, category) for market, category in cur.fetchall()}
+        conn.commit()
+        cur.close()
+
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        return done
+
+    def close(self):
+        """Kalan satırları yazar ve thread'i durdurur."""
+        if self._thread is not None:
+            deadline = time.time() + self.close_timeout
+            # Kuyruk doluyken thread durmuşsa put() sonsuza kadar beklemesin
+            while self._thread.is_alive() and time.time() < deadline:
+                try:
+                    self._queue.put((_STOP, None), timeout=1.0)
+                    break
+                except queue.Full:
+                    continue
+            self._thread.join(max(deadline - time.time(), 0))
+            if self._thread.is_alive():
+                self._fail(TimeoutError(f"yazıcı {self.close_timeout:.0f} sn içinde bitmedi"))
+            self._thread = None
+        if self._conn is not None:
+            db.release(self._conn)
+            self._conn = None
+        print(f"\n🚀 Toplam {self.written} satır veri PostgreSQL veritabanına akış halinde eklendi.")
+        if self.rejected:
+            reasons = ", ".join(f"{reason}: {count}" for reason, count in self.rejected.most_common())
+            print(f"🚮 {sum(self.rejected.values())} satır temizlemede elendi ({reasons}).")
+        for (market, category), reason in sorted(self.incomplete.items()):
+            print(f"⚠️ {market} / {category} eksik kaydedildi ({reason}); tekrar çalıştırınca baştan taranacak.")
+        if self.spilled:
+            print(f"⚠️ {self.spilled} satır veritabanına yazılamadı, '{self.spill_dir}' altındaki CSV'ye kaydedildi.")
+        if self.error is not None:
+            print(f"❌ Yazıcı hatası ({self.error}): {self.dropped} satır kaydedilmeden atıldı.")
+
+    # --- Yazıcı thread ---
+
+    def _connect(self):
+        # Yazıcı thread havuzdan aldığı bağlantıyı çalıştırma boyunca tutar (bkz. db.py)
+        if self._conn is not None and self._conn.closed:
+            db.release(self._conn, broken=True)
+            self._conn = None
+        if self._conn is None:
+            self._conn = db.acquire()
+        return self._conn
+
+    def _run(self):
+        buffer = []
+        last_flush = time.time()
+        while True:
+            try:
+                kind, payload = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                kind, payload = None, None
+
+            if self.error is not None:
+                # Yazıcı bozuk: kuyruk sadece boşaltılır, biten kategoriler eksik kaydedilir
+                if kind == "row":
+                    with self._lock:
+                        self.dropped += 1
+                elif kind == _CATEGORY_DONE:
+                    market, category, incomplete = payload
+                    self._mark_done(market, category, incomplete or f"yazıcı hatası: {self.error}")
+                elif kind == _STOP:
+                    return
+                continue
+
+            try:
+                if kind == "row":
+                    buffer.append(payload)
+                    if self.archive_dir:
+                        self._archive_row(payload)
+                elif kind == _FINGERPRINT:
+                    self._save_fingerprint(*payload)
+                elif kind == _CATEGORY_DONE:
+                    buffer = self._flush(buffer)
+                    self._mark_done(*payload)
+                    self._archive(payload[:2])
+                elif kind == _STOP:
+                    self._flush(buffer)
+                    # Bitmemiş kategoriler de arşivlenir; tekrar taranırlarsa dosyaları yenisiyle değişir
+                    for key in list(self._raw):
+                        self._archive(key)
+                    return
+
+                if len(buffer) >= self.batch_size or (buffer and time.time() - last_flush >= self.flush_interval):
+                    buffer = self._flush(buffer)
+                    last_flush = time.time()
+            except Exception as e:
+                self._fail(e, buffer)
+                buffer = []
+                for writer in filter(None, self._raw.values()):
+                    writer.abort()
+                self._raw.clear()
+
+    def _fail(self, error, buffer=()):
+        """Yazıcıyı bozuk işaretler: eldeki parti CSV'ye kurtarılır, bitmemiş kategoriler eksik sayılır."""
+        print(f"❌ Yazıcı Hatası, bundan sonraki satırlar kaydedilmeyecek: {error}")
+        TELEMETRY.event("writer_failed", error=str(error))
+        with self._lock:
+            self.error = error
+            pending = [key for key in self._counts if key not in self._done]
+        if buffer:
+            try:
+                self._spill(buffer)
+            except Exception as e:
+                print(f"❌ {len(buffer)} satır CSV'ye de yazılamadı: {e}")
+        for key in pending:
+            self.incomplete.setdefault(key, f"yazıcı hatası: {error}")
+
+    def _flush(self, buffer, retries=3):
+        if not buffer:
+            return buffer
+        # Temizleme bir kez yapılır, sadece yazma tekrar denenir
+        with TELEMETRY.timer(PARSE):
+            rows, rejected = normalize_records(buffer, self._seen)
+        for attempt in range(retries):
+            try:
+                conn = self._connect()
+                with TELEMETRY.timer(DB_WRITE):
+                    loaded = bulk_load(conn, rows)
+                    save_rejected(conn, rejected)
+                    conn.commit()
+                self._seen.update((row[0], row[1], row[3]) for row in rows)
+                self.written += loaded
+                self.rejected.update(r[-1] for r in rejected)
+                self._count(buffer, rejected)
+                return []
+            except Exception as e:
+                print(f"❌ Parti Kayıt Hatası (deneme {attempt + 1}/{retries}): {e}")
+                self._reset_connection()
+                time.sleep(2 ** attempt)
+
+        self._spill(buffer)
+        TELEMETRY.event("spill", rows=len(buffer))
+        return []
+
+    @staticmethod
+    def _count(buffer, rejected):
+        """Market bazında temizlemeden geçen, elenen ve tekrar eden satır sayıları (bkz. telemetry.py)."""
+        rows = Counter(row[1] for row in buffer)
+        for row in rejected:
+            rows[row[1]] -= 1
+            TELEMETRY.count("duplicates" if row[-1] == DUPLICATE else "rejects", market=row[1])
+        for market, count in rows.items():
+            TELEMETRY.count("rows", count, market=market)
+
+    def _mark_done(self, market, category, incomplete=None):
+        with self._lock:
+            rows = self._counts[(market, category)]
+        # Satırları veritabanına ulaşmayan kategori bitti sayılmaz; tekrar çalıştırınca baştan taranır
+        if (market, category) in self._spilled_categories and not incomplete:
+            incomplete = "satırlar veritabanına yazılamadı, CSV'ye kaydedildi"
+        if incomplete:
+            self.incomplete[(market, category)] = incomplete
+        else:
+            with self._lock:
+                self._done.add((market, category))
+        TELEMETRY.count("categories_incomplete" if incomplete else "categories_done", market=market)
+        try:
+            conn = self._connect()
+            cur = conn.cursor()
+            cur.execute('''
+                        INSERT INTO scrape_progress (date, market, category, rows, incomplete)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON CONFLICT (date, market, category) DO UPDATE
+                            SET rows         = EXCLUDED.rows,
+                                incomplete   = EXCLUDED.incomplete,
+                                committed_at = now()
+                        ''', (self.today_date, market, category, rows, incomplete))
+            conn.commit()
+            cur.close()
+        except Exception as e:
+            print(f"❌ İlerleme Kaydı Hatası ({market} / {category}): {e}")
+            self._reset_connection()
+
+    def _save_fingerprint(self, market, category, fingerprint, carried_from):
+        try:
+            conn = self._connect()
+            cur = conn.cursor()
+            cur.execute('''
+                        INSERT INTO category_fingerprints (date, market, category, fingerprint, carried_from)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON CONFLICT (date, market, category) DO UPDATE
+                            SET fingerprint  = EXCLUDED.fingerprint,
+                                carried_from = EXCLUDED.carried_from,
+                                recorded_at  = now()
+                        ''', (self.today_date, market, category, fingerprint, carried_from))
+            conn.commit()
+            cur.close()
+        except Exception as e:
+            print(f"❌ Parmak İzi Kaydı Hatası ({market} / {category}): {e}")
+            self._reset_connection()
+
+    def _archive_row(self, row):
+        key = (row[1], row[2])
+        if key not in self._raw:
+            self._raw[key] = SnapshotWriter(self.archive_dir, row[0], *key, buffer_rows=self.batch_size)
+        writer = self._raw[key]
+        if writer is None:
+            return
+        try:
+            writer.append(row)
+        except Exception as e:
+            # Arşiv yazılamazsa kategori arşivsiz kalır, satırların veritabanına yazılması sürer
+            print(f"❌ Ham Arşiv Hatası ({key[0]} / {key[1]}): {e}")
+            writer.abort()
+            self._raw[key] = None
+
+    def _archive(self, key):
+        writer = self._raw.pop(key, None)
+        if writer is None:
+            return
+        try:
+            writer.close()
+        except Exception as e:
+            print(f"❌ Ham Arşiv Hatası ({key[0]} / {key[1]}): {e}")
+            writer.abort()
+
+    def _reset_connection(self):
+        if self._conn is not None:
+            try:
+                db.release(self._conn, broken=True)
+            except Exception:
+                pass
+            self._conn = None
+
+    def _spill(self, buffer):
+        """Veritabanına yazılamayan partiyi kaybetmemek için CSV'ye ekler (ham haliyle; tekrar yüklenebilir)."""
+        path = os.path.join(self.spill_dir, f"unsaved_rows_{self.today_date}.csv")
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(buffer)
+        self.spilled += len(buffer)
+        self._spilled_categories.update((row[1], row[2]) for row in buffer)
@@ -1,147 +1,38 @@
-import psycopg2
 import datetime
-import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 
 # Scraper Modülleri
-# Not: scrapers klasöründeki migros.py ve a101.py dosyalarınızın yanına dokunmanıza gerek yok.
-from scrapers.migros import scrape_migros
-from scrapers.a101 import scrape_a101
+# Not: marketler scrapers/markets/ altındaki yapılandırma dosyalarından bulunur (bkz. scrapers/registry.py).
+from scrapers.registry import load_markets
+from scrapers.scheduler import build_jobs, run_scrape_jobs, run_http_jobs, DEFAULT_POOL_SIZE
+from scrapers.http_engine import create_session, FixtureSession
+from scrapers.waits import WAIT_STATS
+from ingest import StreamingSink, load_raw
+from change_detection import ChangeDetector, CHANGE_DETECTION
+from migrations import migrate
+from rollups import refresh_rollups
+from anomalies import detect_anomalies
+from inflation_index import update_index
+from telemetry import TELEMETRY, VALIDATE, ROLLUPS, INDEX, save_run
+# Veritabanı bilgileri ve bağlantı havuzu (.env'den) ortak modülde
+from db import connection
 import os
-from dotenv import load_dotenv
 
-# .env dosyasını yükle
-load_dotenv()
-
-# Veritabanı bilgilerini ortam değişkenlerinden al
-DB_PARAMS = {
-    "dbname": os.getenv("DB_NAME"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "host": os.getenv("DB_HOST"),
-    "port": os.getenv("DB_PORT")
-}
-
-# --- YARDIMCI FONKSİYONLAR ---
-
-def clean_price(price_text):
-    """Metin halindeki fiyatı (120,50 TL) sayıya çevirir."""
-    if not price_text: return None
-    try:
-        # TL, ₺, boşluklar temizle
-        clean = price_text.replace("TL", "").replace("₺", "").replace("\n", "").strip()
-        clean = clean.replace(".", "")  # Binlik ayracı sil (1.200 -> 1200)
-        clean = clean.replace(",", ".")  # Ondalık virgülü noktaya çevir (12,50 -> 12.50)
-        return float(clean)
-    except ValueError:
-        return None
-
-
-def extract_unit_price(product_name, price):
-    """
-    Birim fiyat hesaplama motoru.
-    Multipack (4x1), Yumurta ve Gramaj hesaplar.
-    """
-    name_lower = product_name.lower().replace("İ", "i").replace("I", "ı").replace(" ", "").replace(",", ".")
-
-    # 1. MULTIPACK KURALI (Örn: 4x1 L, 6*200 ml)
-    # Regex: Rakam + (x veya *) + Rakam + Birim
-    multipack = re.search(r"(\d+)\s*[\*xX]\s*(\d*\.?\d+)\s*(kg|gr|g|l|ml|lt)", name_lower)
-
-    if multipack:
-        count = float(multipack.group(1))
-        amount = float(multipack.group(2))
-        unit = multipack.group(3)
-
-        # Gramaj dönüşümü (ml/gr -> L/kg)
-        if unit in ["gr", "g", "ml"]: amount /= 1000.0
-
-        total_amount = count * amount
-        if total_amount > 0:
-            return round(price / total_amount, 2)
-
-    # 2. YUMURTA KURALI (Adet hesabı)
-    if "yumurta" in name_lower:
-        # 15'li, 30lu vb.
-        match = re.search(r"(\d+)\s*['’]?\s*[l][ıiIuÜ]", name_lower)
-        if match: return round(price / float(match.group(1)), 2)
-
-        # 30 adet vb.
-        match_adet = re.search(r"(\d+)\s*adet", name_lower)
-        if match_adet: return round(price / float(match_adet.group(1)), 2)
-
-    # 3. STANDART GRAMAJ (1 kg, 500 gr vb.)
-    # Kalibre koruması (400/600 gr levrek gibi ifadeleri bölmesin)
-    if "/" in name_lower and any(x in name_lower for x in ['levrek', 'cipura', 'somon', 'uskumru']):
-        return price
-
-    match = re.search(r"(\d+)(kg|gr|g|l|ml|lt)", name_lower)
-    if match:
-        try:
-            amount = float(match.group(1))
-            unit = match.group(2)
-            if unit in ["gr", "g", "ml"]: amount /= 1000.0
-
-            if amount > 0:
-                u_p = price / amount
-                # Güvenlik: 5 TL altı birim fiyat (Su/Soda hariç) genelde hatadır, bölme.
-                if u_p < 5.0 and "su" not in name_lower and "soda" not in name_lower: return price
-                return round(u_p, 2)
-        except:
-            return price
-
-    return price
+# Tarama motoru: "http" önce tarayıcısız hızlı yolu dener, olmayanları Selenium'a bırakır; "selenium" sadece tarayıcı.
+SCRAPER_ENGINE = os.getenv("SCRAPER_ENGINE", "http")
+# Dolu ise HTTP cevapları bu klasördeki kayıtlardan okunur (çevrimdışı test / tekrar oynatma)
+HTTP_FIXTURE_DIR = os.getenv("HTTP_FIXTURE_DIR")
 
+# Akış halinde kayıt: satırlar tarama sürerken bu büyüklükteki partilerle veritabanına yazılır
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", "5000"))
 
 # --- POSTGRESQL VERİTABANI İŞLEMLERİ ---
 
 def init_db():
-    """PostgreSQL tablosunu oluşturur (Eğer yoksa)."""
+    """PostgreSQL şemasını oluşturur / günceller (bkz. migrations.py)."""
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        cur = conn.cursor()
-
-        # PostgreSQL'de AUTOINCREMENT yerine SERIAL kullanılır
-        cur.execute('''
-                    CREATE TABLE IF NOT EXISTS prices
-                    (
-                        id
-                        SERIAL
-                        PRIMARY
-                        KEY,
-                        date
-                        DATE,
-                        market
-                        VARCHAR
-                    (
-                        50
-                    ),
-                        category VARCHAR
-                    (
-                        100
-                    ),
-                        product_name TEXT,
-                        price NUMERIC
-                    (
-                        10,
-                        2
-                    ),
-                        unit_price NUMERIC
-                    (
-                        10,
-                        2
-                    ),
-                        unit VARCHAR
-                    (
-                        20
-                    )
-                        )
-                    ''')
-        conn.commit()
-        cur.close()
-        conn.close()
+        with connection() as conn:
+            migrate(conn)
         print("🐘 PostgreSQL veritabanı bağlantısı başarılı ve tablo hazır.")
     except Exception as e:
         print(f"❌ Veritabanı Bağlantı Hatası: {e}")
@@ -150,80 +41,118 @@ def init_db():
 
 
 def save_to_db(data):
-    """Verileri PostgreSQL veritabanına kaydeder."""
+    """Ham satırları temizleyip PostgreSQL veritabanına kaydeder (COPY + upsert, tekrar çalıştırılabilir)."""
     if not data:
         return
 
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        cur = conn.cursor()
-
-        # PostgreSQL placeholder'ı %s dir. SQLite'taki ? çalışmaz.
-        query = '''
-                INSERT INTO prices (date, market, category, product_name, price, unit_price, unit)
-                VALUES (%s, %s, %s, %s, %s, %s, %s) \
-                '''
-
-        # executemany ile toplu ve hızlı kayıt
-        cur.executemany(query, data)
-
-        conn.commit()
-        cur.close()
-        conn.close()
-        print(f"\n🚀 Toplam {len(data)} satır veri PostgreSQL veritabanına başarıyla eklendi.")
+        with connection() as conn:
+            loaded, rejected = load_raw(conn, data)
+            conn.commit()
+        print(f"\n🚀 Toplam {loaded} satır veri PostgreSQL veritabanına başarıyla eklendi/güncellendi.")
+        if rejected:
+            print(f"🚮 {len(rejected)} satır temizlemede elendi (bkz. rejected_rows).")
     except Exception as e:
         print(f"❌ Kayıt Hatası: {e}")
+        return
 
+    update_rollups({row[0] for row in data})
 
-# --- ANA PROGRAM BAŞLANGICI ---
-if __name__ == "__main__":
 
-    # 1. Veritabanını Başlat / Kontrol Et
-    init_db()
+def update_rollups(dates):
+    """
+    Yüklenen günleri doğrular (şüpheli fiyatlar karantinaya, bkz. anomalies.py), sonra gün/market/kategori
+    özetlerini (daily_rollups) ve fiyat endeksini (price_index) yeniler.
+    """
+    try:
+        with TELEMETRY.timer(VALIDATE):
+            detect_anomalies(dates)
+    except Exception as e:
+        print(f"❌ Doğrulama Hatası: {e}")
+
+    try:
+        with connection() as conn, TELEMETRY.timer(ROLLUPS):
+            count = refresh_rollups(conn, dates)
+        print(f"📊 {count} özet satırı güncellendi.")
+    except Exception as e:
+        print(f"❌ Özet Güncelleme Hatası: {e}")
+
+    try:
+        with TELEMETRY.timer(INDEX):
+            count = update_index(dates)
+        print(f"💹 {count} fiyat endeksi satırı güncellendi.")
+    except Exception as e:
+        print(f"❌ Endeks Güncelleme Hatası: {e}")
 
-    options = webdriver.ChromeOptions()
-    # Headless Mod: Tarayıcıyı ekranda açmaz, arka planda çalışır (Daha hızlı ve profesyonel)
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-notifications")
-    options.add_argument("--disable-popup-blocking")
 
-    # Anti-Bot: Gerçek kullanıcı gibi görünmek için User-Agent
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+def save_run_report(today, status, rows_written):
+    """Çalıştırmanın aşama sürelerini ve sayaçlarını scrape_runs tablosuna yazar (dashboard'da 'Tarama' sekmesi)."""
+    print(TELEMETRY.report())
+    try:
+        with connection() as conn:
+            run_id = save_run(conn, TELEMETRY, today, status, rows_written)
+            conn.commit()
+        print(f"🗂️ Çalıştırma raporu kaydedildi (scrape_runs #{run_id}).")
+    except Exception as e:
+        print(f"❌ Çalıştırma Raporu Hatası: {e}")
 
-    # EAGER MODE: Sayfa yüklenmesini bekleme stratejisi
-    options.page_load_strategy = 'eager'
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.set_page_load_timeout(45)  # 45 sn zaman aşımı
+# --- ANA PROGRAM BAŞLANGICI ---
+if __name__ == "__main__":
 
-    all_products = []
-    today = datetime.date.today().strftime("%Y-%m-%d")
+    # 1. Veritabanını Başlat / Kontrol Et
+    init_db()
 
-    try:
-        # Migros Taraması
-        try:
-            scrape_migros(driver, all_products, clean_price, extract_unit_price, today)
-        except Exception as e:
-            print(f"❌ Migros Hatası: {e}")
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    TELEMETRY.reset(engine=SCRAPER_ENGINE)
+    status = "tamam"
 
+    # Scraper'lar satırları doğrudan akış hedefine ekler; arka planda partiler halinde DB'ye yazılır
+    all_products = StreamingSink(today, batch_size=INGEST_BATCH_SIZE, max_pending=INGEST_MAX_PENDING)
 
-        try:
+    def commit_job(market, cat, incomplete=None):
+        all_products.commit_category(market["label"], cat["name"], incomplete)
 
-            scrape_a101(driver, all_products, clean_price, extract_unit_price, today)
-        except Exception as e:
-            print(f"❌ A101 Hatası: {e}")
+    detector = None
+    try:
+        done = all_products.start()
+        # Taranacak marketler: her market kendi kategorilerini (market, kategori) işleri olarak zamanlayıcıya verir.
+        # dedupe_names açık marketlerin işleri aynı 'seen_names' havuzunu paylaşır (ör. A101).
+        markets = load_markets()
+        jobs = [(m, cat) for m, cat in build_jobs(markets) if (m["label"], cat["name"]) not in done]
+        if done:
+            print(f"⏩ {len(done)} kategori bugün zaten kaydedilmiş, atlanıyor.")
+
+        # İlk sayfası önceki taramadakiyle aynı olan kategoriler taranmaz, önceki gün taşınır
+        if CHANGE_DETECTION:
+            detector = ChangeDetector.load(today, on_record=all_products.record_fingerprint)
+
+        # Tüm (market, kategori) işleri paralel tarayıcı havuzunda taranır.
+        # Havuz boyutu .env içindeki SCRAPE_WORKERS ile ayarlanır.
+        if SCRAPER_ENGINE == "http":
+            session = FixtureSession(HTTP_FIXTURE_DIR) if HTTP_FIXTURE_DIR else create_session(DEFAULT_POOL_SIZE)
+            jobs = run_http_jobs(jobs, session, all_products, today,
+                                 pool_size=DEFAULT_POOL_SIZE, on_job_done=commit_job, detector=detector)
+
+        if jobs:
+            run_scrape_jobs(jobs, all_products, today,
+                            pool_size=DEFAULT_POOL_SIZE, on_job_done=commit_job, detector=detector)
+            print(WAIT_STATS.report())
 
     except Exception as main_e:
         print(f"❌ Genel Hata: {main_e}")
+        TELEMETRY.event("error", error=f"{type(main_e).__name__}: {str(main_e).strip()}")
+        status = "hata"
 
     finally:
-        driver.quit()
+        all_products.close()
 
-        if all_products:
-            save_to_db(all_products)  # Artık CSV değil, DB'ye kaydediyoruz
+        if all_products or (detector and detector.carried):
+            update_rollups([today])
             print("✅ İşlem Başarıyla Tamamlandı.")
         else:
-            print("⚠️ Hiç veri toplanmadı.")
\ No newline at end of file
+            print("⚠️ Hiç veri toplanmadı.")
+
+        if status == "tamam" and all_products.incomplete:
+            status = "eksik"
+        save_run_report(today, status, all_products.written)
@@ -0,0 +1,187 @@
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db import connection, read_df
+
+# En iyi adayın benzerliği (kosinüs, 0-1) bunun altındaysa eşleşme sayılmaz
+MATCH_MIN_SCORE = float(os.getenv("MATCH_MIN_SCORE", "0.5"))
+# Son bu kadar günde fiyatı görülen ürünler eşleştirilir
+MATCH_LOOKBACK_DAYS = int(os.getenv("MATCH_LOOKBACK_DAYS", "30"))
+# Miktarları bu orandan fazla farklı ürünler karşılaştırılmaz (1 L süt ile 5 L süt aynı ürün değil)
+SIZE_TOLERANCE = 1.5
+NGRAM = 3
+# Benzerlik matrisi bu kadar satırlık parçalarla hesaplanır; bellek blok büyüklüğüyle sınırlı kalır
+CHUNK_ROWS = 1024
+
+PRODUCTS_QUERY = '''
+                 SELECT DISTINCT ON (f.product_id) f.product_id, p.name, f.market_id, f.category_id
+                 FROM price_facts f
+                          JOIN products p ON p.id = f.product_id
+                 WHERE f.date >= (SELECT max(date) FROM price_facts) - %s
+                 ORDER BY f.product_id, f.date DESC
+                 '''
+
+_TR_LOWER = str.maketrans({"İ": "i", "I": "ı"})
+_PIECES = re.compile(r"(\d+)\s*['’]?\s*l[ıiuü]\b")  # 30'lu, 15li -> 30 adet
+_NON_WORD = re.compile(r"[^0-9a-zçğıöşü.]+")
+_UNIT = re.compile(r"(\d)\s*(kg|gr|gram|g|lt|litre|l|ml|adet)\b")
+UNIT_ALIASES = {"gr": "g", "gram": "g", "lt": "l", "litre": "l"}
+_SIZE = re.compile(r"(?:(\d+) x )?(\d+(?:\.\d+)?) (kg|g|l|ml|adet)\b")
+# Birim -> (karşılaştırma boyutu, çarpan)
+DIMENSIONS = {"kg": ("kg", 1.0), "g": ("kg", 0.001), "l": ("l", 1.0), "ml": ("l", 0.001), "adet": ("adet", 1.0)}
+
+
+def normalize_name(name):
+    """'Sütaş Tam Yağlı Süt 4x1Lt' -> 'sütaş tam yağlı süt 4 x 1 l'"""
+    text = name.translate(_TR_LOWER).lower().replace(",", ".").replace("*", "x")
+    text = _PIECES.sub(r"\1 adet", text)
+    text = _NON_WORD.sub(" ", text)
+    text = re.sub(r"(\d)\s*x\s*(\d)", r"\1 x \2", text)
+    text = _UNIT.sub(lambda m: f"{m.group(1)} {UNIT_ALIASES.get(m.group(2), m.group(2))}", text)
+    return " ".join(text.split())
+
+
+def extract_size(normalized):
+    """Normalize edilmiş isimden toplam miktar ve boyut: '4 x 1 l' -> (4.0, 'l'). Bulunamazsa (nan, '-')."""
+    match = _SIZE.search(normalized)
+    if not match:
+        return np.nan, "-"
+    dimension, factor = DIMENSIONS[match.group(3)]
+    amount = float(match.group(1) or 1) * float(match.group(2)) * factor
+    return (amount if amount > 0 else np.nan), dimension
+
+
+def char_ngrams(text, n=NGRAM):
+    grams = []
+    for word in text.split():
+        padded = f" {word} "
+        grams.extend(padded[i:i + n] for i in range(max(len(padded) - n + 1, 1)))
+    return grams
+
+
+class TfidfBlock:
+    """
+    Bir bloktaki (kategori + boyut) isimlerin karakter n-gram TF-IDF vektörleri.
+    Vektörler seyrek (kolon, ağırlık) olarak tutulur, çarpım anında parça parça yoğun matrise açılır.
+    """
+
+    def __init__(self, names):
+        vocab = {}
+        self.rows = []
+        for name in names:
+            grams = {}
+            for gram in char_ngrams(name):
+                col = vocab.setdefault(gram, len(vocab))
+                grams[col] = grams.get(col, 0) + 1
+            self.rows.append((np.fromiter(grams, dtype=np.int64, count=len(grams)),
+                              np.fromiter(grams.values(), dtype=np.float32, count=len(grams))))
+
+        self.width = len(vocab)
+        doc_freq = np.zeros(self.width, dtype=np.float32)
+        for cols, _ in self.rows:
+            doc_freq[cols] += 1
+        self.idf = np.log((1 + len(names)) / (1 + doc_freq)) + 1
+
+    def dense(self, indices):
+        """Verilen satırların L2 normlu yoğun matrisi (len(indices), kelime sayısı)."""
+        X = np.zeros((len(indices), self.width), dtype=np.float32)
+        for out, i in enumerate(indices):
+            cols, counts = self.rows[i]
+            X[out, cols] = counts * self.idf[cols]
+        X /= np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-9)
+        return X
+
+
+def _best_matches(block, src, tgt, sizes):
+    """src satırlarının her biri için tgt içindeki en benzer satır ve skoru."""
+    B = block.dense(tgt)
+    best_idx, best_score = [], []
+    for start in range(0, len(src), CHUNK_ROWS):
+        chunk = src[start:start + CHUNK_ROWS]
+        sim = block.dense(chunk) @ B.T
+        # Miktarı çok farklı adaylar elenir (miktarı olmayan blokta sizes NaN, karşılaştırma False döner)
+        a, b = sizes[chunk][:, None], sizes[tgt][None, :]
+        sim[np.maximum(a, b) > SIZE_TOLERANCE * np.minimum(a, b)] = -1
+        best = sim.argmax(axis=1)
+        best_idx.append(tgt[best])
+        best_score.append(sim[np.arange(len(chunk)), best])
+    return np.concatenate(best_idx), np.concatenate(best_score)
+
+
+def match_products(products, min_score=MATCH_MIN_SCORE):
+    """
+    products: (product_id, name, market_id, category_id) DataFrame'i.
+    Her ürün için diğer her marketteki en benzer ürünü bulur. Adaylar aynı kategori ve aynı
+    miktar boyutundaki (kg / l / adet) ürünlerle sınırlıdır; skor karakter 3-gram TF-IDF kosinüs benzerliğidir.
+    Dönüş: (product_id, rival_market_id, rival_product_id, score) DataFrame'i.
+    """
+    products = products.reset_index(drop=True)
+    normalized = products["name"].map(normalize_name)
+    sizes = normalized.map(extract_size)
+    products["size"] = [s[0] for s in sizes]
+    products["dimension"] = [s[1] for s in sizes]
+
+    results = []
+    for _, group in products.groupby(["category_id", "dimension"], sort=False):
+        markets = group["market_id"].unique()
+        if len(markets) < 2:
+            continue
+        block = TfidfBlock(normalized[group.index].tolist())
+        positions = {m: np.flatnonzero(group["market_id"].to_numpy() == m) for m in markets}
+        ids = group["product_id"].to_numpy()
+        sizes_arr = group["size"].to_numpy(dtype=float)
+        for src_market in markets:
+            for tgt_market in markets:
+                if src_market == tgt_market:
+                    continue
+                src, tgt = positions[src_market], positions[tgt_market]
+                best, score = _best_matches(block, src, tgt, sizes_arr)
+                keep = score >= min_score
+                results.append(pd.DataFrame({
+                    "product_id": ids[src[keep]],
+                    "rival_market_id": tgt_market,
+                    "rival_product_id": ids[best[keep]],
+                    "score": score[keep].round(4),
+                }))
+
+    if not results:
+        return pd.DataFrame(columns=["product_id", "rival_market_id", "rival_product_id", "score"])
+    return pd.concat(results, ignore_index=True)
+
+
+def save_matches(conn, matches):
+    """Eşleştirme indeksini tamamen yeniler (tek transaction; okuyanlar yarım tablo görmez)."""
+    cur = conn.cursor()
+    cur.execute("DELETE FROM product_matches")
+    execute_values(cur, '''
+                   INSERT INTO product_matches (product_id, rival_market_id, rival_product_id, score)
+                   VALUES %s
+                   ''', [(int(r.product_id), int(r.rival_market_id), int(r.rival_product_id), float(r.score))
+                         for r in matches.itertuples(index=False)], page_size=5000)
+    conn.commit()
+    cur.close()
+
+
+def run_matching(min_score=MATCH_MIN_SCORE, lookback_days=MATCH_LOOKBACK_DAYS):
+    """Güncel ürünleri eşleştirir ve product_matches tablosuna yazar. Günlük taramadan sonra çalışır."""
+    started = time.time()
+    products = read_df(PRODUCTS_QUERY, (lookback_days,))
+    print(f"🔗 {len(products)} ürün için marketler arası eşleştirme başlıyor...")
+
+    matches = match_products(products, min_score)
+    with connection() as conn:
+        save_matches(conn, matches)
+
+    elapsed = time.time() - started
+    print(f"✅ {len(matches)} eşleşme kaydedildi. Süre: {elapsed:.1f} sn")
+    return len(matches)
+
+
+if __name__ == "__main__":
+    run_matching(min_score=float(sys.argv[1]) if len(sys.argv) > 1 else MATCH_MIN_SCORE)
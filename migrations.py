@@ -0,0 +1,441 @@
+import datetime
+
+from rollups import ROLLUP_SELECT
+
+# Şema sürümleri sırayla uygulanır; uygulananlar schema_migrations tablosunda tutulur.
+# Yeni bir değişiklik için listeye bir sonraki numarayla fonksiyon eklemek yeterli.
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return register
+
+
+def month_start(value):
+    """'2024-05-17' / date -> date(2024, 5, 1)"""
+    if isinstance(value, str):
+        value = datetime.date.fromisoformat(value[:10])
+    return value.replace(day=1)
+
+
+def ensure_partitions(cur, dates):
+    """Verilen tarihlerin düştüğü aylar için price_facts bölümlerini (partition) oluşturur."""
+    for start in sorted({month_start(d) for d in dates}):
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+        cur.execute(f'''
+                    CREATE TABLE IF NOT EXISTS price_facts_{start:%Y_%m}
+                        PARTITION OF price_facts FOR VALUES FROM ('{start}') TO ('{end}')
+                    ''')
+
+
+@migration(1, "Düz prices tablosu, scrape_progress ve upsert anahtarı")
+def _initial_schema(cur):
+    # PostgreSQL'de AUTOINCREMENT yerine SERIAL kullanılır
+    cur.execute('''
+                CREATE TABLE IF NOT EXISTS prices
+                (
+                    id SERIAL PRIMARY KEY,
+                    date DATE,
+                    market VARCHAR(50),
+                    category VARCHAR(100),
+                    product_name TEXT,
+                    price NUMERIC(10, 2),
+                    unit_price NUMERIC(10, 2),
+                    unit VARCHAR(20)
+                )
+                ''')
+
+    # Akış halinde kayıtta biten kategoriler (yeniden çalıştırmada kaldığı yerden devam için)
+    cur.execute('''
+                CREATE TABLE IF NOT EXISTS scrape_progress
+                (
+                    date DATE,
+                    market VARCHAR(50),
+                    category VARCHAR(100),
+                    rows INTEGER,
+                    committed_at TIMESTAMP DEFAULT now(),
+                    PRIMARY KEY (date, market, category)
+                )
+                ''')
+
+    # Upsert anahtarı: aynı gün aynı markette bir ürün tek satır. Eski kopyalar (en eski kayıt kalır) temizlenir.
+    cur.execute("SELECT to_regclass('prices_day_market_product_key')")
+    if cur.fetchone()[0] is None:
+        cur.execute('''
+                    DELETE FROM prices a USING prices b
+                    WHERE a.id > b.id
+                      AND a.date = b.date AND a.market = b.market AND a.product_name = b.product_name
+                    ''')
+        cur.execute('''
+                    CREATE UNIQUE INDEX prices_day_market_product_key
+                        ON prices (date, market, product_name)
+                    ''')
+
+
+@migration(2, "Market/kategori/ürün boyut tabloları ve aylık bölümlenmiş price_facts")
+def _normalized_schema(cur):
+    cur.execute("ALTER TABLE prices RENAME TO prices_legacy")
+
+    cur.execute('''
+                CREATE TABLE markets
+                (
+                    id SMALLSERIAL PRIMARY KEY,
+                    name VARCHAR(50) NOT NULL UNIQUE
+                );
+                CREATE TABLE categories
+                (
+                    id SMALLSERIAL PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL UNIQUE
+                );
+                CREATE TABLE products
+                (
+                    id SERIAL PRIMARY KEY,
+                    market_id SMALLINT NOT NULL REFERENCES markets (id),
+                    name TEXT NOT NULL,
+                    UNIQUE (market_id, name)
+                );
+                -- Ürün adıyla arama (tahmin modülü) için
+                CREATE INDEX products_name_idx ON products (name);
+
+                -- Birincil anahtar aynı zamanda (product_id, date) bileşik indeksidir
+                CREATE TABLE price_facts
+                (
+                    date DATE NOT NULL,
+                    product_id INTEGER NOT NULL REFERENCES products (id),
+                    market_id SMALLINT NOT NULL REFERENCES markets (id),
+                    category_id SMALLINT NOT NULL REFERENCES categories (id),
+                    price NUMERIC(10, 2),
+                    unit_price NUMERIC(10, 2),
+                    unit VARCHAR(20),
+                    PRIMARY KEY (product_id, date)
+                ) PARTITION BY RANGE (date);
+                CREATE INDEX price_facts_cat_market_date_idx ON price_facts (category_id, market_id, date);
+
+                -- Bölümü henüz açılmamış bir tarih gelirse kayıt kaybolmasın
+                CREATE TABLE price_facts_default PARTITION OF price_facts DEFAULT;
+                ''')
+
+    # Eski verileri taşı
+    cur.execute("SELECT DISTINCT date FROM prices_legacy WHERE date IS NOT NULL")
+    ensure_partitions(cur, [row[0] for row in cur.fetchall()])
+    cur.execute('''
+                INSERT INTO markets (name)
+                SELECT DISTINCT market FROM prices_legacy WHERE market IS NOT NULL;
+
+                INSERT INTO categories (name)
+                SELECT DISTINCT category FROM prices_legacy WHERE category IS NOT NULL;
+
+                INSERT INTO products (market_id, name)
+                SELECT DISTINCT m.id, l.product_name
+                FROM prices_legacy l JOIN markets m ON m.name = l.market
+                WHERE l.product_name IS NOT NULL;
+
+                INSERT INTO price_facts (date, product_id, market_id, category_id, price, unit_price, unit)
+                SELECT l.date, p.id, m.id, c.id, l.price, l.unit_price, l.unit
+                FROM prices_legacy l
+                         JOIN markets m ON m.name = l.market
+                         JOIN categories c ON c.name = l.category
+                         JOIN products p ON p.market_id = m.id AND p.name = l.product_name
+                WHERE l.date IS NOT NULL
+                ON CONFLICT DO NOTHING;
+                ''')
+    print(f"   📦 {cur.rowcount} satır normalize şemaya taşındı (eski tablo: prices_legacy).")
+
+    # Okuyan taraf (dashboard, tahmin) için eski kolon düzenini koruyan görünüm
+    cur.execute('''
+                CREATE VIEW prices AS
+                SELECT f.date,
+                       m.name AS market,
+                       c.name AS category,
+                       p.name AS product_name,
+                       f.price,
+                       f.unit_price,
+                       f.unit,
+                       f.product_id
+                FROM price_facts f
+                         JOIN products p ON p.id = f.product_id
+                         JOIN markets m ON m.id = f.market_id
+                         JOIN categories c ON c.id = f.category_id
+                ''')
+
+
+@migration(3, "Gün/market/kategori bazında önceden hesaplanmış birim fiyat özetleri")
+def _daily_rollups(cur):
+    cur.execute('''
+                CREATE TABLE daily_rollups
+                (
+                    date DATE NOT NULL,
+                    market_id SMALLINT NOT NULL REFERENCES markets (id),
+                    category_id SMALLINT NOT NULL REFERENCES categories (id),
+                    n INTEGER NOT NULL,
+                    mean NUMERIC(12, 4),
+                    min NUMERIC(10, 2),
+                    max NUMERIC(10, 2),
+                    median NUMERIC(12, 4),
+                    min_product_id INTEGER REFERENCES products (id),
+                    PRIMARY KEY (date, market_id, category_id)
+                )
+                ''')
+    # Geçmişi bir kere doldur
+    cur.execute(f"INSERT INTO daily_rollups {ROLLUP_SELECT.format(where='TRUE')}")
+
+
+@migration(4, "Gece toplu tahmin sonuçları")
+def _forecasts(cur):
+    cur.execute('''
+                CREATE TABLE forecasts
+                (
+                    product_id INTEGER NOT NULL REFERENCES products (id),
+                    ds DATE NOT NULL,
+                    yhat NUMERIC(10, 2),
+                    yhat_lower NUMERIC(10, 2),
+                    yhat_upper NUMERIC(10, 2),
+                    history_end DATE NOT NULL,
+                    fitted_at TIMESTAMP DEFAULT now(),
+                    PRIMARY KEY (product_id, ds)
+                )
+                ''')
+
+
+@migration(5, "Marketler arası ürün eşleştirme indeksi")
+def _product_matches(cur):
+    # Her ürün için diğer her marketteki en benzer ürün (matching.py gece doldurur)
+    cur.execute('''
+                CREATE TABLE product_matches
+                (
+                    product_id INTEGER NOT NULL REFERENCES products (id),
+                    rival_market_id SMALLINT NOT NULL REFERENCES markets (id),
+                    rival_product_id INTEGER NOT NULL REFERENCES products (id),
+                    score REAL NOT NULL,
+                    matched_at TIMESTAMP DEFAULT now(),
+                    PRIMARY KEY (product_id, rival_market_id)
+                )
+                ''')
+
+
+@migration(6, "Temizlemede elenen satırlar")
+def _rejected_rows(cur):
+    # Normalizasyon aşamasında (cleaning.py) elenen ham satırlar ve sebepleri; neyin neden düştüğü görünsün
+    cur.execute('''
+                CREATE TABLE rejected_rows
+                (
+                    id BIGSERIAL PRIMARY KEY,
+                    date DATE NOT NULL,
+                    market VARCHAR(50),
+                    category VARCHAR(100),
+                    product_name TEXT,
+                    price_text TEXT,
+                    reason VARCHAR(30) NOT NULL,
+                    rejected_at TIMESTAMP DEFAULT now()
+                )
+                ''')
+    cur.execute("CREATE INDEX rejected_rows_date_idx ON rejected_rows (date, market, category)")
+
+
+@migration(7, "Değişmeyen kategoriler için parmak izi ve taşıma işaretleri")
+def _category_fingerprints(cur):
+    # carried_from doluysa kategori o gün taranmadı, satırları carried_from günününkilerdir (bkz. change_detection.py)
+    cur.execute('''
+                CREATE TABLE category_fingerprints
+                (
+                    date DATE NOT NULL,
+                    market VARCHAR(50) NOT NULL,
+                    category VARCHAR(100) NOT NULL,
+                    fingerprint CHAR(40) NOT NULL,
+                    carried_from DATE,
+                    recorded_at TIMESTAMP DEFAULT now(),
+                    PRIMARY KEY (date, market, category)
+                )
+                ''')
+    # Taşınan günler görünümde kaynak günün satırlarıyla doldurulur; price_facts'e kopya yazılmaz
+    cur.execute('''
+                CREATE OR REPLACE VIEW prices AS
+                SELECT f.date,
+                       m.name AS market,
+                       c.name AS category,
+                       p.name AS product_name,
+                       f.price,
+                       f.unit_price,
+                       f.unit,
+                       f.product_id
+                FROM price_facts f
+                         JOIN products p ON p.id = f.product_id
+                         JOIN markets m ON m.id = f.market_id
+                         JOIN categories c ON c.id = f.category_id
+                UNION ALL
+                SELECT cf.date,
+                       m.name,
+                       c.name,
+                       p.name,
+                       f.price,
+                       f.unit_price,
+                       f.unit,
+                       f.product_id
+                FROM category_fingerprints cf
+                         JOIN markets m ON m.name = cf.market
+                         JOIN categories c ON c.name = cf.category
+                         JOIN price_facts f
+                              ON f.date = cf.carried_from AND f.market_id = m.id AND f.category_id = c.id
+                         JOIN products p ON p.id = f.product_id
+                WHERE cf.carried_from IS NOT NULL
+                ''')
+
+
+@migration(8, "Yarım kalan kategoriler için eksik işareti")
+def _scrape_progress_incomplete(cur):
+    # Doluysa kategori bitmeden bırakıldı (sebep); satırları kayıtlı ama gün tekrar çalıştırılınca baştan taranır
+    cur.execute("ALTER TABLE scrape_progress ADD COLUMN incomplete TEXT")
+
+
+@migration(9, "Çalıştırma raporları (aşama süreleri, sayaçlar, olay kaydı)")
+def _scrape_runs(cur):
+    # Her main.py çalıştırması bir satır; ayrıntılar JSONB (bkz. telemetry.py)
+    cur.execute('''
+                CREATE TABLE scrape_runs
+                (
+                    id SERIAL PRIMARY KEY,
+                    date DATE NOT NULL,
+                    started_at TIMESTAMP NOT NULL,
+                    finished_at TIMESTAMP NOT NULL,
+                    duration REAL,
+                    engine VARCHAR(20),
+                    status VARCHAR(20),
+                    rows_written INTEGER,
+                    rows_rejected INTEGER,
+                    rows_duplicate INTEGER,
+                    pages INTEGER,
+                    cards INTEGER,
+                    categories_done INTEGER,
+                    categories_incomplete INTEGER,
+                    categories_carried INTEGER,
+                    stages JSONB,
+                    markets JSONB,
+                    counters JSONB,
+                    log JSONB
+                )
+                ''')
+    cur.execute("CREATE INDEX scrape_runs_started_at_idx ON scrape_runs (started_at)")
+
+
+@migration(10, "Sepet bazlı fiyat endeksi (zincirleme / sabit baz)")
+def _price_index(cur):
+    # market / category 'Tümü' satırları üst endekslerdir (bkz. inflation_index.py).
+    # Tablo boşsa ilk update_index çağrısı tüm geçmişi hesaplar.
+    cur.execute('''
+                CREATE TABLE price_index
+                (
+                    method VARCHAR(10) NOT NULL,
+                    market VARCHAR(50) NOT NULL,
+                    category VARCHAR(100) NOT NULL,
+                    date DATE NOT NULL,
+                    level DOUBLE PRECISION NOT NULL,
+                    link DOUBLE PRECISION,
+                    n INTEGER,
+                    PRIMARY KEY (method, market, category, date)
+                )
+                ''')
+    cur.execute("CREATE INDEX price_index_date_idx ON price_index (method, date)")
+
+
+@migration(11, "Şüpheli fiyatlar için karantina (price_anomalies)")
+def _price_anomalies(cur):
+    # product_id doluysa satır karantinadadır; NULL ise kategori düzeyinde işarettir (bkz. anomalies.py)
+    cur.execute('''
+                CREATE TABLE price_anomalies
+                (
+                    id SERIAL PRIMARY KEY,
+                    date DATE NOT NULL,
+                    market_id SMALLINT NOT NULL REFERENCES markets (id),
+                    category_id SMALLINT NOT NULL REFERENCES categories (id),
+                    product_id INTEGER REFERENCES products (id),
+                    kind VARCHAR(20) NOT NULL,
+                    value DOUBLE PRECISION,
+                    baseline DOUBLE PRECISION,
+                    score DOUBLE PRECISION,
+                    detected_at TIMESTAMP DEFAULT now()
+                );
+                CREATE UNIQUE INDEX price_anomalies_product_date_idx
+                    ON price_anomalies (product_id, date) WHERE product_id IS NOT NULL;
+                CREATE INDEX price_anomalies_date_idx ON price_anomalies (date);
+                ''')
+    # Okuyan taraf (dashboard, endeks, tek ürün tahmini) karantinadaki satırları görmez
+    cur.execute('''
+                CREATE OR REPLACE VIEW prices AS
+                SELECT f.date,
+                       m.name AS market,
+                       c.name AS category,
+                       p.name AS product_name,
+                       f.price,
+                       f.unit_price,
+                       f.unit,
+                       f.product_id
+                FROM price_facts f
+                         JOIN products p ON p.id = f.product_id
+                         JOIN markets m ON m.id = f.market_id
+                         JOIN categories c ON c.id = f.category_id
+                WHERE NOT EXISTS (SELECT 1 FROM price_anomalies a WHERE a.product_id = f.product_id AND a.date = f.date)
+                UNION ALL
+                SELECT cf.date,
+                       m.name,
+                       c.name,
+                       p.name,
+                       f.price,
+                       f.unit_price,
+                       f.unit,
+                       f.product_id
+                FROM category_fingerprints cf
+                         JOIN markets m ON m.name = cf.market
+                         JOIN categories c ON c.name = cf.category
+                         JOIN price_facts f
+                              ON f.date = cf.carried_from AND f.market_id = m.id AND f.category_id = c.id
+                         JOIN products p ON p.id = f.product_id
+                WHERE cf.carried_from IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM price_anomalies a WHERE a.product_id = f.product_id AND a.date = f.date)
+                ''')
+
+
+@migration(12, "Veri sekmesinin tarih sıralı sayfalaması için indeks")
+def _price_facts_date_idx(cur):
+    # Dashboard'un Veri sekmesi (date, product_id) sırasıyla sayfalar (bkz. dashboard_data.load_page)
+    cur.execute("CREATE INDEX price_facts_date_product_idx ON price_facts (date, product_id)")
+
+
+@migration(13, "Dashboard anlık görüntüsü için özetlerin yenilenme zamanı")
+def _rollups_refreshed_at(cur):
+    # refresh_rollups günü silip yeniden yazar; bu zaman damgası günün verisinin değiştiğini gösterir
+    # (tekrar işleme, karantina). Dashboard sadece damgası değişen günleri yeniden okur (bkz. dashboard_data.py)
+    cur.execute("ALTER TABLE daily_rollups ADD COLUMN refreshed_at TIMESTAMP NOT NULL DEFAULT now()")
+
+
+def migrate(conn):
+    """Uygulanmamış şema değişikliklerini sırayla, her biri kendi transaction'ında uygular."""
+    cur = conn.cursor()
+    cur.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations
+                (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMP DEFAULT now()
+                )
+                ''')
+    conn.commit()
+
+    cur.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cur.fetchall()}
+
+    for version, description, func in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        print(f"   🔧 Şema güncellemesi {version}: {description}")
+        try:
+            func(cur)
+            cur.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                        (version, description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    cur.close()
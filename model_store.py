@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+MODEL_DIR = os.getenv("MODEL_CACHE_DIR", os.path.join(".cache", "models"))
+# Klasör bu boyutu aşınca en uzun süredir kullanılmayan modeller silinir (LRU)
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "500"))
+# Budama sınırın bu oranına kadar iner; dolu önbellekte her yeni kayıt yeniden tarama tetiklemesin
+EVICT_TARGET = 0.9
+
+
+def params_hash(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class ModelStore:
+    """
+    Ürün başına eğitilmiş modeli ve son tahmini diskte saklar.
+    Kayıt; verinin son tarihi, satır sayısı ve model parametreleriyle anahtarlanır:
+      - hepsi aynıysa (isabet) kayıtlı tahmin doğrudan döner, model hiç eğitilmez,
+      - sadece veri yenilendiyse eski modelin parametreleri yeni eğitime başlangıç (warm start) olur.
+    """
+
+    def __init__(self, directory=MODEL_DIR, max_bytes=MODEL_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Klasörün bu süreçteki tahmini toplam boyutu: ilk kayıtta bir kez taranır, sonra her kayıtta güncellenir.
+        # Her put'ta klasörü baştan taramak N ürünlük toplu tahminde O(N²) dosya sistemi çağrısı demekti.
+        # Diğer süreçlerin yazdıkları görülmez; toplu iş sonunda evict() gerçek boyutla bir kez budar.
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        digest = hashlib.sha1(str(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, key):
+        """Ürünün kaydını döndürür (yoksa None) ve LRU için erişim zamanını günceller."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        old_size = _file_size(path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is not None:
+                self._size += _file_size(path) - old_size
+            over = self._size is None or self._size > self.max_bytes
+        # Sınır aşılmadıkça klasör taranmaz
+        if over:
+            self.evict()
+
+    def _entries(self):
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        except OSError:
+            return []
+        stats = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime, st.st_size, path))
+            except OSError:
+                continue  # Başka bir süreç silmiş olabilir
+        return stats
+
+    def evict(self):
+        """Toplam boyut sınırı aştıysa, sınırın EVICT_TARGET oranına inene kadar en eski erişilen kayıtları siler."""
+        with self._lock:
+            stats = self._entries()
+            total = sum(size for _, size, _ in stats)
+            target = self.max_bytes * EVICT_TARGET if total > self.max_bytes else self.max_bytes
+            for _, size, path in sorted(stats):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+            self._size = total
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def history_signature(df, params):
+    """Kaydın geçerli olup olmadığını belirleyen özet: son tarih, satır sayısı, parametreler."""
+    return {
+        "last_date": str(pd.Timestamp(df["ds"].max()).date()),
+        "rows": int(len(df)),
+        "params": params_hash(params),
+    }
+
+
+def forecast_to_records(forecast):
+    out = forecast.copy()
+    out["ds"] = out["ds"].dt.strftime("%Y-%m-%d")
+    return out.to_dict(orient="list")
+
+
+def trim_forecast(forecast, last_date, days):
+    """Tahmini son veri tarihinden itibaren 'days' günle sınırlar."""
+    return forecast[forecast["ds"] <= pd.Timestamp(last_date) + pd.Timedelta(days=days)].reset_index(drop=True)
+
+
+def forecast_from_records(records, last_date, days):
+    """Kayıtlı tahmini DataFrame'e çevirir ve son tarihten itibaren 'days' günle sınırlar."""
+    df = pd.DataFrame(records)
+    df["ds"] = pd.to_datetime(df["ds"])
+    return trim_forecast(df, last_date, days)
@@ -0,0 +1,107 @@
+import glob
+import os
+import re
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cleaning import RAW_COLUMNS
+
+# Ham kart verisinin (ad + fiyat metni) günlük arşivi. Boş bırakılırsa arşiv yazılmaz.
+# Yapı: <klasör>/<tarih>/<market>__<kategori>.parquet ; her dosya o gün o kategoriden okunan kartlar, sırasıyla.
+# Ayrıştırma kuralları (unit_parser, cleaning) değişince geçmiş günler buradan yeniden hesaplanır (bkz. replay.py);
+# aynı dosyalar scraper'lar için tarayıcısız örnek veri olarak da okunabilir (read_snapshot).
+RAW_ARCHIVE_DIR = os.getenv("RAW_ARCHIVE_DIR", "raw_snapshots")
+
+SCHEMA = pa.schema([
+    ("date", pa.string()),
+    ("market", pa.string()),
+    ("category", pa.string()),
+    ("product_name", pa.string()),
+    ("price_text", pa.string()),
+    ("position", pa.int32()),  # Kategori içindeki okunma sırası (aynı ürün iki kez gelirse ilki kalır)
+])
+
+_SLUG = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text).translate(_SLUG)).strip("_").lower()
+
+
+def snapshot_path(base_dir, date, market, category):
+    return os.path.join(base_dir, str(date)[:10], f"{_slug(market)}__{_slug(category)}.parquet")
+
+
+class SnapshotWriter:
+    """
+    Bir (tarih, market, kategori) grubunun ham satırlarını geldikçe zstd sıkıştırmalı Parquet'e ekler; bellekte
+    en fazla buffer_rows satır tutulur. close() dosyayı yerine koyar (okuyanlar yarım dosya görmez), abort() siler.
+    Aynı gün aynı kategori tekrar taranırsa dosya yenisiyle değiştirilir; önceki günlerin dosyalarına dokunulmaz.
+    """
+
+    def __init__(self, base_dir, date, market, category, buffer_rows=1000):
+        self.path = snapshot_path(base_dir, date, market, category)
+        self.buffer_rows = buffer_rows
+        self._tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        self._writer = None
+        self._buffer = []
+        self._position = 0
+
+    def append(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.buffer_rows:
+            self._write_buffer()
+
+    def close(self):
+        self._write_buffer()
+        if self._writer is None:
+            return None
+        self._writer.close()
+        self._writer = None
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._buffer = []
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _write_buffer(self):
+        if not self._buffer:
+            return
+        columns = list(zip(*self._buffer))
+        table = pa.table({
+            "date": [str(d)[:10] for d in columns[0]],
+            "market": columns[1],
+            "category": columns[2],
+            "product_name": columns[3],
+            "price_text": columns[4],
+            "position": range(self._position, self._position + len(self._buffer)),
+        }, schema=SCHEMA)
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._writer = pq.ParquetWriter(self._tmp_path, SCHEMA, compression="zstd")
+        self._writer.write_table(table)
+        self._position += len(self._buffer)
+        self._buffer = []
+
+
+def read_snapshot(path):
+    """Dosyadaki ham satırları scraper'ların ürettiği (date, market, category, product_name, price_text) biçiminde."""
+    table = pq.read_table(path, columns=list(RAW_COLUMNS) + ["position"]).sort_by("position")
+    return list(zip(*(table.column(c).to_pylist() for c in RAW_COLUMNS)))
+
+
+def list_snapshots(base_dir=RAW_ARCHIVE_DIR, start=None, end=None):
+    """{tarih: [dosya, ...]}; start / end ('YYYY-MM-DD', dahil) verilirse o aralıktaki günler."""
+    days = {}
+    for path in sorted(glob.glob(os.path.join(base_dir, "*", "*.parquet"))):
+        date = os.path.basename(os.path.dirname(path))
+        if (start and date < start) or (end and date > end):
+            continue
+        days.setdefault(date, []).append(path)
+    return days
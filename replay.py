@@ -0,0 +1,84 @@
+import sys
+import time
+
+from anomalies import check_day
+from db import connection
+from inflation_index import update_index
+from ingest import load_raw
+from raw_archive import RAW_ARCHIVE_DIR, list_snapshots, read_snapshot
+from rollups import refresh_rollups
+
+# Yeniden yüklenen günün (market, kategori) çiftlerine ait eski satırlar silinir; kurallar değiştiyse
+# artık elenen ürünlerin eski fiyatı kalmasın
+DELETE_FACTS = '''
+               DELETE FROM price_facts f USING markets m, categories c
+               WHERE f.date = %s
+                 AND m.id = f.market_id
+                 AND c.id = f.category_id
+                 AND (m.name, c.name) IN (SELECT * FROM unnest(%s::text[], %s::text[]))
+               '''
+DELETE_REJECTED = '''
+                  DELETE FROM rejected_rows
+                  WHERE date = %s
+                    AND (market, category) IN (SELECT * FROM unnest(%s::text[], %s::text[]))
+                  '''
+
+
+def replay(base_dir=RAW_ARCHIVE_DIR, start=None, end=None):
+    """
+    Arşivdeki günleri tarayıcı açmadan yeniden yükler: her gün için ham satırlar güncel temizleme ve
+    birim fiyat kurallarından geçirilir, arşivde bulunan (market, kategori) çiftlerinin price_facts ve
+    rejected_rows satırları yenileriyle değiştirilir, günün özetleri yeniden hesaplanır.
+    Veritabanında hiç olmayan günler için aynı komut geçmişi doldurur (backfill).
+    """
+    days = list_snapshots(base_dir, start, end)
+    if not days:
+        print(f"⚠️ '{base_dir}' altında yüklenecek arşiv bulunamadı.")
+        return 0
+
+    print(f"⏪ {len(days)} günlük ham arşiv yeniden yükleniyor...")
+    started = time.time()
+    total = 0
+    with connection() as conn:
+        for date, paths in sorted(days.items()):
+            records = [record for path in paths for record in read_snapshot(path)]
+            pairs = sorted({(r[1], r[2]) for r in records})
+            markets, categories = [p[0] for p in pairs], [p[1] for p in pairs]
+
+            try:
+                cur = conn.cursor()
+                cur.execute(DELETE_FACTS, (date, markets, categories))
+                cur.execute(DELETE_REJECTED, (date, markets, categories))
+                cur.close()
+                loaded, rejected = load_raw(conn, records)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ {date} yüklenemedi: {e}")
+                continue
+
+            try:
+                quarantined, _ = check_day(conn, date)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ {date} doğrulanamadı: {e}")
+                quarantined = 0
+            refresh_rollups(conn, [date])
+            total += len(records)
+            print(f"   📅 {date}: {loaded} satır yüklendi, {len(rejected)} satır elendi, {quarantined} satır karantinada "
+                  f"({len(paths)} dosya)")
+
+    if total:
+        # Zincirleme endeks en erken yeniden yüklenen günden itibaren bir kez yeniden hesaplanır
+        update_index(list(days))
+
+    elapsed = time.time() - started
+    print(f"✅ {total} ham satır {elapsed:.1f} sn içinde yeniden işlendi ({total / max(elapsed, 1e-9):.0f} satır/sn).")
+    return total
+
+
+if __name__ == "__main__":
+    # Kullanım: python replay.py [başlangıç_tarihi] [bitiş_tarihi]
+    replay(start=sys.argv[1] if len(sys.argv) > 1 else None,
+           end=sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,65 @@
+from anomalies import NOT_QUARANTINED
+
+# Ham satırlardan gün/market/kategori özeti. {where} price_facts üzerinde filtre.
+ROLLUP_SELECT = '''
+                SELECT date,
+                       market_id,
+                       category_id,
+                       count(*),
+                       avg(unit_price),
+                       min(unit_price),
+                       max(unit_price),
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY unit_price),
+                       (array_agg(product_id ORDER BY unit_price, product_id))[1]
+                FROM price_facts
+                WHERE unit_price IS NOT NULL AND {where}
+                GROUP BY date, market_id, category_id
+                '''
+
+# Taranmayıp önceki günden taşınan kategorilerin özeti kaynak günün özetidir
+CARRIED_ROLLUPS = '''
+                  INSERT INTO daily_rollups
+                  SELECT cf.date, r.market_id, r.category_id, r.n, r.mean, r.min, r.max, r.median, r.min_product_id
+                  FROM category_fingerprints cf
+                           JOIN markets m ON m.name = cf.market
+                           JOIN categories c ON c.name = cf.category
+                           JOIN daily_rollups r
+                                ON r.date = cf.carried_from AND r.market_id = m.id AND r.category_id = c.id
+                  WHERE cf.carried_from IS NOT NULL
+                    AND cf.date = ANY (%s::date[])
+                  ON CONFLICT (date, market_id, category_id) DO NOTHING
+                  '''
+
+
+def refresh_rollups(conn, dates):
+    """
+    Verilen günlerin özetlerini ham satırlardan yeniden hesaplar (silip yeniden yazar).
+    Her yüklemeden sonra sadece o günler için çalıştırılır; maliyeti günlük satır sayısı kadardır.
+    """
+    dates = sorted({str(d)[:10] for d in dates})
+    if not dates:
+        return 0
+
+    cur = conn.cursor()
+    cur.execute("DELETE FROM daily_rollups WHERE date = ANY(%s::date[])", (dates,))
+    # Karantinadaki şüpheli fiyatlar (anomalies.py) özete girmez
+    where = f"date = ANY(%s::date[]) AND {NOT_QUARANTINED}"
+    cur.execute(f"INSERT INTO daily_rollups {ROLLUP_SELECT.format(where=where)}", (dates,))
+    count = cur.rowcount
+    cur.execute(CARRIED_ROLLUPS, (dates,))
+    count += cur.rowcount
+    conn.commit()
+    cur.close()
+    return count
+
+
+def combine_rollups(df, by):
+    """
+    Özet satırlarını (n, mean, min, max) daha kaba bir gruba toplar; ortalama n ile ağırlıklandırılır,
+    böylece sonuç ham satırlar üzerinden hesaplanan ortalamayla aynıdır.
+    """
+    df = df.assign(total=df["mean"] * df["n"])
+    out = df.groupby(by, observed=True).agg(n=("n", "sum"), total=("total", "sum"),
+                                            min=("min", "min"), max=("max", "max")).reset_index()
+    out["mean"] = out["total"] / out["n"]
+    return out.drop(columns="total")
@@ -6,5 +6,11 @@ cd /d "C:\Users\emrec\PycharmProjects\InflationMonitor"
 :: Eğer venv klasörün projenin içindeyse yol şöyledir:
 ".venv\Scripts\python.exe" main.py
 
+:: 3. Marketler arası ürün eşleştirme indeksini yenile (Akıllı Karşılaştırma sekmesi buradan okur)
+".venv\Scripts\python.exe" matching.py
+
+:: 4. Tarama bittikten sonra tüm ürünlerin fiyat tahminlerini toplu olarak yenile
+".venv\Scripts\python.exe" batch_forecast.py
+
 :: Hata varsa pencere kapanmasın, görelim (Opsiyonel)
 timeout /t 10
\ No newline at end of file
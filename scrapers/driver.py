@@ -0,0 +1,50 @@
+import os
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+# ChromeDriverManager().install() her çağrıda sürüm kontrolü yapar; havuzdaki
+# her işçi için tekrar indirmemek adına yolu bir kere çözüp saklıyoruz.
+_DRIVER_PATH = None
+_DRIVER_PATH_LOCK = threading.Lock()
+
+# Takılan bir sayfa işçiyi en fazla bu kadar bekletir; sonra fetch politikası sayfayı tekrar dener
+PAGE_LOAD_TIMEOUT = int(os.getenv("PAGE_LOAD_TIMEOUT", "20"))
+
+
+def create_driver(profile_dir=None):
+    """
+    Headless Chrome sürücüsü oluşturur.
+    profile_dir verilirse tarayıcı o klasörü kendi profili olarak kullanır
+    (paralel işçilerin çerez/önbellek paylaşmaması için).
+    """
+    global _DRIVER_PATH
+
+    options = webdriver.ChromeOptions()
+    # Headless Mod: Tarayıcıyı ekranda açmaz, arka planda çalışır (Daha hızlı ve profesyonel)
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-notifications")
+    options.add_argument("--disable-popup-blocking")
+
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={profile_dir}")
+
+    # Anti-Bot: Gerçek kullanıcı gibi görünmek için User-Agent
+    options.add_argument(
+        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+    # EAGER MODE: Sayfa yüklenmesini bekleme stratejisi
+    options.page_load_strategy = 'eager'
+
+    with _DRIVER_PATH_LOCK:
+        if _DRIVER_PATH is None:
+            _DRIVER_PATH = ChromeDriverManager().install()
+
+    driver = webdriver.Chrome(service=Service(_DRIVER_PATH), options=options)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    driver.set_script_timeout(30)  # execute_async_script tabanlı beklemeler için (bkz. scrapers/waits.py)
+    return driver
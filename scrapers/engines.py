@@ -0,0 +1,314 @@
+import math
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from scrapers.extract import extract_cards, round_trip_counter
+from scrapers.fetch_policy import CATEGORY_BUDGET, CategoryBudget, FetchError, policy_for
+from scrapers.http_engine import HTTP_TIMEOUT, parse_cards_html, get_with_policy
+from scrapers.waits import wait_for_settle, scroll
+from telemetry import TELEMETRY, EXTRACT, PAGE_LOAD, PARSE, WAIT
+
+# Market yapılandırmasıyla (bkz. scrapers/registry.py) çalışan genel tarama motorları.
+# Sayfalama biçimine göre: "page" (URL parametresiyle sayfa sayfa) ve "scroll" (sonsuz scroll).
+# Hepsi aynı sözleşmeye uyar: (sürücü/oturum, products_list, today_date, categories, detector) alır,
+# ham satırları products_list'e ekler; tarayıcı motorları yarım kalan kategorileri (kategori, sebep),
+# HTTP motorları Selenium'a devredilecek kategorileri döndürür.
+
+# Varsayılanlar (yapılandırmada verilmezse)
+CARD_TIMEOUT = 10  # sn; kartların gelmesi için
+SETTLE = {"baseline": 2, "cap": 4}
+# Sonsuz scroll stratejisi: "jump" doğrudan sayfa sonuna atlar, "step" 'step' px adımlarla iner.
+# Liste sanallaştırılmışsa (atlayınca kartlar DOM'dan düşüyorsa) otomatik olarak "step"e geçilir.
+# step_sleep eski sabit beklemedir (tasarruf hesabı için referans).
+SCROLL = {"strategy": "jump", "step": 500, "step_sleep": 1.5, "cap": 3}
+
+
+def _load_page(driver, market, url, require_cards):
+    """
+    Sayfayı açar ve kartlar gelip DOM oturana kadar bekler. Kart çıkmazsa require_cards ise hata fırlatır
+    (politika tekrar dener), değilse False döner (liste sonu).
+    """
+    label, selectors = market["label"], market["selectors"]
+    settle = {**SETTLE, **market.get("settle", {})}
+    with TELEMETRY.timer(PAGE_LOAD, label):
+        driver.get(url)
+    with TELEMETRY.timer(WAIT, label):
+        try:
+            # Kartların yüklenmesini bekle
+            WebDriverWait(driver, market.get("card_timeout", CARD_TIMEOUT)).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, selectors["card"])))
+        except TimeoutException:
+            if require_cards:
+                raise
+            return False
+        # Sayfanın oturması için: sabit bekleme yerine kart listesi durulana kadar (en fazla 'cap' sn)
+        wait_for_settle(driver, selectors["card"], baseline=settle["baseline"], cap=settle["cap"])
+    return True
+
+
+def page_url(url, param, page):
+    return f"{url}{'&' if '?' in url else '?'}{param}={page}"
+
+
+def scrape_paginated(driver, products_list, today_date, market, categories=None, detector=None):
+    """
+    Sayfa parametreli listeler (?sayfa=2 gibi). Sayfa istekleri marketin tarayıcı politikasından geçer
+    (bkz. scrapers/fetch_policy.py). Yarım kalan kategorileri (kategori, sebep) listesi olarak döndürür.
+    """
+    label = market["label"]
+    print(f"\n🟠 --- {label.upper()} TARANIYOR (Tam Liste & Çoklu Sayfa) ---")
+
+    counter = round_trip_counter(driver)
+    policy = policy_for(label, "browser")
+    incomplete = []
+
+    # categories verilirse (zamanlayıcıdan gelen tekil iş) sadece onlar taranır
+    for cat in (categories or market["categories"]):
+        budget = CategoryBudget(market.get("category_budget", CATEGORY_BUDGET))
+        try:
+            print(f"   🌍 Gidiliyor: {cat['name']}")
+            page = 1
+            page_size = None
+            counter.reset_page()
+
+            while True:
+                target_url = page_url(cat['url'], market.get("page_param", "page"), page)
+                print(f"      📄 Sayfa {page} taranıyor...")
+
+                # İlk sayfada kart gelmemesi yavaş sayfa demektir, politika tekrar dener. Sonraki boş sayfa liste
+                # sonudur; ürün sayısı sayfa boyunun tam katıysa son dolu sayfadan sonra da boş sayfa gelir.
+                # Önceki sayfa doluysa boş sayfa yavaş yüklenmiş de olabilir: bir kez daha açılıp doğrulanır
+                # (hata sayılmaz, devre kesiciye yansımaz).
+                loaded = policy.call(_load_page, driver, market, target_url, require_cards=page == 1, budget=budget)
+                if not loaded and page_size is not None:
+                    print(f"      🔄 Sayfa {page} boş, liste sonu mu diye tekrar bakılıyor...")
+                    loaded = policy.call(_load_page, driver, market, target_url, require_cards=False, budget=budget)
+                if not loaded:
+                    print(f"      🏁 {cat['name']} tamamlandı (Sayfa {page}'de ürün yok).")
+                    break
+
+                # Tüm kartlar tek bir JavaScript çağrısıyla okunuyor (kart başına find_element yok)
+                with TELEMETRY.timer(EXTRACT, label):
+                    cards = extract_cards(driver, market["selectors"])
+
+                if len(cards) == 0:
+                    print(f"      🏁 Ürün kalmadı, diğer kategoriye geçiliyor.")
+                    break
+
+                print(f"      📍 {len(cards)} ürün bulundu.")
+                TELEMETRY.count("pages", market=label)
+
+                # İlk sayfa önceki taramadakiyle aynıysa kategori taranmaz, önceki gün taşınır
+                if page == 1 and detector and detector.first_page(label, cat['name'], cards):
+                    break
+
+                # Ham metin eklenir; fiyat temizleme ve birim fiyat kayıttan önce toplu yapılır (cleaning.py)
+                for card in cards:
+                    products_list.append([today_date, label, cat['name'], card["name"], card["price_text"]])
+                TELEMETRY.count("cards", len(cards), market=label)
+
+                round_trips = counter.reset_page()
+                TELEMETRY.count("round_trips", round_trips, market=label)
+                print(f"      🔁 Sayfa {page}: {round_trips} WebDriver isteği")
+
+                if page == 1:
+                    page_size = len(cards)
+                elif len(cards) < page_size:
+                    page_size = None  # Yarım sayfa: sonraki boş sayfa beklenen liste sonu
+
+                page += 1
+
+        except FetchError as e:
+            print(f"   ⚠️ {cat['name']} eksik kaldı: {e}")
+            incomplete.append((cat, str(e)))
+        except Exception as e:
+            print(f"   ⚠️ Hata: {e}")
+            incomplete.append((cat, f"{type(e).__name__}: {e}"))
+
+    return incomplete
+
+
+AT_BOTTOM_JS = "return window.pageYOffset + window.innerHeight >= document.body.scrollHeight"
+
+
+def _load_category(driver, market, url):
+    """Kategori sayfasını açar ve ilk ürünlerin yüklenmesini bekler; ürün gelmezse hata (politika tekrar dener)."""
+    with TELEMETRY.timer(PAGE_LOAD, market["label"]):
+        driver.get(url)
+    with TELEMETRY.timer(WAIT, market["label"]):
+        WebDriverWait(driver, market.get("card_timeout", CARD_TIMEOUT)).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, market["selectors"]["card"]))
+        )
+
+
+def scrape_infinite_scroll(driver, products_list, today_date, market, categories=None, seen_names=None,
+                           detector=None):
+    """
+    Sonsuz scroll ile yüklenen listeler. Sayfa istekleri marketin tarayıcı politikasından geçer.
+    seen_names verilirse (dedupe_names) aynı ad bir kez eklenir; paralel taramada marketin tüm işleri aynı
+    kümeyi paylaşır, böylece farklı kategorilerde çıkan aynı ürün iki kez eklenmez.
+    Yarım kalan kategorileri (kategori, sebep) listesi olarak döndürür.
+    """
+    label, selectors = market["label"], market["selectors"]
+    settings = {**SCROLL, **market.get("scroll", {})}
+    print(f"\n🟠 --- {label.upper()} TARANIYOR (Tam Liste & Sonsuz Scroll) ---")
+
+    # Scroll sırasında aynı kart her turda tekrar okunur; bu çalıştırmada eklenenler
+    added_product_names = seen_names if seen_names is not None else set()
+    counter = round_trip_counter(driver)
+    policy = policy_for(label, "browser")
+    incomplete = []
+
+    for cat in (categories or market["categories"]):
+        budget = CategoryBudget(market.get("category_budget", CATEGORY_BUDGET))
+        try:
+            print(f"   🌍 Gidiliyor: {cat['name']}")
+            counter.reset_page()
+            # Ürünler geç yüklenirse sayfa tekrar açılır; denemeler biterse kategori eksik sayılır
+            policy.call(_load_category, driver, market, cat['url'], budget=budget)
+
+            strategy = settings["strategy"]
+            first_page = True
+            while True:
+                # Sonsuz scroll takılırsa kategori süre bütçesiyle sınırlı kalır
+                budget.check()
+
+                # 1. Şu an ekranda (ve DOM'da) olan kartları tek JavaScript çağrısıyla oku
+                with TELEMETRY.timer(EXTRACT, label):
+                    cards = extract_cards(driver, selectors)
+                TELEMETRY.count("pages", market=label)  # Sonsuz scroll'da her ekran bir sayfa sayılır
+
+                # İlk ekran önceki taramadakiyle aynıysa kategori taranmaz, önceki gün taşınır
+                if first_page and detector and detector.first_page(label, cat['name'], cards):
+                    break
+                first_page = False
+
+                for card in cards:
+                    name = card["name"]
+                    if name in added_product_names:
+                        continue
+
+                    # Ham metin; boş ad/fiyat ve fiyat temizleme kayıttan önce toplu ele alınır
+                    products_list.append([today_date, label, cat['name'], name, card["price_text"]])
+                    TELEMETRY.count("cards", market=label)
+                    added_product_names.add(name)
+                    print(f"      ✅ Eklendi ({len(added_product_names)}): {name} - {card['price_text']}")
+
+                # 2. Sayfa sonunu tek çağrıda kontrol et. Sonda görünmek liste bitti demek değildir: sonraki
+                # kartlar yavaş geliyor olabilir. En fazla 'cap' sn yeni kart beklenir; gelmediyse ve hâlâ
+                # sondaysak kategori biter.
+                if driver.execute_script(AT_BOTTOM_JS):
+                    with TELEMETRY.timer(WAIT, label):
+                        count = wait_for_settle(driver, selectors["card"], baseline=0, cap=settings["cap"],
+                                                min_count=len(cards) + 1)
+                    if count <= len(cards) and driver.execute_script(AT_BOTTOM_JS):
+                        round_trips = counter.reset_page()
+                        TELEMETRY.count("round_trips", round_trips, market=label)
+                        print(f"   🏁 {cat['name']} bitti. Toplam ürün: {len(added_product_names)} "
+                              f"(🔁 {round_trips} WebDriver isteği)")
+                        break
+                    continue
+
+                # Değilse kaydır ve yeni kartlar gelip DOM oturana kadar bekle (sabit sleep yok). Sona atlayınca
+                # yeni kartlar beklenir (en fazla 'cap' sn); adım adım inerken aradaki adımlar yeni kart getirmez.
+                scrolled = scroll(driver, strategy, settings["step"])
+                steps = max(1, math.ceil(scrolled / settings["step"]))  # Eski yöntemle kaç adım/sleep sürerdi
+                with TELEMETRY.timer(WAIT, label):
+                    count = wait_for_settle(driver, selectors["card"], baseline=steps * settings["step_sleep"],
+                                            cap=settings["cap"], min_count=len(cards) + 1 if strategy == "jump" else 0)
+
+                # Sanallaştırılmış liste: atlayınca kartlar DOM'dan düştü, aradakileri kaçırmamak için
+                # başa dönüp adım adım devam et
+                if strategy == "jump" and count < len(cards):
+                    print(f"      ↩️ {cat['name']}: liste sanallaştırılmış, adım adım scroll'a geçiliyor.")
+                    strategy = "step"
+                    driver.execute_script("window.scrollTo(0, 0);")
+
+        except FetchError as e:
+            print(f"   ⚠️ {cat['name']} eksik kaldı: {e}")
+            incomplete.append((cat, str(e)))
+        except Exception as e:
+            print(f"   ⚠️ Kategori Genel Hatası ({cat.get('name', 'Bilinmiyor')}): {e}")
+            incomplete.append((cat, f"{type(e).__name__}: {e}"))
+
+    return incomplete
+
+
+def scrape_html_http(session, products_list, today_date, market, categories=None, seen_names=None,
+                     detector=None):
+    """
+    HTTP hızlı yol: kategori sayfasının sunucuda render edilen HTML'inden kartları okur (html_selectors).
+    Yapılandırmada html_page_param varsa sayfalar boş (veya tekrar eden) sayfaya kadar okunur. Yoksa HTML sonsuz
+    scroll listesinin sadece ilk ekranıdır: kategori değişmemişse (önceki gün taşınır) orada biter, değilse
+    satır eklenmeden Selenium'a devredilir; ilk ekranı tam liste saymak kataloğun çoğunu sessizce kaybetmekti.
+    Bir kategorinin satırları ancak tüm sayfaları alınınca eklenir. Selenium ile taranacak kategorileri döndürür.
+    """
+    label = market["label"]
+    print(f"\n🟢 --- {label.upper()} TARANIYOR (HTTP Hızlı Yol) ---")
+    added_product_names = seen_names if seen_names is not None else set()
+    page_param = market.get("html_page_param")
+    policy = policy_for(label, "http")
+    failed = []
+
+    for cat in (categories or market["categories"]):
+        cards_seen = {}  # ad -> fiyat metni (sayfalar arası tekrarlar bir kez)
+        carried = False
+        complete = False
+        try:
+            budget = CategoryBudget(market.get("category_budget", CATEGORY_BUDGET))
+            page = 1
+            while True:
+                url = page_url(cat['url'], page_param, page) if page_param else cat['url']
+                with TELEMETRY.timer(PAGE_LOAD, label):
+                    response = get_with_policy(session, policy, url, budget=budget, timeout=HTTP_TIMEOUT)
+                if page > 1 and response.status_code == 404:
+                    complete = True
+                    break
+                response.raise_for_status()
+
+                with TELEMETRY.timer(PARSE, label):
+                    cards = parse_cards_html(response.text, **market["html_selectors"])
+                if not cards:
+                    complete = page > 1
+                    break
+                TELEMETRY.count("pages", market=label)
+                if page == 1 and detector and detector.first_page(label, cat['name'], cards):
+                    carried = True
+                    break
+                if not page_param:
+                    break
+
+                new = {card["name"]: card["price_text"] for card in cards if card["name"] not in cards_seen}
+                if not new:
+                    # Sunucu sayfa parametresini yok sayıp aynı sayfayı döndürüyor
+                    complete = True
+                    break
+                cards_seen.update(new)
+                page += 1
+        except Exception as e:
+            print(f"   ⚠️ HTTP Hatası ({cat['name']}): {e}")
+            TELEMETRY.event("http_failed", market=label, category=cat['name'], error=str(e).strip())
+            complete = False
+
+        if carried:
+            continue
+        if not complete:
+            if not page_param:
+                print(f"   ↪️ {cat['name']}: HTML sadece ilk ekranı içeriyor, tarayıcıyla taranacak.")
+            failed.append(cat)
+            continue
+
+        added = 0
+        for name, price_text in cards_seen.items():
+            if name in added_product_names:
+                continue
+            products_list.append([today_date, label, cat['name'], name, price_text])
+            added_product_names.add(name)
+            added += 1
+        TELEMETRY.count("cards", added, market=label)
+        print(f"   ✅ {cat['name']}: {len(cards_seen)} ürün (HTTP)")
+
+    return failed
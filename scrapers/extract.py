@@ -0,0 +1,57 @@
+# Tek bir execute_script çağrısıyla sayfadaki tüm kartların isim ve fiyat metnini toplar.
+# Kart başına find_element yapmak her seferinde ayrı bir WebDriver HTTP isteği demekti.
+EXTRACT_CARDS_JS = """
+const cfg = arguments[0];
+const text = el => (el ? (el.innerText || el.textContent || "").trim() : "");
+return Array.from(document.querySelectorAll(cfg.card)).map(card => {
+    let price = "";
+    for (const sel of cfg.price) {
+        const el = card.querySelector(sel);
+        if (el) { price = text(el); break; }
+    }
+    return {name: text(card.querySelector(cfg.name)), price_text: price};
+});
+"""
+
+
+class RoundTripCounter:
+    """
+    Sürücünün yaptığı WebDriver isteklerini sayar.
+    Selenium'da her komut (get, find_element, execute_script, element.text ...)
+    driver.execute üzerinden geçtiği için sayaç oraya bağlanır.
+    """
+
+    def __init__(self, driver):
+        self.total = 0
+        self.page = 0
+        original_execute = driver.execute
+
+        def counting_execute(driver_command, params=None):
+            self.total += 1
+            self.page += 1
+            return original_execute(driver_command, params)
+
+        driver.execute = counting_execute
+
+    def reset_page(self):
+        """Bu sayfada yapılan istek sayısını döndürür ve sayfa sayacını sıfırlar."""
+        count, self.page = self.page, 0
+        return count
+
+
+def round_trip_counter(driver):
+    """Sürücüye bağlı sayacı döndürür; yoksa ilk çağrıda oluşturur."""
+    counter = getattr(driver, "round_trip_counter", None)
+    if counter is None:
+        counter = RoundTripCounter(driver)
+        driver.round_trip_counter = counter
+    return counter
+
+
+def extract_cards(driver, selectors):
+    """
+    selectors: {"card": css, "name": css, "price": [css, ...]}
+    Fiyat seçicileri sırayla denenir (indirimli fiyat yoksa normal fiyat gibi).
+    Dönüş: [{"name": ..., "price_text": ...}, ...]
+    """
+    return driver.execute_script(EXTRACT_CARDS_JS, selectors) or []
@@ -0,0 +1,193 @@
+import os
+import random
+import threading
+import time
+
+from telemetry import TELEMETRY
+
+# Sayfa isteklerinin (driver.get / session.get) etrafındaki koruma katmanı:
+# üstel geri çekilmeli tekrar deneme, market başına hız sınırı (token bucket),
+# art arda hata veren marketi bir süre rahat bırakan devre kesici ve kategori başına süre bütçesi.
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "3"))  # İlk denemeden sonraki en fazla tekrar
+FETCH_BACKOFF = float(os.getenv("FETCH_BACKOFF", "2.0"))  # sn; her tekrarda ikiye katlanır
+FETCH_RATE = float(os.getenv("FETCH_RATE", "2.0"))  # Market başına saniyede istek (tüm işçiler toplamı)
+FETCH_BURST = int(os.getenv("FETCH_BURST", "4"))
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "5"))  # Art arda bu kadar hata -> devre açılır
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "120"))  # sn; sonra tek bir deneme isteğine izin verilir
+CATEGORY_BUDGET = float(os.getenv("CATEGORY_BUDGET", "600"))  # sn; bir kategorinin taranabileceği en uzun süre
+
+
+class FetchError(Exception):
+    """İstek tekrar denemelere rağmen başarısız oldu; kategori eksik kalır."""
+
+
+class CircuitOpenError(FetchError):
+    pass
+
+
+class BudgetExceeded(FetchError):
+    pass
+
+
+class TokenBucket:
+    """Saniyede 'rate' istek, en fazla 'burst' istek birikir. acquire() gerekirse sıra gelene kadar bekler."""
+
+    def __init__(self, rate=FETCH_RATE, burst=FETCH_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Jeton yoksa borçlanılır; bekleme süresi sıradaki isteklere göre uzar
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Art arda 'threshold' hata sonrası açılır: 'cooldown' sn boyunca istek yapılmaz (CircuitOpenError).
+    Süre dolunca tek bir deneme isteğine izin verilir; başarılıysa kapanır, değilse tekrar açılır.
+    """
+
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def check(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.cooldown or self._trial:
+                raise CircuitOpenError(f"{self.name}: devre açık, istek yapılmadı")
+            self._trial = True
+
+    def release(self):
+        """Alınan deneme hakkı kullanılmadan bırakılır (istek hiç yapılmadı); sıradaki istek tekrar deneyebilir."""
+        with self._lock:
+            self._trial = False
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                print(f"   🟢 {self.name}: devre kapandı.")
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self.opened_at is None and self.failures >= self.threshold):
+                print(f"   🔴 {self.name}: {self.failures} hata üst üste, {self.cooldown:.0f} sn istek yapılmayacak.")
+                TELEMETRY.event("breaker_open", policy=self.name, failures=self.failures)
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class CategoryBudget:
+    """Bir kategorinin taranması için süre sınırı."""
+
+    def __init__(self, seconds=CATEGORY_BUDGET):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        if self.expired():
+            raise BudgetExceeded(f"kategori süre bütçesi ({self.seconds:.0f} sn) doldu")
+
+
+class FetchPolicy:
+    """Bir marketin (ve kanalın: tarayıcı / http) tüm işçileri aynı politikayı paylaşır."""
+
+    def __init__(self, name, market=None, retries=FETCH_RETRIES, backoff=FETCH_BACKOFF, rate=FETCH_RATE,
+                 burst=FETCH_BURST):
+        self.name = name
+        self.market = market
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(name)
+
+    def call(self, func, *args, budget=None, **kwargs):
+        """
+        func(*args, **kwargs)'ı politika altında çalıştırır. Hata verirse üstel geri çekilmeyle
+        (rastgele sapmalı) tekrar dener; denemeler biter, devre açılır ya da bütçe dolarsa FetchError fırlatır.
+        """
+        last_error = None
+        for attempt in range(self.retries + 1):
+            # Bütçe devreden önce: devre yarı açıksa check() tek deneme hakkını verir, bütçe hatası onu kilitli bırakmasın
+            if budget:
+                budget.check()
+            self.breaker.check()
+            try:
+                self.bucket.acquire()
+                result = func(*args, **kwargs)
+            except Exception as e:
+                last_error = e
+                self.breaker.failure()
+                if attempt == self.retries or self.breaker.is_open:
+                    break
+                delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+                if budget:
+                    delay = min(delay, budget.remaining())
+                print(f"      🔁 {self.name}: {type(e).__name__}, {delay:.1f} sn sonra tekrar "
+                      f"({attempt + 1}/{self.retries})")
+                TELEMETRY.count("retries", market=self.market)
+                TELEMETRY.event("retry", policy=self.name, error=type(e).__name__, delay=round(delay, 2))
+                time.sleep(delay)
+            except BaseException:
+                # KeyboardInterrupt gibi: istek sonuçlanmadı, deneme hakkı bırakılır
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.success()
+                return result
+        raise FetchError(f"{self.name}: {attempt + 1} denemede başarısız ({str(last_error).strip()})") from last_error
+
+
+_POLICIES = {}
+_SETTINGS = {}  # market -> FetchPolicy argümanları (retries, backoff, rate, burst); bkz. scrapers/registry.py
+_POLICIES_LOCK = threading.Lock()
+
+
+def configure_policy(market, **settings):
+    """Marketin politikalarını varsayılanlar yerine bu ayarlarla kurar (market yapılandırmasındaki "fetch")."""
+    with _POLICIES_LOCK:
+        _SETTINGS[market] = settings
+        # Önceden kurulmuş politikalar yeni ayarlarla yeniden oluşturulsun
+        for key in [k for k in _POLICIES if k.startswith(f"{market}/")]:
+            del _POLICIES[key]
+
+
+def policy_for(market, channel="browser"):
+    """Market + kanal başına tek politika (hız sınırı ve devre kesici tüm işçiler arasında ortaktır)."""
+    key = f"{market}/{channel}"
+    with _POLICIES_LOCK:
+        if key not in _POLICIES:
+            _POLICIES[key] = FetchPolicy(key, market, **_SETTINGS.get(market, {}))
+        return _POLICIES[key]
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Tarayıcıyla aynı kimliği kullanıyoruz ki sunucu aynı içeriği döndürsün
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+HTTP_TIMEOUT = 20  # sn
+# Geçici sunucu hataları; fetch politikası bunları tekrar dener (404 gibi kalıcı cevaplar çağırana kalır)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def create_session(pool_size=10):
+    """Bağlantıları tekrar kullanan (keep-alive) paylaşımlı bir HTTP oturumu oluşturur."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Language": "tr-TR,tr;q=0.9",
+    })
+    return session
+
+
+def get_with_policy(session, policy, url, budget=None, **kwargs):
+    """session.get'i fetch politikası altında çağırır (bkz. scrapers/fetch_policy.py)."""
+
+    def attempt():
+        response = session.get(url, **kwargs)
+        if response.status_code in RETRY_STATUSES:
+            response.raise_for_status()
+        return response
+
+    return policy.call(attempt, budget=budget)
+
+
+def fixture_name(url, params=None):
+    """URL + parametrelerden okunabilir ve benzersiz bir fixture dosya adı üretir."""
+    full_url = f"{url}?{urlencode(params)}" if params else url
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", full_url.split("://", 1)[-1]).strip("_")[:80]
+    digest = hashlib.sha1(full_url.encode("utf-8")).hexdigest()[:10]
+    return f"{slug}_{digest}.txt"
+
+
+class FixtureResponse:
+    """requests.Response'un kullandığımız kısmını taklit eder."""
+
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} (fixture)")
+
+
+class FixtureSession:
+    """
+    Kayıtlı cevapları diskten okuyan çevrimdışı oturum.
+    record_session verilirse eksik cevaplar gerçek siteden çekilip klasöre kaydedilir;
+    böylece testler ve ölçümler internete çıkmadan tekrar oynatılabilir.
+    """
+
+    def __init__(self, fixture_dir, record_session=None):
+        self.fixture_dir = fixture_dir
+        self.record_session = record_session
+
+    def get(self, url, params=None, **kwargs):
+        path = os.path.join(self.fixture_dir, fixture_name(url, params))
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return FixtureResponse(f.read())
+
+        if self.record_session is None:
+            # Kaydı olmayan sayfa: gerçek sitede "sayfa yok" gibi davran
+            return FixtureResponse("", status_code=404)
+
+        response = self.record_session.get(url, params=params, **kwargs)
+        if response.status_code < 400:
+            os.makedirs(self.fixture_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(response.text)
+        return response
+
+
+class CardHTMLParser(HTMLParser):
+    """
+    Sunucudan gelen HTML içinden ürün kartlarını (isim + fiyat metni) çıkarır.
+    Seçiciler {"tag": "div", "classes": [...]} biçimindedir; bir eleman, istenen
+    sınıfların hepsine sahipse eşleşir (CSS'teki div.a.b gibi).
+    """
+
+    def __init__(self, card, name, price):
+        super().__init__(convert_charrefs=True)
+        self.card, self.name, self.price = card, name, price
+        self.cards = []
+        self._stack = []  # açık etiketler: (tag, rol)
+        self._current = None
+
+    @staticmethod
+    def _matches(selector, tag, attrs):
+        if selector.get("tag") and selector["tag"] != tag:
+            return False
+        classes = set((dict(attrs).get("class") or "").split())
+        return set(selector.get("classes", [])) <= classes
+
+    def handle_starttag(self, tag, attrs):
+        role = None
+        if self._current is None and self._matches(self.card, tag, attrs):
+            self._current = {"name": "", "price_text": ""}
+            role = "card"
+        elif self._current is not None:
+            if self._matches(self.name, tag, attrs):
+                role = "name"
+            elif self._matches(self.price, tag, attrs):
+                role = "price_text"
+        self._stack.append((tag, role))
+
+    def handle_endtag(self, tag):
+        # Kapanmayan etiketlere (<img>, <br> vb.) karşı yığında geriye doğru eşle
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                closed = self._stack[i:]
+                del self._stack[i:]
+                if any(role == "card" for _, role in closed) and self._current is not None:
+                    self.cards.append({k: v.strip() for k, v in self._current.items()})
+                    self._current = None
+                return
+
+    def handle_data(self, data):
+        if self._current is None:
+            return
+        for _, role in reversed(self._stack):
+            if role in ("name", "price_text"):
+                self._current[role] += data
+                return
+
+
+def parse_cards_html(html, card, name, price):
+    """HTML metninden [{"name": ..., "price_text": ...}] listesi döndürür."""
+    parser = CardHTMLParser(card, name, price)
+    parser.feed(html)
+    parser.close()
+    return [c for c in parser.cards if c["name"]]
+
+
+def format_kurus(kurus):
+    """API'den kuruş olarak gelen fiyatı sitede görünen metne çevirir (12050 -> '120,50 TL')."""
+    return f"{kurus / 100:.2f}".replace(".", ",") + " TL"
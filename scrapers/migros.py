@@ -1,76 +1,96 @@
-import time
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-
-def scrape_migros(driver, products_list, clean_price_func, unit_price_func, today_date):
-    print("\n🟠 --- MİGROS TARANIYOR (Tam Liste & Çoklu Sayfa) ---")
-
-    CATEGORIES = [
-        {"name": "Süt", "url": "https://www.migros.com.tr/sut-c-6c"},
-        {"name": "Ayçiçek Yağı", "url": "https://www.migros.com.tr/aycicek-yagi-c-42d"},
-        {"name": "Yumurta", "url": "https://www.migros.com.tr/yumurta-c-70"},
-        {"name": "Tavuk Eti", "url": "https://www.migros.com.tr/pilic-c-3fe"},
-        {"name": "Dana Eti", "url": "https://www.migros.com.tr/dana-eti-c-3fa"},
-        {"name": "Balık", "url": "https://www.migros.com.tr/mevsim-baliklari-c-402"},
-        {"name": "Bebek Bezi", "url": "https://www.migros.com.tr/bebek-bezleri-c-1117a"},
-        {"name": "Bakliyat", "url": "https://www.migros.com.tr/bakliyat-c-428"},
-        {"name": "Çay", "url": "https://www.migros.com.tr/dokme-cay-c-28c1"},
-    ]
-
-    for cat in CATEGORIES:
+from scrapers.engines import scrape_paginated
+from scrapers.fetch_policy import CATEGORY_BUDGET, CategoryBudget, policy_for
+from scrapers.http_engine import HTTP_TIMEOUT, format_kurus, get_with_policy
+from scrapers.registry import market_config
+from telemetry import TELEMETRY, PAGE_LOAD, PARSE
+
+# Kategoriler, seçiciler ve sayfalama scrapers/markets/migros.json'da; tarayıcı tarafı genel "page" motoru.
+# Burada sadece Migros'a özel JSON servisi (HTTP hızlı yol) var.
+MARKET = market_config("Migros")
+CATEGORIES = MARKET["categories"]
+SELECTORS = MARKET["selectors"]
+
+
+def scrape_migros(driver, products_list, today_date, categories=None, detector=None, market=None):
+    """
+    Tarayıcıyla tarar (bkz. scrapers/engines.scrape_paginated). market verilmezse migros.json.
+    Yarım kalan kategorileri (kategori, sebep) listesi olarak döndürür.
+    """
+    return scrape_paginated(driver, products_list, today_date, market or MARKET, categories, detector)
+
+
+# --- HTTP HIZLI YOL (Tarayıcısız) ---
+# Migros'un Angular arayüzü ürün listesini bu JSON servisinden çeker (yapılandırmada "api_url").
+API_URL = "https://www.migros.com.tr/rest/search/screens/{slug}"
+
+
+def parse_migros_api(payload):
+    """Liste servisinin JSON cevabından [{"name", "price_text"}] kartları ve toplam sayfa sayısını çıkarır."""
+    info = (payload.get("data") or {}).get("searchInfo") or {}
+    cards = []
+    for item in info.get("storeProductInfos") or []:
+        name = (item.get("name") or "").strip()
+        kurus = item.get("shownPrice") or item.get("salePrice") or item.get("regularPrice")
+        if name and kurus:
+            cards.append({"name": name, "price_text": format_kurus(kurus)})
+    return cards, info.get("pageCount")
+
+
+def scrape_migros_http(session, products_list, today_date, categories=None, detector=None, market=None):
+    """
+    scrape_migros ile aynı sözleşme; sürücü yerine HTTP oturumu alır.
+    Ürün çıkmayan veya hata veren kategorileri döndürür ki Selenium ile tekrar taransın.
+    Bir kategorinin satırları ancak tüm sayfaları alınınca eklenir; yarım kalan kategori tamamen Selenium'a kalır.
+    """
+    print("\n🟢 --- MİGROS TARANIYOR (HTTP Hızlı Yol) ---")
+    market = market or MARKET
+    label = market["label"]
+    api_url = market.get("api_url", API_URL)
+    page_param = market.get("page_param", "sayfa")
+    policy = policy_for(label, "http")
+    failed = []
+
+    for cat in (categories or market["categories"]):
+        slug = cat['url'].rstrip("/").rsplit("/", 1)[-1]
+        budget = CategoryBudget(market.get("category_budget", CATEGORY_BUDGET))
+        rows = []
+        carried = False
         try:
-            print(f"   🌍 Gidiliyor: {cat['name']}")
             page = 1
-
             while True:
-                # DÜZELTME 1: URL yapısı '?sayfa=' olmalı
-                target_url = f"{cat['url']}?sayfa={page}"
-                driver.get(target_url)
-
-                print(f"      📄 Sayfa {page} taranıyor...")
-
-                try:
-                    # Kartların yüklenmesini bekle
-                    WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.TAG_NAME, "mat-card")))
-                    time.sleep(2)  # Sayfanın oturması için
-                except:
-                    print(f"      🏁 {cat['name']} tamamlandı (Sayfa {page}'de ürün yok).")
+                with TELEMETRY.timer(PAGE_LOAD, label):
+                    response = get_with_policy(session, policy, api_url.format(slug=slug), budget=budget,
+                                               params={page_param: page}, timeout=HTTP_TIMEOUT)
+                if response.status_code == 404:
                     break
+                response.raise_for_status()
 
-                # DÜZELTME 2: 'cards' tanımlandıktan sonra işlem yapılıyor
-                cards = driver.find_elements(By.TAG_NAME, "mat-card")
-
-                if len(cards) == 0:
-                    print(f"      🏁 Ürün kalmadı, diğer kategoriye geçiliyor.")
+                with TELEMETRY.timer(PARSE, label):
+                    cards, page_count = parse_migros_api(response.json())
+                if not cards:
+                    break
+                TELEMETRY.count("pages", market=label)
+                if page == 1 and detector and detector.first_page(label, cat['name'], cards):
+                    carried = True
                     break
 
-                print(f"      📍 {len(cards)} ürün bulundu.")
-
-                for card in cards:
-                    try:
-                        name = card.find_element(By.CSS_SELECTOR, "h3, h4, .product-name").text.strip()
-
-                        price_text = ""
-                        try:
-                            price_text = card.find_element(By.CSS_SELECTOR, ".sale-price").text
-                        except:
-                            try:
-                                price_text = card.find_element(By.CSS_SELECTOR, ".amount, .price").text
-                            except:
-                                continue
+                rows.extend([today_date, label, cat['name'], card["name"], card["price_text"]] for card in cards)
+                TELEMETRY.count("cards", len(cards), market=label)
 
-                        price = clean_price_func(price_text)
-                        if not price: continue
+                if page_count and page >= page_count:
+                    break
+                page += 1
+        except Exception as e:
+            print(f"   ⚠️ HTTP Hatası ({cat['name']}): {e}")
+            TELEMETRY.event("http_failed", market=label, category=cat['name'], error=str(e).strip())
+            rows = []
 
-                        unit_price = unit_price_func(name, price)
-                        products_list.append([today_date, "Migros", cat['name'], name, price, unit_price, "TL"])
-                    except:
-                        continue
+        for row in rows:
+            products_list.append(row)
 
-                # DÜZELTME 3: Sayfa sayısını artırıyoruz!
-                page += 1
+        if rows:
+            print(f"   ✅ {cat['name']}: {len(rows)} ürün (HTTP)")
+        elif not carried:
+            failed.append(cat)
 
-        except Exception as e:
-            print(f"   ⚠️ Hata: {e}")
\ No newline at end of file
+    return failed
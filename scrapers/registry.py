@@ -0,0 +1,121 @@
+import functools
+import importlib
+import json
+import os
+
+from scrapers.engines import scrape_paginated, scrape_infinite_scroll, scrape_html_http
+from scrapers.fetch_policy import configure_policy
+
+# Market eklentileri. Her market scrapers/markets/ altında bir JSON dosyasıyla tanımlanır; main.py klasördeki
+# tüm marketleri bulur ve zamanlayıcıya verir. Yeni bir market (ŞOK, BİM ...) için çekirdek koda dokunmadan
+# yeni bir dosya eklemek yeterlidir:
+#
+#   name, label        Market adı ve satırlara yazılan market etiketi
+#   categories         [{"name": "Süt", "url": "..."}]
+#   pagination         "page" (URL parametresiyle sayfa sayfa; page_param) veya "scroll" (sonsuz scroll)
+#   selectors          Tarayıcı kart seçicileri: {"card", "name", "price": [sırayla denenen seçiciler]}
+#   settle / scroll    Bekleme ve scroll ayarları (bkz. scrapers/engines.py varsayılanları)
+#   dedupe_names       true ise aynı ürün adı bir çalıştırmada bir kez eklenir (kategoriler arası)
+#   http               "html": tarayıcısız hızlı yol, sayfanın HTML'inden html_selectors ile okur. Liste
+#                      html_page_param ile sayfalanabiliyorsa tüm sayfalar okunur; yoksa HTML sadece ilk ekran
+#                      sayılır (değişiklik kontrolü), değişen kategori tarayıcıya devredilir
+#   concurrency        {"browser": n, "http": n}: marketin aynı anda çalışan en fazla işi
+#   fetch              Politika ayarları: {"rate", "burst", "retries", "backoff"} (bkz. scrapers/fetch_policy.py)
+#   category_budget    Bir kategorinin en uzun tarama süresi (sn)
+#   scraper / http_scraper   Genel motor yerine özel fonksiyon: "modül:fonksiyon" (ör. Migros'un JSON servisi);
+#                      fonksiyon yapılandırmayı market= argümanıyla alır
+#   enabled, order     Kapatmak için false; zamanlamada marketlerin sırası
+MARKET_CONFIG_DIR = os.getenv("MARKET_CONFIG_DIR", os.path.join(os.path.dirname(__file__), "markets"))
+# Doluysa sadece bu marketler taranır ("Migros,A101")
+ENABLED_MARKETS = os.getenv("MARKETS", "")
+
+ENGINES = {"page": scrape_paginated, "scroll": scrape_infinite_scroll}
+HTTP_ENGINES = {"html": scrape_html_http}
+REQUIRED = ("name", "label", "categories")
+
+
+class MarketConfigError(ValueError):
+    pass
+
+
+def load_config(path):
+    """Tek market dosyasını okur ve doğrular."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    missing = [key for key in REQUIRED if key not in config]
+    if missing:
+        raise MarketConfigError(f"{os.path.basename(path)}: eksik alan(lar): {', '.join(missing)}")
+    if "scraper" not in config:
+        if config.get("pagination") not in ENGINES:
+            raise MarketConfigError(f"{os.path.basename(path)}: pagination {' / '.join(ENGINES)} olmalı "
+                                    f"(veya 'scraper' ile özel fonksiyon verilmeli)")
+        if "selectors" not in config:
+            raise MarketConfigError(f"{os.path.basename(path)}: selectors eksik")
+    if config.get("http") and config["http"] not in HTTP_ENGINES:
+        raise MarketConfigError(f"{os.path.basename(path)}: bilinmeyen http motoru: {config['http']}")
+    return config
+
+
+def _all_configs(config_dir):
+    return [load_config(os.path.join(config_dir, file_name))
+            for file_name in sorted(os.listdir(config_dir)) if file_name.endswith(".json")]
+
+
+def market_config(name, config_dir=MARKET_CONFIG_DIR):
+    """Adı (veya etiketi) verilen marketin yapılandırması, kapalı olsa bile (ör. market_config("Migros"))."""
+    for config in _all_configs(config_dir):
+        if name in (config["name"], config["label"]):
+            return config
+    raise MarketConfigError(f"'{name}' için market dosyası bulunamadı ({config_dir})")
+
+
+def discover(config_dir=MARKET_CONFIG_DIR, enabled=None):
+    """Klasördeki açık market yapılandırmaları, order sırasıyla. enabled verilmezse MARKETS ortam değişkeni."""
+    if enabled is None:
+        enabled = [m.strip() for m in ENABLED_MARKETS.split(",") if m.strip()]
+    configs = [c for c in _all_configs(config_dir)
+               if c.get("enabled", True) and (not enabled or c["name"] in enabled or c["label"] in enabled)]
+    return sorted(configs, key=lambda c: (c.get("order", 100), c["name"]))
+
+
+def resolve(path):
+    """"paket.modül:fonksiyon" -> fonksiyon"""
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def build_market(config):
+    """
+    Yapılandırmadan zamanlayıcının beklediği market tanımı (bkz. scrapers/scheduler.py):
+    func / http_func (sürücü veya oturum, products_list, today_date, categories=, detector=, **kwargs) biçimindedir.
+    """
+    if "scraper" in config:
+        func = functools.partial(resolve(config["scraper"]), market=config)
+    else:
+        func = functools.partial(ENGINES[config["pagination"]], market=config)
+
+    http_func = None
+    if "http_scraper" in config:
+        http_func = functools.partial(resolve(config["http_scraper"]), market=config)
+    elif config.get("http"):
+        http_func = functools.partial(HTTP_ENGINES[config["http"]], market=config)
+
+    if config.get("fetch"):
+        configure_policy(config["label"], **config["fetch"])
+
+    return {
+        "name": config["name"],
+        "label": config["label"],
+        "func": func,
+        "http_func": http_func,
+        "categories": config["categories"],
+        # Tekrar kontrolü kümesi çalıştırma başına yenidir; marketin tüm işleri paylaşır
+        "kwargs": {"seen_names": set()} if config.get("dedupe_names") else {},
+        "concurrency": config.get("concurrency", {}),
+        "config": config,
+    }
+
+
+def load_markets(config_dir=MARKET_CONFIG_DIR, enabled=None):
+    """Taranacak tüm marketler (main.py)."""
+    return [build_market(config) for config in discover(config_dir, enabled)]
@@ -0,0 +1,196 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from scrapers.driver import create_driver
+from telemetry import TELEMETRY, DRIVER_STARTUP
+
+# Aynı anda açık tutulacak tarayıcı sayısı (.env içinden SCRAPE_WORKERS ile ayarlanır)
+DEFAULT_POOL_SIZE = int(os.getenv("SCRAPE_WORKERS", "3"))
+
+
+def build_jobs(markets):
+    """
+    Market tanımlarından (market, kategori) işleri üretir.
+    İşler marketler arasında sırayla dağıtılır (Migros, A101, Migros, ...) ki
+    havuz aynı anda tek bir siteye yüklenmesin.
+    """
+    queues = [[(m, cat) for cat in m["categories"]] for m in markets]
+    jobs = []
+    while any(queues):
+        for q in queues:
+            if q:
+                jobs.append(q.pop(0))
+    return jobs
+
+
+def dispatch(jobs, run_job, pool_size, channel, thread_name_prefix):
+    """
+    İşleri pool_size işçiye dağıtır; marketin "concurrency" sınırı (kanal başına) doluysa o marketin işi
+    bekletilir ve sıradaki başka marketin işi alınır, böylece işçiler boşta beklemez.
+    Biten her iş için (market, kategori, future) üretir.
+    """
+    pending = list(jobs)
+    running = {}
+    active = Counter()
+
+    def limit(market):
+        return (market.get("concurrency") or {}).get(channel) or pool_size
+
+    with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix=thread_name_prefix) as executor:
+        def fill():
+            for job in list(pending):
+                if len(running) >= pool_size:
+                    return
+                market, cat = job
+                if active[market["name"]] >= limit(market):
+                    continue
+                pending.remove(job)
+                active[market["name"]] += 1
+                running[executor.submit(run_job, market, cat)] = job
+
+        fill()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                market, cat = running.pop(future)
+                active[market["name"]] -= 1
+                yield market, cat, future
+            fill()
+
+
+class DriverPool:
+    """
+    Her işçi thread'ine kendi tarayıcısını ve kendi geçici profil klasörünü verir.
+    Sürücüler ilk ihtiyaçta açılır, close_all() ile hepsi kapatılır.
+    """
+
+    def __init__(self, driver_factory=create_driver):
+        self.driver_factory = driver_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._drivers = []  # (driver, profile_dir)
+
+    def get(self):
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            profile_dir = tempfile.mkdtemp(prefix="inflation_chrome_")
+            with TELEMETRY.timer(DRIVER_STARTUP):
+                driver = self.driver_factory(profile_dir)
+            self._local.driver = driver
+            with self._lock:
+                self._drivers.append((driver, profile_dir))
+        return driver
+
+    def discard(self):
+        """Hata veren sürücüyü kapatır; bu thread'in bir sonraki işi temiz bir tarayıcıyla başlar."""
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            return
+        self._local.driver = None
+        with self._lock:
+            entry = next((e for e in self._drivers if e[0] is driver), None)
+            if entry:
+                self._drivers.remove(entry)
+        if entry:
+            self._close(*entry)
+
+    def close_all(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver, profile_dir in drivers:
+            self._close(driver, profile_dir)
+
+    @staticmethod
+    def _close(driver, profile_dir):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def run_scrape_jobs(jobs, products_list, today_date, pool_size=None, driver_factory=create_driver, on_job_done=None,
+                    detector=None):
+    """
+    (market, kategori) işlerini sınırlı sayıda tarayıcı işçisine dağıtır (marketin browser eşzamanlılık sınırıyla).
+    Tüm işler ham satırlarını aynı products_list'e ekler (list.append thread-safe'dir).
+    on_job_done(market, cat, incomplete) hatasız biten her iş için çağrılır; scraper kategoriyi yarım
+    bıraktıysa (süre bütçesi, tekrar denemeler, devre kesici) incomplete sebebi içerir, yoksa None'dır.
+    detector verilirse (bkz. change_detection.py) ilk sayfası değişmeyen kategoriler taranmaz.
+    """
+    pool_size = max(1, pool_size or DEFAULT_POOL_SIZE)
+    pool = DriverPool(driver_factory)
+    started = time.time()
+
+    def run_job(market, cat):
+        driver = pool.get()
+        job_start = time.time()
+        try:
+            incomplete = market["func"](driver, products_list, today_date, categories=[cat], detector=detector,
+                                        **market.get("kwargs", {}))
+        except Exception:
+            pool.discard()
+            raise
+        reason = next((r for c, r in incomplete or [] if c["name"] == cat["name"]), None)
+        return time.time() - job_start, reason
+
+    print(f"\n🧵 {len(jobs)} iş, {pool_size} tarayıcı işçisine dağıtılıyor...")
+    try:
+        for market, cat, future in dispatch(jobs, run_job, pool_size, "browser", "scraper"):
+            try:
+                elapsed, incomplete = future.result()
+                status = f"EKSİK: {incomplete}" if incomplete else "bitti"
+                print(f"   ⏱️ {market['name']} / {cat['name']} {status} ({elapsed:.1f} sn)")
+                TELEMETRY.event("job", channel="browser", market=market["label"], category=cat["name"],
+                                seconds=round(elapsed, 2), incomplete=incomplete)
+                if on_job_done:
+                    on_job_done(market, cat, incomplete)
+            except Exception as e:
+                print(f"❌ {market['name']} / {cat['name']} Hatası: {e}")
+                TELEMETRY.event("job_failed", channel="browser", market=market["label"], category=cat["name"],
+                                error=f"{type(e).__name__}: {str(e).strip()}")
+    finally:
+        pool.close_all()
+
+    print(f"🧵 Tüm işler {time.time() - started:.1f} sn içinde tamamlandı.")
+    return products_list
+
+
+def run_http_jobs(jobs, session, products_list, today_date, pool_size=None, on_job_done=None, detector=None):
+    """
+    HTTP hızlı yolu olan marketlerin işlerini tarayıcı açmadan tarar.
+    Başarısız olan (veya HTTP yolu olmayan) işleri Selenium'a devretmek için geri döndürür.
+    """
+    pool_size = max(1, pool_size or DEFAULT_POOL_SIZE)
+    remaining = [(m, cat) for m, cat in jobs if not m.get("http_func")]
+    http_jobs = [(m, cat) for m, cat in jobs if m.get("http_func")]
+    if not http_jobs:
+        return remaining
+
+    def run_job(market, cat):
+        job_start = time.time()
+        failed = market["http_func"](session, products_list, today_date, categories=[cat], detector=detector,
+                                     **market.get("kwargs", {}))
+        TELEMETRY.event("job", channel="http", market=market["label"], category=cat["name"],
+                        seconds=round(time.time() - job_start, 2), fallback=bool(failed))
+        return failed
+
+    started = time.time()
+    for market, cat, future in dispatch(http_jobs, run_job, pool_size, "http", "http"):
+        try:
+            failed = future.result()
+        except Exception as e:
+            print(f"❌ {market['name']} / {cat['name']} HTTP Hatası: {e}")
+            failed = [cat]
+        remaining.extend((market, c) for c in failed)
+        if not failed and on_job_done:
+            on_job_done(market, cat, None)
+
+    print(f"🟢 HTTP hızlı yol {time.time() - started:.1f} sn sürdü, "
+          f"{len(remaining)} iş tarayıcıya devrediliyor.")
+    return remaining
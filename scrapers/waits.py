@@ -0,0 +1,76 @@
+import threading
+
+# Tarayıcı içinde çalışır: kart sayısı en az min_count olduktan sonra DOM 'quiet' ms boyunca
+# değişmezse (MutationObserver) biter; cap ms aşılırsa da beklemeyi bırakır. Tek WebDriver isteğidir.
+SETTLE_JS = """
+const [selector, minCount, quietMs, capMs, done] = arguments;
+const count = () => document.querySelectorAll(selector).length;
+const start = performance.now();
+let last = start;
+const observer = new MutationObserver(() => { last = performance.now(); });
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+const tick = () => {
+    const now = performance.now();
+    const n = count();
+    const settled = n >= minCount && now - last >= quietMs;
+    if (settled || now - start >= capMs) {
+        observer.disconnect();
+        done({count: n, waited: (now - start) / 1000, settled: settled});
+    } else {
+        setTimeout(tick, 50);
+    }
+};
+tick();
+"""
+
+# Kaydırır ve kaç piksel kaydırıldığını döndürür (bekleme tasarrufu hesabı için)
+SCROLL_JS = """
+const before = window.pageYOffset;
+if (arguments[0] === "jump") { window.scrollTo(0, document.body.scrollHeight); }
+else { window.scrollBy(0, arguments[1]); }
+return window.pageYOffset - before;
+"""
+
+
+class WaitStats:
+    """Tüm işçilerin beklemelerini toplar: gerçekte beklenen süre vs. eski sabit sleep süresi."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waited = 0.0
+        self.baseline = 0.0
+        self.capped = 0
+
+    def add(self, waited, baseline, settled):
+        with self._lock:
+            self.calls += 1
+            self.waited += waited
+            self.baseline += baseline
+            self.capped += 0 if settled else 1
+
+    def report(self):
+        saved = self.baseline - self.waited
+        return (f"⏳ Bekleme: {self.calls} kez, toplam {self.waited:.1f} sn "
+                f"(sabit sleep ile {self.baseline:.1f} sn olacaktı, kazanç {saved:.1f} sn, "
+                f"{self.capped} kez üst sınıra takıldı)")
+
+
+WAIT_STATS = WaitStats()
+
+
+def wait_for_settle(driver, card_selector, baseline, cap=5.0, quiet=0.4, min_count=1):
+    """
+    Sabit time.sleep yerine: kartlar gelip DOM oturduğu anda devam eder.
+    baseline: bu beklemenin yerini aldığı eski sabit süre (sn), tasarruf raporu için.
+    Dönüş: sayfadaki kart sayısı.
+    """
+    result = driver.execute_async_script(SETTLE_JS, card_selector, min_count, int(quiet * 1000), int(cap * 1000))
+    result = result or {}
+    WAIT_STATS.add(result.get("waited", cap), baseline, result.get("settled", False))
+    return result.get("count", 0)
+
+
+def scroll(driver, strategy="jump", step=500):
+    """strategy='jump' sayfanın sonuna atlar, 'step' step piksel kaydırır. Kaydırılan pikseli döndürür."""
+    return driver.execute_script(SCROLL_JS, strategy, step) or 0
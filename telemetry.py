@@ -0,0 +1,158 @@
+import datetime
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from psycopg2.extras import Json
+
+# Gece taramasının vaktini nerede harcadığını ve ne kadar veri topladığını ölçer.
+# Scraper'lar, zamanlayıcı ve yazıcı thread'i aşama sürelerini (timer) ve sayaçları (count) market bazında
+# TELEMETRY'ye bildirir; main.py çalıştırma sonunda özeti scrape_runs tablosuna tek satır olarak yazar.
+# Bir çalıştırmada saklanacak en fazla olay (iş bitti, eksik kategori, tekrar deneme ...)
+RUN_LOG_LIMIT = int(os.getenv("RUN_LOG_LIMIT", "2000"))
+
+# Aşamalar
+DRIVER_STARTUP = "driver_startup"  # Chrome açılışı
+PAGE_LOAD = "page_load"  # driver.get / HTTP isteği
+WAIT = "wait"  # Kartların gelmesini ve DOM'un oturmasını bekleme
+EXTRACT = "extract"  # Kartları sayfadan okuma (execute_script)
+PARSE = "parse"  # HTTP cevabını ayrıştırma ve kayıttan önce toplu temizleme (cleaning.py)
+DB_WRITE = "db_write"  # COPY + upsert + commit
+VALIDATE = "validate"  # Şüpheli fiyat / adet düşüşü kontrolü (anomalies.py)
+ROLLUPS = "rollups"
+INDEX = "index"  # Fiyat endeksi güncellemesi (inflation_index.py)
+STAGES = (DRIVER_STARTUP, PAGE_LOAD, WAIT, EXTRACT, PARSE, DB_WRITE, VALIDATE, ROLLUPS, INDEX)
+
+INSERT_RUN = '''
+             INSERT INTO scrape_runs (date, started_at, finished_at, duration, engine, status,
+                                      rows_written, rows_rejected, rows_duplicate, pages, cards,
+                                      categories_done, categories_incomplete, categories_carried,
+                                      stages, markets, counters, log)
+             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+             RETURNING id
+             '''
+
+
+class RunTelemetry:
+    """
+    Bir çalıştırmanın aşama süreleri, sayaçları ve olayları. Tüm işçi thread'leri aynı nesneye yazar.
+    Süreler ve sayaçlar (market, ad) anahtarıyla tutulur; market bilinmeyen ölçümler (sürücü açılışı gibi)
+    None altında toplanır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, engine=None):
+        """Yeni çalıştırma: önceki ölçümler silinir."""
+        with self._lock:
+            self.engine = engine
+            self.started_at = datetime.datetime.now()
+            self._started = time.perf_counter()
+            self.timers = defaultdict(lambda: [0, 0.0, 0.0])  # (market, aşama) -> [adet, toplam sn, en uzun sn]
+            self.counters = Counter()  # (market, sayaç) -> değer
+            self.events = []
+            self.dropped_events = 0
+
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+    # --- Ölçüm ---
+
+    def add_time(self, stage, seconds, market=None):
+        with self._lock:
+            timer = self.timers[(market, stage)]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, stage, market=None):
+        """with TELEMETRY.timer(PAGE_LOAD, "Migros"): driver.get(url)  -- hata verse de süre sayılır."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start, market)
+
+    def count(self, name, n=1, market=None):
+        if n:
+            with self._lock:
+                self.counters[(market, name)] += n
+
+    def event(self, kind, **fields):
+        """Yapılandırılmış log kaydı; scrape_runs.log kolonunda JSON listesi olarak saklanır."""
+        entry = {"t": round(self.elapsed(), 3), "event": kind, **fields}
+        with self._lock:
+            if len(self.events) < RUN_LOG_LIMIT:
+                self.events.append(entry)
+            else:
+                self.dropped_events += 1
+
+    # --- Özet ---
+
+    def totals(self):
+        """Tüm marketler toplamı: ({aşama: {"n", "total", "max"}}, {sayaç: değer})"""
+        stages = {}
+        counters = Counter()
+        with self._lock:
+            for (_, stage), (n, total, longest) in self.timers.items():
+                entry = stages.setdefault(stage, {"n": 0, "total": 0.0, "max": 0.0})
+                entry["n"] += n
+                entry["total"] += total
+                entry["max"] = max(entry["max"], longest)
+            for (_, name), value in self.counters.items():
+                counters[name] += value
+        for entry in stages.values():
+            entry["total"] = round(entry["total"], 3)
+            entry["max"] = round(entry["max"], 3)
+        return stages, dict(counters)
+
+    def by_market(self):
+        """{market: {"stages": {aşama: toplam sn}, "counters": {sayaç: değer}}}"""
+        markets = {}
+        with self._lock:
+            for (market, stage), (_, total, _) in self.timers.items():
+                if market is not None:
+                    markets.setdefault(market, {"stages": {}, "counters": {}})["stages"][stage] = round(total, 3)
+            for (market, name), value in self.counters.items():
+                if market is not None:
+                    markets.setdefault(market, {"stages": {}, "counters": {}})["counters"][name] = value
+        return markets
+
+    def report(self):
+        stages, counters = self.totals()
+        lines = [f"📈 Çalıştırma özeti ({self.elapsed():.1f} sn):"]
+        for stage in sorted(stages, key=lambda s: -stages[s]["total"]):
+            entry = stages[stage]
+            lines.append(f"   ⏱️ {stage:<15} {entry['total']:8.1f} sn  ({entry['n']} kez, en uzun {entry['max']:.1f} sn)")
+        for market, values in sorted(self.by_market().items()):
+            counts = ", ".join(f"{name}: {value}" for name, value in sorted(values["counters"].items()))
+            lines.append(f"   🏪 {market}: {counts}")
+        return "\n".join(lines)
+
+
+TELEMETRY = RunTelemetry()
+
+
+def save_run(conn, telemetry, date, status, rows_written):
+    """Çalıştırmanın özet satırını scrape_runs tablosuna yazar. Commit çağırana bırakılır. Satır id'sini döndürür."""
+    stages, counters = telemetry.totals()
+    log = list(telemetry.events)
+    if telemetry.dropped_events:
+        log.append({"t": round(telemetry.elapsed(), 3), "event": "log_truncated", "dropped": telemetry.dropped_events})
+
+    cur = conn.cursor()
+    cur.execute(INSERT_RUN, (
+        date, telemetry.started_at, datetime.datetime.now(), round(telemetry.elapsed(), 3), telemetry.engine, status,
+        rows_written, counters.get("rejects", 0), counters.get("duplicates", 0),
+        counters.get("pages", 0), counters.get("cards", 0), counters.get("categories_done", 0),
+        counters.get("categories_incomplete", 0), counters.get("categories_carried", 0),
+        Json(stages), Json(telemetry.by_market()), Json(counters), Json(log),
+    ))
+    run_id = cur.fetchone()[0]
+    cur.close()
+    return run_id
@@ -0,0 +1,53 @@
+"""
+HTTP hızlı yolun kayıtlı cevaplarla (scrapers/http_engine.FixtureSession) çevrimdışı testi.
+tests/fixtures/http/ altındaki dosyalar HTTP_FIXTURE_DIR biçimindedir (ad: fixture_name(url, params));
+main.py'yi HTTP_FIXTURE_DIR=tests/fixtures/http ile çalıştırmak da aynı cevapları kullanır.
+"""
+import os
+
+from scrapers.http_engine import FixtureSession
+from scrapers.registry import build_market, market_config
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "http")
+TODAY = "2030-01-01"
+
+
+def _run_http(config, categories):
+    market = build_market(config)
+    rows = []
+    failed = market["http_func"](FixtureSession(FIXTURE_DIR), rows, TODAY, categories=categories,
+                                 **market["kwargs"])
+    return rows, failed
+
+
+def test_migros_api_reads_every_page():
+    config = market_config("Migros")
+    rows, failed = _run_http(config, config["categories"][:1])
+    assert failed == []
+    assert len(rows) == 5  # 2 sayfa: 3 + 2 ürün
+    assert rows[0] == [TODAY, "Migros", "Süt", "Pınar Tam Yağlı Süt 1 L", "38,50 TL"]
+    assert rows[-1][3:] == ["Pınar Süt 4x1 L", "149,90 TL"]
+
+
+def test_migros_missing_category_goes_to_browser():
+    config = market_config("Migros")
+    rows, failed = _run_http(config, config["categories"][1:2])  # Kaydı yok: 404
+    assert rows == []
+    assert failed == config["categories"][1:2]
+
+
+def test_a101_first_screen_is_not_a_complete_category():
+    # Sonsuz scroll listesinin HTML'i sadece ilk ekrandır; satır eklenmez, kategori tarayıcıya devredilir
+    config = market_config("A101")
+    rows, failed = _run_http(config, config["categories"][:1])
+    assert rows == []
+    assert failed == config["categories"][:1]
+
+
+def test_html_pages_are_followed_until_the_list_ends():
+    config = dict(market_config("A101"), html_page_param="page")
+    rows, failed = _run_http(config, config["categories"][:1])
+    assert failed == []
+    assert len(rows) == 5  # 2 sayfa: 3 + 2 ürün, 3. sayfa 404
+    assert [r[3] for r in rows][:2] == ["Pınar Tam Yağlı Süt 1 L", "Sütaş Yarım Yağlı Süt 1 L"]
+    assert rows[-1][3:] == ["Torku Süt 6x1 L", "₺189,00"]
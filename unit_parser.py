@@ -0,0 +1,216 @@
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Ürün adından miktar, birim ve paket adedini çıkarıp birim fiyatı (TL/kg, TL/L, TL/adet) hesaplar.
+# Kurallar RULES tablosunda sırayla denenir, ilk uyan kural kazanır. Yeni bir kural için tabloya satır eklemek yeterli.
+
+# Ad içindeki birim -> (temel birim, çarpan)
+UNITS = {"kg": ("kg", 1.0), "gr": ("kg", 0.001), "g": ("kg", 0.001),
+         "lt": ("l", 1.0), "l": ("l", 1.0), "ml": ("l", 0.001), "adet": ("adet", 1.0)}
+_UNIT_ALT = "kg|gr?|lt?|ml"
+_NUMBER = r"\d+(?:\.\d+)?"
+# Türkçe binlik ayırıcı: "1.000 gr", "2.500 ml" -> 1000 gr, 2500 ml (ondalık ayırıcı virgüldür: "1,5 L").
+# Gram/mililitre önünde 1-3 hane + nokta + 3 hanelik grup binlik sayılır; normalize'da virgülden önce silinir.
+_THOUSANDS = r"(^|[^\d.])(\d{1,3})\.(\d{3})(?:\.(\d{3}))?(gr?|ml)"
+_THOUSANDS_RE = re.compile(_THOUSANDS)
+
+FISH_WORDS = ("levrek", "cipura", "çipura", "somon", "uskumru")
+# Gramajdan çıkan birim fiyat bunun altındaysa miktar büyük ihtimalle yanlış okunmuştur; raf fiyatı kalır
+MIN_UNIT_PRICE = 5.0
+CHEAP_EXEMPT = ("su", "soda")
+
+# requires: hepsi adda geçmeli, requires_any: en az biri geçmeli
+# Desenin isimli grupları: count = paket adedi, amount = miktar, unit = birim; grubu olmayan alan kuraldaki
+# sabit değerden gelir. keep_price: birim fiyat hesaplanmaz, raf fiyatı kalır (düşük güven)
+# Desenler normalize edilmiş ada uygulanır (küçük harf, boşluksuz, ondalık nokta). Toplu sürüm aynı desenleri
+# RE2 ile (pyarrow) çalıştırır; bu yüzden geriye bakış (lookbehind) gibi RE2'nin desteklemediği yapılar kullanılmaz.
+RULES = [
+    # 4x1 L, 6*200 ml
+    {"name": "multipack", "pattern": rf"(?P<count>\d+)[*x](?P<amount>{_NUMBER})(?P<unit>{_UNIT_ALT})"},
+    # Yumurta: 15'li, 30lu
+    {"name": "pieces", "requires": ("yumurta",), "pattern": r"(?P<amount>\d+)['’]?l[ıiuü]", "unit": "adet"},
+    # Yumurta: 30 adet
+    {"name": "adet", "requires": ("yumurta",), "pattern": r"(?P<amount>\d+)adet", "unit": "adet"},
+    # Balık kalibresi (400/600 gr levrek): gramaj paketin değil balığın ağırlığı
+    {"name": "calibre", "requires": ("/",), "requires_any": FISH_WORDS, "keep_price": True},
+    # 1 kg, 500 gr, 1.5 L
+    {"name": "size", "pattern": rf"(?P<amount>{_NUMBER})(?P<unit>{_UNIT_ALT})", "min_unit_price": MIN_UNIT_PRICE},
+    # Kilo ile satılan ürün (Dana Biftek Kg): raf fiyatı zaten kg fiyatı
+    {"name": "per_kg", "pattern": r"(?:^|[^\d.])(?P<unit>kg)$", "amount": 1},
+]
+
+for _rule in RULES:
+    _rule["regex"] = re.compile(_rule["pattern"]) if "pattern" in _rule else None
+    _rule.setdefault("requires", ())
+    _rule.setdefault("requires_any", ())
+    _rule["conditional"] = bool(_rule["requires"] or _rule["requires_any"])
+
+_CHEAP_EXEMPT_RE = re.compile("|".join(CHEAP_EXEMPT))
+
+UnitParse = namedtuple("UnitParse", "amount unit pack_count unit_price confident rule")
+_NO_MATCH = (np.nan, None, 1, None)
+
+
+def normalize(name):
+    """
+    'Sütaş Süt 4 x 1,5 LT' -> 'sütaşsüt4x1.5lt', 'Un 1.000 gr' -> 'un1000gr'.
+    Türkçe büyük harfler lower()'dan önce çevrilir.
+    """
+    text = name.replace("İ", "i").replace("I", "ı").lower().replace(" ", "")
+    return _THOUSANDS_RE.sub(r"\1\2\3\4\5", text).replace(",", ".")
+
+
+def _quantity(rule, groups):
+    """Eşleşme gruplarından (toplam miktar, temel birim, paket adedi); miktar sıfırsa None."""
+    base_unit, factor = UNITS[groups.get("unit") or rule["unit"]]
+    count = int(groups.get("count") or 1)
+    amount = count * float(groups.get("amount") or rule["amount"]) * factor
+    return (amount, base_unit, count) if amount > 0 else None
+
+
+def _applies(rule, text):
+    for word in rule["requires"]:
+        if word not in text:
+            return False
+    return not rule["requires_any"] or any(word in text for word in rule["requires_any"])
+
+
+def _parse_quantity(text):
+    """Normalize edilmiş ad için (miktar, birim, paket adedi, kural); fiyattan bağımsızdır."""
+    for rule in RULES:
+        if rule["conditional"] and not _applies(rule, text):
+            continue
+        if rule["regex"] is None:
+            return np.nan, None, 1, rule
+        match = rule["regex"].search(text)
+        if match:
+            quantity = _quantity(rule, match.groupdict())
+            if quantity:
+                return quantity + (rule,)
+    return _NO_MATCH
+
+
+def _price_step(text, price, amount, rule):
+    """Miktardan birim fiyat ve güven bayrağı."""
+    if rule is None or rule["regex"] is None:
+        return price, False
+    unit_price = price / amount
+    if unit_price < rule.get("min_unit_price", 0) and not _CHEAP_EXEMPT_RE.search(text):
+        return price, False
+    return round(unit_price, 2), True
+
+
+def parse_unit(product_name, price):
+    """Tek ürün için miktar/birim/paket adedi ve birim fiyat. Miktar bulunamazsa birim fiyat raf fiyatıdır."""
+    text = normalize(product_name)
+    amount, unit, count, rule = _parse_quantity(text)
+    unit_price, confident = _price_step(text, price, amount, rule)
+    return UnitParse(amount, unit, count, unit_price, confident, rule and rule["name"])
+
+
+def unit_price(product_name, price):
+    return parse_unit(product_name, price).unit_price
+
+
+def _normalize_many(names):
+    """normalize'un pyarrow sürümü (tek seferde tüm dizi)."""
+    arr = pc.replace_substring(pc.replace_substring(pa.array(names, type=pa.string()), "İ", "i"), "I", "ı")
+    arr = pc.replace_substring(pc.utf8_lower(arr), " ", "")
+    arr = pc.replace_substring_regex(arr, _THOUSANDS, r"\1\2\3\4\5")
+    return pc.replace_substring(arr, ",", ".")
+
+
+def _field(extracted, name, default, dtype=pa.float64()):
+    if name in [f.name for f in extracted.type]:
+        return pc.cast(pc.struct_field(extracted, name), dtype).to_numpy(zero_copy_only=False)
+    return np.full(len(extracted), default)
+
+
+def _parse_quantities(texts):
+    """
+    _parse_quantity'nin toplu sürümü: her kural, henüz çözülmemiş tüm adlara tek seferde
+    (pyarrow / RE2 ile, Python döngüsü olmadan) uygulanır.
+    """
+    n = len(texts)
+    amount = np.full(n, np.nan)
+    unit = np.full(n, None, dtype=object)
+    pack_count = np.ones(n, dtype=np.int64)
+    rule_at = np.full(n, -1, dtype=np.int64)
+    pending = np.ones(n, dtype=bool)
+    unit_names = list(UNITS)
+    base_units = np.array([UNITS[u][0] for u in unit_names], dtype=object)
+    factors = np.array([UNITS[u][1] for u in unit_names])
+
+    for r, rule in enumerate(RULES):
+        # Sadece henüz çözülmemiş adlar taranır
+        idx = np.flatnonzero(pending)
+        subset = texts.take(pa.array(idx))
+        keep = np.ones(len(idx), dtype=bool)
+        for word in rule["requires"]:
+            keep &= pc.match_substring(subset, word).to_numpy(zero_copy_only=False)
+        if rule["requires_any"]:
+            keep &= pc.match_substring_regex(subset, "|".join(map(re.escape, rule["requires_any"]))).to_numpy(
+                zero_copy_only=False)
+        if not keep.all():
+            idx, subset = idx[keep], subset.filter(pa.array(keep))
+        if not len(idx):
+            continue
+
+        if rule["regex"] is None:
+            rule_at[idx] = r
+            pending[idx] = False
+            continue
+
+        extracted = pc.extract_regex(subset, rule["pattern"])
+        matched = extracted.is_valid().to_numpy(zero_copy_only=False)
+        counts = _field(extracted, "count", 1.0)
+        amounts = _field(extracted, "amount", float(rule.get("amount", np.nan)))
+        if "unit" in [f.name for f in extracted.type]:
+            unit_idx = pc.index_in(pc.struct_field(extracted, "unit"), value_set=pa.array(unit_names))
+            unit_idx = pc.fill_null(unit_idx, 0).to_numpy(zero_copy_only=False)
+        else:
+            unit_idx = np.full(len(idx), unit_names.index(rule["unit"]))
+        with np.errstate(invalid="ignore"):
+            total = counts * amounts * factors[unit_idx]
+            hit = matched & (total > 0)
+
+        rows = idx[hit]
+        amount[rows], unit[rows], pack_count[rows] = total[hit], base_units[unit_idx[hit]], counts[hit].astype(np.int64)
+        rule_at[rows] = r
+        pending[rows] = False
+
+    return amount, unit, pack_count, rule_at
+
+
+def parse_units(names, prices):
+    """
+    Toplu sürüm: isim ve fiyat listeleri (veya pandas Series) alır, parse_unit ile aynı sonucu verir.
+    Her farklı ad bir kere ayrıştırılır (tekrar eden adlar aynı miktarı paylaşır); normalizasyon ve her kural
+    tüm adlara pyarrow (RE2) ile tek seferde uygulanır, birim fiyat ve güven bayrağı vektörel hesaplanır.
+    Dönüş: amount, unit, pack_count, unit_price, confident, rule kolonlu DataFrame (girdinin index'iyle).
+    """
+    index = names.index if isinstance(names, pd.Series) else None
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object), use_na_sentinel=False)
+    texts = _normalize_many(uniques)
+
+    amount, unit, pack_count, rule_at = (a[codes] for a in _parse_quantities(texts))
+    prices = np.asarray(prices, dtype=float)
+
+    # Birim fiyat: miktarı bulunanlarda fiyat / miktar; alt sınırın altında kalanlarda (su/soda hariç) raf fiyatı
+    min_price = np.array([rule.get("min_unit_price", 0) for rule in RULES] + [0.0])[rule_at]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per_unit = prices / amount
+    too_cheap = per_unit < min_price
+    exempt = pc.match_substring_regex(texts, _CHEAP_EXEMPT_RE.pattern).to_numpy(zero_copy_only=False)[codes]
+    confident = ~np.isnan(amount) & (~too_cheap | exempt)
+    result = prices.copy()
+    result[confident] = [round(x, 2) for x in per_unit[confident].tolist()]
+
+    rule_names = np.array([rule["name"] for rule in RULES] + [None], dtype=object)[rule_at]
+    return pd.DataFrame({"amount": amount, "unit": unit, "pack_count": pack_count, "unit_price": result,
+                         "confident": confident, "rule": rule_names}, index=index)